@@ -32,7 +32,8 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 security = HTTPBearer()
 
 # ========== IN-MEMORY DATABASE ==========
-users_db = []
+users_db = {}         # id -> user
+users_by_email = {}   # normalized email -> user
 jobs_db = []
 applications_db = []
 next_id = 1
@@ -108,16 +109,14 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 
 # ========== HELPER FUNCTIONS ==========
 def get_user_by_id(user_id: int):
-    for user in users_db:
-        if user['id'] == user_id:
-            return user
-    return None
+    return users_db.get(user_id)
 
 def get_user_by_email(email: str):
-    for user in users_db:
-        if user['email'] == email:
-            return user
-    return None
+    return users_by_email.get(email.strip().lower())
+
+def add_user(user: dict):
+    users_db[user['id']] = user
+    users_by_email[user['email'].strip().lower()] = user
 
 # ========== STEP 4: AUTHENTICATION ENDPOINTS ==========
 @app.post("/register", response_model=dict)
@@ -154,7 +153,7 @@ async def register(user_data: UserRegister):
         "is_active": True,
         "created_at": datetime.utcnow().isoformat()
     }
-    users_db.append(new_user)
+    add_user(new_user)
     next_id += 1
     
     # Create access token
@@ -283,6 +282,7 @@ async def create_sample_data():
     try:
         # Clear existing data
         users_db.clear()
+        users_by_email.clear()
         jobs_db.clear()
         applications_db.clear()
         next_id = 1
@@ -304,7 +304,7 @@ async def create_sample_data():
                 "is_active": True,
                 "created_at": datetime.utcnow().isoformat()
             }
-            users_db.append(user_data)
+            add_user(user_data)
             next_id += 1
         
         # Create sample jobs
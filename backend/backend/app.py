@@ -1,13 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
+from .core.lifecycle import lifespan
+from .core.metrics import TimedRoute, TimingMiddleware
+from .core.rate_limit import RateLimitMiddleware
 
 def create_application() -> FastAPI:
     app = FastAPI(
         title="AI Job Platform API",
         description="A modern job platform with AI-powered resume analysis and job matching",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
+    app.router.route_class = TimedRoute
+
+    # Added first so it is innermost: refusals still get CORS headers and
+    # are timed
+    app.add_middleware(RateLimitMiddleware)
 
     # Add CORS middleware - RESTRICTED to specific origins
     app.add_middleware(
@@ -18,6 +27,9 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Added last so it is outermost and its timings include CORS handling
+    app.add_middleware(TimingMiddleware)
+
     return app
 
 # Create app instance
@@ -1,21 +1,145 @@
-from dotenv import load_dotenv
+import logging
 import os
 import sys
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+def find_env_file():
+    """Nearest .env in this package's directory or its parents (the lookup
+    python-dotenv's load_dotenv() does), without importing dotenv
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+# Deployments usually configure the environment directly; python-dotenv is
+# only imported when there is a .env file to read
+_env_file = find_env_file()
+if _env_file:
+    from dotenv import load_dotenv
+    load_dotenv(_env_file)
 
 class Settings:
+    # Server: "development" runs one auto-reloading process, "production"
+    # runs WEB_CONCURRENCY worker processes (one per CPU by default)
+    ENVIRONMENT = os.getenv("ENVIRONMENT", "development").lower()
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", "8000"))
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) if ENVIRONMENT == "production" else 1))
+    
     # Supabase Configuration
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "10"))
+    
+    # Storage: "memory" (tests/demo), "sqlite" (local) or "postgres" (prod)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory").lower()
+    DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pathai.db")
+    DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    # How often each worker indexes records other workers wrote (0 disables;
+    # off by default for the memory backend, which no other process shares)
+    INDEX_SYNC_SECONDS = float(os.getenv("INDEX_SYNC_SECONDS", "0" if STORAGE_BACKEND == "memory" else "5"))
+    # Change-log entries older than this are pruned; a worker that has not
+    # synced for half of it rebuilds its indexes from the tables instead of
+    # reading the logs
+    CHANGE_LOG_RETENTION_SECONDS = float(os.getenv("CHANGE_LOG_RETENTION_SECONDS", "3600"))
+    # Change-log ids are allocated before commit, so entries are read again
+    # until they are this old; longer transactions could be missed
+    CHANGE_LOG_GRACE_SECONDS = float(os.getenv("CHANGE_LOG_GRACE_SECONDS", "60"))
+    # How often each worker checks whether the write deltas of its candidate
+    # indexes are due to be merged, which then runs on a worker thread
+    # (0 disables it; the deltas are then only merged before saving)
+    INDEX_COMPACT_SECONDS = float(os.getenv("INDEX_COMPACT_SECONDS", "2"))
+    # Semantic candidate search: share of the text score taken by embedding
+    # similarity (the rest is TF-IDF), inverted lists probed per ANN query,
+    # and where the ANN index is saved between restarts ("" keeps it in
+    # memory only, the default for the memory backend)
+    SEMANTIC_WEIGHT = float(os.getenv("SEMANTIC_WEIGHT", "0.5"))
+    ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
+    EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", "" if STORAGE_BACKEND == "memory" else "./pathai_ann")
+    # Where parsed resume features (skills, tokens) are saved so restarts
+    # skip re-parsing unchanged resumes ("" disables it)
+    FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", "" if STORAGE_BACKEND == "memory" else "./pathai_features")
+    # How often (seconds) the ANN index and feature store are saved while
+    # the app runs, if they changed, besides at startup and shutdown, so a
+    # crashed worker's successor re-parses little (0 disables it)
+    DERIVED_INDEX_SAVE_SECONDS = float(os.getenv("DERIVED_INDEX_SAVE_SECONDS", "300"))
     
     # JWT Configuration - Use default for demo, but should be set in production
     SECRET_KEY = os.getenv("SECRET_KEY", "demo-secret-key-change-in-production-2024")
     if SECRET_KEY == "demo-secret-key-change-in-production-2024":
-        print("WARNING: Using default SECRET_KEY. Set SECRET_KEY in .env for production!")
+        logger.warning("Using default SECRET_KEY. Set SECRET_KEY in .env for production!")
     
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    
+    # Password hashing: bcrypt cost factor and bounded executor sizing
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+    
+    # Resume analysis process pool per server worker (0 disables it and uses
+    # a thread instead); by default the CPUs are split between server workers
+    ANALYSIS_POOL_WORKERS = int(os.getenv("ANALYSIS_POOL_WORKERS", max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+    ANALYSIS_BATCH_MAX_ITEMS = int(os.getenv("ANALYSIS_BATCH_MAX_ITEMS", "1000"))
+    ANALYSIS_BATCH_CHUNK_SIZE = int(os.getenv("ANALYSIS_BATCH_CHUNK_SIZE", "25"))
+    CANDIDATE_BULK_MAX_ITEMS = int(os.getenv("CANDIDATE_BULK_MAX_ITEMS", "1000"))
+    
+    # Resume analysis cache: local LRU plus optional shared Redis tier
+    ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "2048"))
+    ANALYSIS_CACHE_URL = os.getenv("ANALYSIS_CACHE_URL")
+    ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+    
+    # Background tasks: worker coroutines per server worker, running and
+    # unfinished tasks allowed per user, how long finished results are
+    # kept, and a Redis URL so every worker can answer polls (required
+    # with WEB_CONCURRENCY > 1)
+    TASK_WORKERS = int(os.getenv("TASK_WORKERS", "4"))
+    TASK_USER_CONCURRENCY = int(os.getenv("TASK_USER_CONCURRENCY", "2"))
+    TASK_USER_MAX_PENDING = int(os.getenv("TASK_USER_MAX_PENDING", "100"))
+    TASK_RESULT_TTL_SECONDS = float(os.getenv("TASK_RESULT_TTL_SECONDS", "600"))
+    TASK_STORE_URL = os.getenv("TASK_STORE_URL")
+    
+    # Saved candidate searches: most results one may keep, entries held
+    # beyond its limit so removals rarely force a full re-rank, how old
+    # (seconds) an incrementally maintained ranking may get before it is
+    # recomputed anyway (0 never), and how often rankings that are due
+    # (too old, or inexact after an IDF change) are recomputed in the
+    # background (0 disables)
+    SAVED_SEARCH_MAX_LIMIT = int(os.getenv("SAVED_SEARCH_MAX_LIMIT", "100"))
+    SAVED_SEARCH_HEADROOM = int(os.getenv("SAVED_SEARCH_HEADROOM", "50"))
+    SAVED_SEARCH_MAX_AGE_SECONDS = float(os.getenv("SAVED_SEARCH_MAX_AGE_SECONDS", "3600"))
+    SAVED_SEARCH_REFRESH_SECONDS = float(os.getenv("SAVED_SEARCH_REFRESH_SECONDS", "10"))
+    
+    # Rate limiting: tokens per second refilled into each user's bucket (0
+    # disables limiting), bucket size, costly requests a user may have
+    # running at once, and an optional Redis URL to share the buckets
+    # between server workers
+    RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "10"))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "200"))
+    RATE_LIMIT_USER_CONCURRENCY = int(os.getenv("RATE_LIMIT_USER_CONCURRENCY", "4"))
+    RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL")
+    # Requests without a valid token (sign-up, login) are limited per client
+    # address instead, which everyone behind one proxy or NAT shares, so
+    # they get their own, larger budget (a rate of 0 leaves them unlimited;
+    # password hashing has its own admission limit)
+    RATE_LIMIT_ANONYMOUS_PER_SECOND = float(os.getenv("RATE_LIMIT_ANONYMOUS_PER_SECOND", "50"))
+    RATE_LIMIT_ANONYMOUS_BURST = float(os.getenv("RATE_LIMIT_ANONYMOUS_BURST", "1000"))
+    RATE_LIMIT_ANONYMOUS_CONCURRENCY = int(os.getenv("RATE_LIMIT_ANONYMOUS_CONCURRENCY", "32"))
+    
+    # Who may read /metrics: clients at these addresses (comma-separated;
+    # local scrapers by default) and, if METRICS_TOKEN is set, requests
+    # bearing it
+    METRICS_ALLOWED_HOSTS = [host.strip() for host in os.getenv("METRICS_ALLOWED_HOSTS", "127.0.0.1,::1").split(",")
+                             if host.strip()]
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
     
     # CORS Configuration - Restricted to specific origins for security
     CORS_ORIGINS = [
@@ -1,17 +1,35 @@
+import asyncio
+import logging
+
 from .config import settings
+from .lifecycle import on_startup
+
+logger = logging.getLogger(__name__)
 
-# Initialize Supabase client (optional for demo)
+# Supabase client (optional for demo), created by connect_supabase at startup
 supabase = None
-try:
-    if settings.SUPABASE_URL and settings.SUPABASE_KEY:
-        from supabase import create_client, Client
-        supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-        print("Supabase client initialized successfully")
-    else:
-        print("Supabase not configured - using in-memory storage for demo")
-except Exception as e:
-    print(f"Failed to initialize Supabase client: {e}")
-    supabase = None
+
+@on_startup
+async def connect_supabase() -> None:
+    """Create the Supabase client if configured. The import and client setup
+    are slow and may touch the network, so they run off the event loop at
+    startup, bounded by SUPABASE_CONNECT_TIMEOUT, instead of at import.
+    """
+    global supabase
+    if not (settings.SUPABASE_URL and settings.SUPABASE_KEY):
+        logger.info("Supabase not configured - using %s storage", settings.STORAGE_BACKEND)
+        return
+    try:
+        from supabase import create_client
+
+        supabase = await asyncio.wait_for(
+            asyncio.to_thread(create_client, settings.SUPABASE_URL, settings.SUPABASE_KEY),
+            timeout=settings.SUPABASE_CONNECT_TIMEOUT
+        )
+        logger.info("Supabase client initialized successfully")
+    except Exception as e:
+        logger.warning("Failed to initialize Supabase client: %r", e)
+        supabase = None
 
 def get_supabase():
-    return supabase
\ No newline at end of file
+    return supabase
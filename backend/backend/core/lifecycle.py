@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+Hook = Callable[[], Awaitable[None]]
+
+_startup_hooks: List[Hook] = []
+_shutdown_hooks: List[Hook] = []
+_periodic_tasks: Dict[str, "asyncio.Task[None]"] = {}
+_ready = False
+
+def on_startup(hook: Hook) -> Hook:
+    """Register a coroutine function to run when the app starts (in order)"""
+    _startup_hooks.append(hook)
+    return hook
+
+def on_shutdown(hook: Hook) -> Hook:
+    """Register a coroutine function to run when the app stops (reverse order)"""
+    _shutdown_hooks.append(hook)
+    return hook
+
+def periodic(interval: float) -> Callable[[Hook], Hook]:
+    """Run a coroutine function every ``interval`` seconds while the app is
+    up (0 disables it). Failures are reported and retried next interval.
+    """
+    def register(hook: Hook) -> Hook:
+        if interval <= 0:
+            return hook
+
+        async def loop() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await hook()
+                except Exception:
+                    logger.exception("Periodic task %s failed", hook.__name__)
+
+        async def start() -> None:
+            _periodic_tasks[hook.__name__] = asyncio.create_task(loop())
+
+        async def stop() -> None:
+            task = _periodic_tasks.pop(hook.__name__, None)
+            if task is not None:
+                task.cancel()
+
+        on_startup(start)
+        on_shutdown(stop)
+        return hook
+
+    return register
+
+def is_ready() -> bool:
+    """True once every startup hook has finished, until shutdown begins"""
+    return _ready
+
+@asynccontextmanager
+async def lifespan(app):
+    global _ready
+    for hook in _startup_hooks:
+        await hook()
+    _ready = True
+    try:
+        yield
+    finally:
+        _ready = False
+        for hook in reversed(_shutdown_hooks):
+            await hook()
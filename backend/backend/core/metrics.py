@@ -0,0 +1,294 @@
+import bisect
+import functools
+import hmac
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+
+from .config import settings
+
+# Upper bounds of the histogram buckets (Prometheus ``le`` labels). Every
+# (method, route) pair gets one histogram of each kind, so the buckets are
+# kept few; stages of a request only get a sum and a count.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+SIZE_BUCKETS = (1024, 16384, 262144, 4194304)
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Timing of the request being handled, or None outside a request
+_request_timing: ContextVar[Optional["RequestTiming"]] = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """Timing state of one request: named stage durations (seconds) and,
+    once routing reaches a TimedRoute, the route template
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.route: Optional[str] = None
+        self.endpoint_end: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Add time spent in a named stage to the current request, if any"""
+    timing = _request_timing.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as a stage of the current request.
+
+    Repeated stages add up, and outside a request (or in worker processes)
+    this is a no-op apart from two clock reads.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        rows = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            rows.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return rows
+
+
+def _labels(**labels: Any) -> str:
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _flatten(prefix: str, values: Dict[str, Any]) -> Iterator[Tuple[str, float]]:
+    for key, value in values.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+class MetricsRegistry:
+    """Request metrics per (method, route template) plus gauges pulled from
+    other components' stats at scrape time. Everything is updated from the
+    event loop thread, so plain dicts and counters suffice.
+    """
+
+    namespace = "pathai"
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.response_size: Dict[Tuple[str, str], Histogram] = {}
+        self.stage_latency: Dict[Tuple[str, str, str], Histogram] = {}  # sum and count only
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """Export the numeric values of ``collect()`` as gauges named after ``name``"""
+        self._collectors[name] = collect
+
+    def request_started(self, method: str, route: str) -> None:
+        key = (method, route)
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float,
+                         size: int, stages: Dict[str, float]) -> None:
+        key = (method, route)
+        if key in self.in_flight:
+            self.in_flight[key] -= 1
+        self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+        self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+        self.response_size.setdefault(key, Histogram(SIZE_BUCKETS)).observe(size)
+        for stage, stage_seconds in stages.items():
+            self.stage_latency.setdefault((method, route, stage), Histogram(())).observe(stage_seconds)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_http_requests_total Requests handled, by route and status",
+            f"# TYPE {ns}_http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f"{ns}_http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        lines += [
+            f"# HELP {ns}_http_requests_in_flight Requests currently being handled",
+            f"# TYPE {ns}_http_requests_in_flight gauge",
+        ]
+        for (method, route), count in sorted(self.in_flight.items()):
+            lines.append(f"{ns}_http_requests_in_flight{_labels(method=method, route=route)} {count}")
+
+        lines += self._render_histograms(
+            f"{ns}_http_request_duration_seconds", "Request latency",
+            {(("method", m), ("route", r)): h for (m, r), h in self.latency.items()})
+        lines += self._render_histograms(
+            f"{ns}_http_response_size_bytes", "Response body size",
+            {(("method", m), ("route", r)): h for (m, r), h in self.response_size.items()})
+        lines += self._render_histograms(
+            f"{ns}_http_request_stage_duration_seconds", "Time spent in each request stage",
+            {(("method", m), ("route", r), ("stage", s)): h for (m, r, s), h in self.stage_latency.items()},
+            kind="summary")
+
+        for name, collect in self._collectors.items():
+            for metric, value in _flatten(f"{ns}_{name}", collect()):
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(name: str, help_text: str, histograms: Dict[tuple, Histogram],
+                           kind: str = "histogram") -> List[str]:
+        """Histograms, or with ``kind`` "summary" only their sums and counts"""
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for label_pairs, histogram in sorted(histograms.items()):
+            labels = dict(label_pairs)
+            if kind == "histogram":
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {count}")
+            lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+        return lines
+
+
+def require_metrics_access(request: Request) -> None:
+    """Dependency guarding /metrics: scrapers on METRICS_ALLOWED_HOSTS, or
+    bearing METRICS_TOKEN if one is set, may read it
+    """
+    client = request.client
+    if client is not None and client.host in settings.METRICS_ALLOWED_HOSTS:
+        return
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if (settings.METRICS_TOKEN and scheme.lower() == "bearer"
+            and hmac.compare_digest(token.strip().encode(), settings.METRICS_TOKEN.encode())):
+        return
+    raise HTTPException(status_code=403, detail="Metrics are only served to allowed hosts or with the metrics token")
+
+
+def server_timing(stages: Dict[str, float], total: float) -> str:
+    """Server-Timing header value, durations in milliseconds"""
+    entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in stages.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware timing every HTTP request.
+
+    Series are labelled with the route template (``/candidates/{candidate_id}``,
+    not one series per id) recorded by TimedRoute; requests that match no
+    route share the ``unmatched`` label. Stage timings are collected through
+    a context variable and sent back in a ``Server-Timing`` header. Streaming
+    bodies are timed and counted until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _request_timing.set(timing)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def timed_send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                header = server_timing(timing.stages, time.perf_counter() - start)
+                headers.append((b"server-timing", header.encode()))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _request_timing.reset(token)
+            metrics.request_finished(scope["method"], timing.route or UNMATCHED_ROUTE, status,
+                                     time.perf_counter() - start, size, timing.stages)
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that labels the request's metrics with its path template,
+    counts it as in flight, and times the endpoint body separately from the
+    response validation and serialization FastAPI performs after it returns
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timing = _request_timing.get()
+            if timing is None:
+                return await handler(request)
+            timing.route = self.path_format
+            metrics.request_started(request.method, self.path_format)
+            response = await handler(request)
+            if timing.endpoint_end is not None:
+                timing.add("serialization", time.perf_counter() - timing.endpoint_end)
+            return response
+
+        return timed_handler
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timing = _request_timing.get()
+            if timing is not None:
+                timing.endpoint_end = time.perf_counter()
+                timing.add("endpoint", timing.endpoint_end - start)
+
+    return timed
+
+
+metrics = MetricsRegistry()
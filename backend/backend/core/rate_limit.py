@@ -0,0 +1,306 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from ..utils.jwt_handler import verify_token
+from .config import settings
+
+# Tokens a request takes from its user's bucket, by "METHOD path template";
+# every other request costs DEFAULT_COST and those costing 0 are never
+# limited. Searches and analyses cost the most, sign-up and login pay for
+# their bcrypt work.
+ROUTE_COSTS = {
+    "GET /health": 0,
+    "GET /metrics": 0,
+    "POST /candidates/find": 20,
+    "POST /candidates/bulk": 20,
+    "POST /saved-searches/": 20,
+    "GET /saved-searches/{search_id}": 2,
+    "POST /ai/analyze-resume": 10,
+    "POST /ai/analyze-resume/batch": 50,
+    "POST /ai/recommend-jobs": 10,
+    "POST /tasks/analyze-resume": 5,
+    "POST /tasks/find-candidates": 5,
+    "POST /auth/register": 10,
+    "POST /auth/login": 10,
+}
+DEFAULT_COST = 1
+# Requests at least this costly also hold one of the user's concurrency
+# slots while they run
+CONCURRENCY_MIN_COST = 10
+# Key prefix of requests without a valid token, which share their client
+# address's (larger) anonymous budget
+ANONYMOUS_PREFIX = "ip:"
+
+
+def compile_costs(costs: Dict[str, int]) -> List[Tuple[str, Pattern, int]]:
+    compiled = []
+    for route, cost in costs.items():
+        method, path = route.split(" ", 1)
+        compiled.append((method, compile_path(path)[0], cost))
+    return compiled
+
+
+class LocalRateLimitBackend:
+    """Token buckets and concurrency counts of this process. The least
+    recently used buckets are dropped beyond ``max_keys`` (a dropped bucket
+    starts full again).
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._active: Dict[str, int] = {}
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """Take ``cost`` tokens; returns 0, or the seconds until they would
+        be available (nothing is taken then)
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def enter(self, key: str, limit: int) -> bool:
+        """Occupy one of ``key``'s ``limit`` concurrency slots, if one is free"""
+        if self._active.get(key, 0) >= limit:
+            return False
+        self._active[key] = self._active.get(key, 0) + 1
+        return True
+
+    async def leave(self, key: str) -> None:
+        active = self._active.get(key, 0) - 1
+        if active > 0:
+            self._active[key] = active
+        else:
+            self._active.pop(key, None)
+
+
+# Refill and take in one step on the Redis server, with its clock, so every
+# worker sees the same bucket. The wait is returned as a string because Lua
+# numbers are truncated to integers in replies.
+TAKE_SCRIPT = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets and concurrency counts shared by every server worker"""
+
+    prefix = "pathai:ratelimit:"
+    # Concurrency counts expire after this long without requests, in case a
+    # worker died holding slots
+    slot_ttl_seconds = 300
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self._take = self._client.register_script(TAKE_SCRIPT)
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        wait = await self._take(keys=[self.prefix + "bucket:" + key], args=[rate, burst, cost])
+        return float(wait)
+
+    async def enter(self, key: str, limit: int) -> bool:
+        slot_key = self.prefix + "active:" + key
+        active = await self._client.incr(slot_key)
+        await self._client.expire(slot_key, self.slot_ttl_seconds)
+        if active > limit:
+            await self._client.decr(slot_key)
+            return False
+        return True
+
+    async def leave(self, key: str) -> None:
+        await self._client.decr(self.prefix + "active:" + key)
+
+
+class RateLimiter:
+    """Per-user token buckets plus concurrency quotas.
+
+    Each user has a bucket of ``burst`` tokens refilled at ``rate`` per
+    second; a request takes its route's cost or is refused with the time
+    until enough tokens are back. Costly requests also need one of the
+    user's ``concurrency`` slots. Requests without a valid token (sign-up,
+    login) are keyed by client address, which many users behind one proxy
+    or NAT share, so those buckets get the separate ``anonymous`` quota of
+    (rate, burst, concurrency); an anonymous rate of 0 leaves them unlimited.
+    The backend is best effort: its errors let the request through.
+    """
+
+    def __init__(self, backend, rate: float, burst: float, concurrency: int,
+                 anonymous: Optional[Tuple[float, float, int]] = None,
+                 costs: Dict[str, int] = ROUTE_COSTS):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.anonymous_rate, self.anonymous_burst, self.anonymous_concurrency = (
+            anonymous or (rate, burst, concurrency))
+        self._costs = compile_costs(costs)
+        self.allowed = 0
+        self.limited = 0
+        self.concurrency_limited = 0
+        self.backend_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def cost(self, method: str, path: str) -> int:
+        for route_method, pattern, cost in self._costs:
+            if route_method == method and pattern.match(path):
+                return cost
+        return DEFAULT_COST
+
+    def quota(self, key: str) -> Tuple[float, float, int]:
+        """(rate, burst, concurrency) of a key's bucket"""
+        if key.startswith(ANONYMOUS_PREFIX):
+            return self.anonymous_rate, self.anonymous_burst, self.anonymous_concurrency
+        return self.rate, self.burst, self.concurrency
+
+    async def take(self, key: str, cost: float) -> float:
+        """0 if the request may run, else the seconds to wait"""
+        rate, burst, _ = self.quota(key)
+        if rate <= 0:
+            self.allowed += 1
+            return 0.0
+        try:
+            wait = await self.backend.take(key, min(cost, burst), rate, burst)
+        except Exception:
+            self.backend_errors += 1
+            wait = 0.0
+        if wait > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    async def enter(self, key: str) -> bool:
+        try:
+            entered = await self.backend.enter(key, self.quota(key)[2])
+        except Exception:
+            self.backend_errors += 1
+            return True
+        if not entered:
+            self.concurrency_limited += 1
+        return entered
+
+    async def leave(self, key: str) -> None:
+        try:
+            await self.backend.leave(key)
+        except Exception:
+            self.backend_errors += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "concurrency_limited": self.concurrency_limited,
+            "backend_errors": self.backend_errors,
+        }
+
+
+def create_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_URL:
+        backend = RedisRateLimitBackend(settings.RATE_LIMIT_URL)
+    else:
+        backend = LocalRateLimitBackend()
+    anonymous = (settings.RATE_LIMIT_ANONYMOUS_PER_SECOND, settings.RATE_LIMIT_ANONYMOUS_BURST,
+                 settings.RATE_LIMIT_ANONYMOUS_CONCURRENCY)
+    return RateLimiter(backend, settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST,
+                       settings.RATE_LIMIT_USER_CONCURRENCY, anonymous)
+
+
+rate_limiter = create_rate_limiter()
+
+
+def client_key(scope) -> str:
+    """Rate-limit key of a request: the user id of its bearer token (the one
+    get_current_user will check; verified tokens are cached) or, without a
+    valid token, the client address
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    return f"user:{verify_token(token.strip())}"
+                except HTTPException:
+                    pass
+            break
+    client = scope.get("client")
+    return f"{ANONYMOUS_PREFIX}{client[0] if client else 'unknown'}"
+
+
+def too_many_requests(detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware refusing requests over their user's rate or
+    concurrency quota with 429 and Retry-After, before any route runs
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        cost = self.limiter.cost(scope["method"], scope["path"])
+        if cost <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope)
+        # Checked first, so a request refused for concurrency keeps its tokens
+        holds_slot = cost >= CONCURRENCY_MIN_COST
+        if holds_slot and not await self.limiter.enter(key):
+            detail = f"At most {self.limiter.quota(key)[2]} expensive requests per user at a time"
+            await too_many_requests(detail, 1)(scope, receive, send)
+            return
+        try:
+            wait = await self.limiter.take(key, cost)
+            if wait > 0:
+                await too_many_requests("Rate limit exceeded, retry later", wait)(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+        finally:
+            if holds_slot:
+                await self.limiter.leave(key)
@@ -0,0 +1,104 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from .database import get_supabase
+from .storage import DuplicateKeyError, Table, storage
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class UserRepository(ABC):
+    """Storage interface for user records (plain dicts with an ``id`` key)"""
+
+    @abstractmethod
+    async def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def create(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a new user, assign its ``id`` and return the stored record"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+
+class TableUserRepository(UserRepository):
+    """Users in the configured storage table, looked up through its primary
+    key and the unique (normalized) email index
+    """
+
+    def __init__(self, table: Table):
+        self._table = table
+
+    async def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return await self._table.get(user_id)
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self._table.find_one("email", normalize_email(email))
+
+    async def create(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return await self._table.insert(user)
+        except DuplicateKeyError:
+            raise ValueError("Email already registered")
+
+    async def count(self) -> int:
+        return await self._table.count()
+
+
+class SupabaseUserRepository(UserRepository):
+    """Users stored in the Supabase ``users`` table.
+
+    Lookups rely on the table's primary key and a unique index on the
+    lower-cased ``email`` column. The supabase client is synchronous, so
+    calls run in a worker thread.
+    """
+
+    table = "users"
+
+    def __init__(self, client):
+        self._client = client
+
+    async def _first(self, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        query = self._client.table(self.table).select("*").eq(column, value).limit(1)
+        result = await asyncio.to_thread(query.execute)
+        return result.data[0] if result.data else None
+
+    async def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return await self._first("id", user_id)
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self._first("email", normalize_email(email))
+
+    async def create(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        record = {key: value for key, value in user.items() if key != "id"}
+        record["email"] = normalize_email(record["email"])
+        query = self._client.table(self.table).insert(record)
+        result = await asyncio.to_thread(query.execute)
+        return result.data[0]
+
+    async def count(self) -> int:
+        query = self._client.table(self.table).select("id", count="exact").limit(1)
+        result = await asyncio.to_thread(query.execute)
+        return result.count or 0
+
+
+_table_repository = TableUserRepository(storage.table("users"))
+
+def get_user_repository() -> UserRepository:
+    """Supabase-backed repository once its client is connected, the storage
+    table otherwise. Resolved per call because the client is only created
+    at startup.
+    """
+    client = get_supabase()
+    if client is not None:
+        return SupabaseUserRepository(client)
+    return _table_repository
@@ -0,0 +1,701 @@
+import asyncio
+import bisect
+import itertools
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import settings
+from .lifecycle import on_startup, on_shutdown
+
+
+class DuplicateKeyError(ValueError):
+    """Raised when an insert or update violates a unique index"""
+
+
+class TableSpec:
+    """Name plus the record fields that get a (possibly unique) lookup index.
+
+    ``multi`` fields hold lists; every element is indexed so a filter matches
+    records whose list contains the value. Every insert, update and delete of
+    a table with ``changes`` also appends an entry to that table, in the
+    same transaction (see change_entries).
+    """
+
+    def __init__(self, name: str, indexed: Iterable[str] = (), unique: Iterable[str] = (),
+                 multi: Iterable[str] = (), changes: Optional[str] = None):
+        self.name = name
+        self.changes = changes
+        self.unique = tuple(unique)
+        self.multi = tuple(multi)
+        self.indexed = tuple(dict.fromkeys((*self.unique, *indexed, *self.multi)))
+        self.scalar = tuple(field for field in self.indexed if field not in self.multi)
+
+
+# Every table the application stores. Records are plain dicts with an
+# integer "id"; only the indexed fields are visible to the storage engine.
+TABLES = {
+    spec.name: spec for spec in (
+        TableSpec("users", unique=("email",)),
+        TableSpec("jobs", indexed=("company", "location", "is_active", "posted_by"), multi=("requirements",),
+                  changes="job_changes"),
+        TableSpec("candidates", indexed=("email",), changes="candidate_changes"),
+        # Change logs read by the other workers' index sync (see ChangeFeed),
+        # pruned after CHANGE_LOG_RETENTION_SECONDS
+        TableSpec("job_changes"),
+        TableSpec("candidate_changes"),
+        TableSpec("saved_searches", indexed=("owner",)),
+    )
+}
+
+
+def index_value(value: Any) -> Optional[str]:
+    """Normalise a field value for index lookups (case-insensitive strings)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value).strip().lower()
+
+
+def index_values(value: Any) -> List[str]:
+    """Index keys of a multi-valued field (one per distinct list element)"""
+    keys = (index_value(item) for item in value or ())
+    return list(dict.fromkeys(key for key in keys if key is not None))
+
+
+# Tags the change-log entries this process writes, so its own index sync
+# can skip them
+PROCESS_ID = uuid.uuid4().hex
+
+
+def change_entries(record_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """Change-log entries for records just inserted, updated or deleted"""
+    recorded_at = time.time()
+    return [{"record_id": record_id, "origin": PROCESS_ID, "recorded_at": recorded_at}
+            for record_id in record_ids]
+
+
+class Table(ABC):
+    """Async CRUD interface over one table of dict records"""
+
+    def __init__(self, spec: TableSpec):
+        self.spec = spec
+        # Change-log table of spec.changes, set by Storage.table
+        self.changes: Optional["Table"] = None
+
+    @abstractmethod
+    async def insert(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new record, assign its ``id`` and return the stored copy"""
+
+    async def insert_many(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [await self.insert(record) for record in records]
+
+    @abstractmethod
+    async def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def find_one(self, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        """Look a record up by an indexed field"""
+
+    @abstractmethod
+    async def list_all(self) -> List[Dict[str, Any]]:
+        """Every record, ordered by id"""
+
+    @abstractmethod
+    async def page(self, filters: Dict[str, Any], after_id: Optional[int] = None,
+                   limit: int = 20) -> List[Dict[str, Any]]:
+        """Up to ``limit`` records with id > ``after_id``, ordered by id, whose
+        indexed fields equal every value in ``filters``
+        """
+
+    @abstractmethod
+    async def get_many(self, record_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Records for the given ids (missing ids skipped), in the given order"""
+
+    @abstractmethod
+    async def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge ``fields`` into a record and return it, or None if missing"""
+
+    @abstractmethod
+    async def delete(self, record_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    def _check_filters(self, filters: Dict[str, Any]) -> None:
+        for field in filters:
+            self._check_field(field)
+
+    def _check_field(self, field: str) -> None:
+        if field not in self.spec.indexed:
+            raise ValueError(f"{self.spec.name}.{field} is not indexed")
+
+
+class Storage(ABC):
+    def __init__(self):
+        self._tables: Dict[str, Table] = {}
+
+    def table(self, name: str) -> Table:
+        if name not in self._tables:
+            spec = TABLES[name]
+            self._tables[name] = self._make_table(spec)
+            if spec.changes:
+                self._tables[name].changes = self.table(spec.changes)
+        return self._tables[name]
+
+    @abstractmethod
+    def _make_table(self, spec: TableSpec) -> Table:
+        ...
+
+    async def connect(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# In-memory backend (tests, demos, single worker)
+# ---------------------------------------------------------------------------
+
+def sorted_contains(ids: List[int], record_id: int) -> bool:
+    position = bisect.bisect_left(ids, record_id)
+    return position < len(ids) and ids[position] == record_id
+
+
+class InMemoryTable(Table):
+    """Records in a dict keyed by id, with an index per indexed field that
+    maps each value to the sorted ids of the records holding it (so pages
+    are read by bisecting, never by sorting).
+
+    Everything runs on the event loop thread without awaiting, so id
+    allocation and index maintenance are atomic.
+    """
+
+    def __init__(self, spec: TableSpec):
+        super().__init__(spec)
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[str, List[int]]] = {field: {} for field in spec.indexed}
+        self._order: List[int] = []  # sorted ids, for cursor pagination
+        self._ids = itertools.count(1)
+
+    def _keys(self, field: str, record: Dict[str, Any]) -> List[str]:
+        if field in self.spec.multi:
+            return index_values(record.get(field))
+        key = index_value(record.get(field))
+        return [] if key is None else [key]
+
+    def _index(self, record: Dict[str, Any]) -> None:
+        for field, index in self._indexes.items():
+            for key in self._keys(field, record):
+                ids = index.setdefault(key, [])
+                # New records have the highest id, so this is an append
+                # except when an update re-indexes an older record
+                if not ids or ids[-1] < record['id']:
+                    ids.append(record['id'])
+                else:
+                    bisect.insort(ids, record['id'])
+
+    def _unindex(self, record: Dict[str, Any]) -> None:
+        for field, index in self._indexes.items():
+            for key in self._keys(field, record):
+                ids = index.get(key)
+                if ids is not None and sorted_contains(ids, record['id']):
+                    del ids[bisect.bisect_left(ids, record['id'])]
+                    if not ids:
+                        del index[key]
+
+    def _check_unique(self, record: Dict[str, Any], record_id: Optional[int] = None) -> None:
+        for field in self.spec.unique:
+            ids = self._indexes[field].get(index_value(record.get(field)), [])
+            if len(ids) > 1 or ids and ids[0] != record_id:
+                raise DuplicateKeyError(f"{self.spec.name}.{field} already exists")
+
+    def _insert(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        self._check_unique(record)
+        stored = {**record, "id": next(self._ids)}
+        self._records[stored['id']] = stored
+        self._order.append(stored['id'])
+        self._index(stored)
+        return stored
+
+    def _log(self, record_id: int) -> None:
+        if self.changes is not None:
+            for entry in change_entries([record_id]):
+                self.changes._insert(entry)
+
+    async def insert(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        stored = self._insert(record)
+        self._log(stored['id'])
+        return stored
+
+    async def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        return self._records.get(record_id)
+
+    async def find_one(self, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        self._check_field(field)
+        ids = self._indexes[field].get(index_value(value))
+        if not ids:
+            return None
+        return self._records[ids[0]]
+
+    async def list_all(self) -> List[Dict[str, Any]]:
+        return list(self._records.values())
+
+    async def page(self, filters: Dict[str, Any], after_id: Optional[int] = None,
+                   limit: int = 20) -> List[Dict[str, Any]]:
+        self._check_filters(filters)
+        if filters:
+            # Walk the shortest posting list, checking the others by bisection
+            matches = sorted(
+                (self._indexes[field].get(index_value(value), []) for field, value in filters.items()),
+                key=len
+            )
+            ordered = matches[0]
+            others = matches[1:]
+        else:
+            ordered = self._order
+            others = []
+        start = 0 if after_id is None else bisect.bisect_right(ordered, after_id)
+        results = []
+        for record_id in itertools.islice(ordered, start, None):
+            if all(sorted_contains(ids, record_id) for ids in others):
+                results.append(self._records[record_id])
+                if len(results) >= limit:
+                    break
+        return results
+
+    async def get_many(self, record_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self._records[record_id] for record_id in record_ids if record_id in self._records]
+
+    async def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        current = self._records.get(record_id)
+        if current is None:
+            return None
+        updated = {**current, **fields, "id": record_id}
+        self._check_unique(updated, record_id)
+        self._unindex(current)
+        self._records[record_id] = updated
+        self._index(updated)
+        self._log(record_id)
+        return updated
+
+    async def delete(self, record_id: int) -> bool:
+        record = self._records.pop(record_id, None)
+        if record is None:
+            return False
+        del self._order[bisect.bisect_left(self._order, record_id)]
+        self._unindex(record)
+        self._log(record_id)
+        return True
+
+    async def count(self) -> int:
+        return len(self._records)
+
+
+class InMemoryStorage(Storage):
+    def _make_table(self, spec: TableSpec) -> Table:
+        return InMemoryTable(spec)
+
+
+# ---------------------------------------------------------------------------
+# SQL backends (SQLite via aiosqlite, Postgres via asyncpg)
+# ---------------------------------------------------------------------------
+
+class SQLTable(Table):
+    """Records stored as a JSON ``data`` column plus one indexed column per
+    scalar indexed field, so lookups and filters use real database indexes.
+    Multi-valued fields get a side table of (record_id, value) rows.
+    SQL is written with ``?`` placeholders; the storage adapts them.
+    """
+
+    def __init__(self, spec: TableSpec, storage: "SQLStorage"):
+        super().__init__(spec)
+        self._storage = storage
+
+    def _columns(self, record: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(index_value(record.get(field)) for field in self.spec.scalar)
+
+    def _values_table(self, field: str) -> str:
+        return f"{self.spec.name}_{field}_values"
+
+    async def _write_values(self, conn, record_id: int, record: Dict[str, Any], replace: bool = False) -> None:
+        for field in self.spec.multi:
+            values_table = self._values_table(field)
+            if replace:
+                await self._storage.execute(f"DELETE FROM {values_table} WHERE record_id = ?", (record_id,), conn=conn)
+            for key in index_values(record.get(field)):
+                await self._storage.execute(
+                    f"INSERT INTO {values_table} (record_id, value) VALUES (?, ?)", (record_id, key), conn=conn
+                )
+
+    def _where(self, filters: Dict[str, Any]) -> Tuple[str, Tuple]:
+        clauses, params = [], []
+        for field, value in filters.items():
+            if field in self.spec.multi:
+                clauses.append(f"id IN (SELECT record_id FROM {self._values_table(field)} WHERE value = ?)")
+            else:
+                clauses.append(f"{field} = ?")
+            params.append(index_value(value))
+        return "".join(f" AND {clause}" for clause in clauses), tuple(params)
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> str:
+        return json.dumps({key: value for key, value in record.items() if key != "id"}, default=str)
+
+    @staticmethod
+    def _decode(row) -> Dict[str, Any]:
+        return {**json.loads(row[1]), "id": row[0]}
+
+    def schema(self) -> List[str]:
+        name = self.spec.name
+        columns = "".join(f", {field} TEXT" for field in self.spec.scalar)
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS {name} (id {self._storage.id_column}, data TEXT NOT NULL{columns})"
+        ]
+        for field in self.spec.scalar:
+            unique = "UNIQUE " if field in self.spec.unique else ""
+            statements.append(f"CREATE {unique}INDEX IF NOT EXISTS ix_{name}_{field} ON {name} ({field})")
+        for field in self.spec.multi:
+            values_table = self._values_table(field)
+            statements.append(f"CREATE TABLE IF NOT EXISTS {values_table} (record_id BIGINT NOT NULL, value TEXT NOT NULL)")
+            statements.append(f"CREATE INDEX IF NOT EXISTS ix_{values_table} ON {values_table} (value, record_id)")
+            statements.append(f"CREATE INDEX IF NOT EXISTS ix_{values_table}_record ON {values_table} (record_id)")
+        return statements
+
+    async def insert(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return (await self.insert_many([record]))[0]
+
+    async def _insert_rows(self, conn, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        fields = "".join(f", {field}" for field in self.spec.scalar)
+        params = ", ?" * len(self.spec.scalar)
+        sql = f"INSERT INTO {self.spec.name} (data{fields}) VALUES (?{params})"
+        stored = []
+        for record in records:
+            record_id = await self._storage.insert_returning_id(
+                conn, sql, (self._encode(record), *self._columns(record))
+            )
+            await self._write_values(conn, record_id, record)
+            stored.append({**record, "id": record_id})
+        return stored
+
+    async def _log(self, conn, record_ids: List[int]) -> None:
+        if self.changes is not None and record_ids:
+            await self.changes._insert_rows(conn, change_entries(record_ids))
+
+    async def insert_many(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        async with self._storage.transaction() as conn:
+            stored = await self._insert_rows(conn, records)
+            await self._log(conn, [record['id'] for record in stored])
+        return stored
+
+    async def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        row = await self._storage.fetchone(f"SELECT id, data FROM {self.spec.name} WHERE id = ?", (record_id,))
+        return self._decode(row) if row else None
+
+    async def find_one(self, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        self._check_field(field)
+        row = await self._storage.fetchone(
+            f"SELECT id, data FROM {self.spec.name} WHERE {field} = ? ORDER BY id LIMIT 1",
+            (index_value(value),)
+        )
+        return self._decode(row) if row else None
+
+    async def list_all(self) -> List[Dict[str, Any]]:
+        rows = await self._storage.fetchall(f"SELECT id, data FROM {self.spec.name} ORDER BY id")
+        return [self._decode(row) for row in rows]
+
+    async def page(self, filters: Dict[str, Any], after_id: Optional[int] = None,
+                   limit: int = 20) -> List[Dict[str, Any]]:
+        self._check_filters(filters)
+        where, params = self._where(filters)
+        rows = await self._storage.fetchall(
+            f"SELECT id, data FROM {self.spec.name} WHERE id > ?{where} ORDER BY id LIMIT ?",
+            (after_id or 0, *params, limit)
+        )
+        return [self._decode(row) for row in rows]
+
+    async def get_many(self, record_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        record_ids = list(record_ids)
+        if not record_ids:
+            return []
+        placeholders = ", ".join("?" * len(record_ids))
+        rows = await self._storage.fetchall(
+            f"SELECT id, data FROM {self.spec.name} WHERE id IN ({placeholders})", tuple(record_ids)
+        )
+        by_id = {row[0]: self._decode(row) for row in rows}
+        return [by_id[record_id] for record_id in record_ids if record_id in by_id]
+
+    async def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        async with self._storage.transaction() as conn:
+            row = await self._storage.fetchone(
+                f"SELECT id, data FROM {self.spec.name} WHERE id = ?", (record_id,), conn=conn
+            )
+            if row is None:
+                return None
+            updated = {**self._decode(row), **fields, "id": record_id}
+            assignments = "".join(f", {field} = ?" for field in self.spec.scalar)
+            await self._storage.execute(
+                f"UPDATE {self.spec.name} SET data = ?{assignments} WHERE id = ?",
+                (self._encode(updated), *self._columns(updated), record_id),
+                conn=conn
+            )
+            await self._write_values(conn, record_id, updated, replace=True)
+            await self._log(conn, [record_id])
+        return updated
+
+    async def delete(self, record_id: int) -> bool:
+        async with self._storage.transaction() as conn:
+            for field in self.spec.multi:
+                await self._storage.execute(
+                    f"DELETE FROM {self._values_table(field)} WHERE record_id = ?", (record_id,), conn=conn
+                )
+            deleted = await self._storage.execute(
+                f"DELETE FROM {self.spec.name} WHERE id = ?", (record_id,), conn=conn
+            )
+            if deleted:
+                await self._log(conn, [record_id])
+        return deleted > 0
+
+    async def count(self) -> int:
+        row = await self._storage.fetchone(f"SELECT COUNT(*) FROM {self.spec.name}")
+        return row[0]
+
+
+class SQLStorage(Storage):
+    """Shared plumbing for pooled SQL backends; subclasses supply the driver"""
+
+    id_column = "INTEGER PRIMARY KEY"
+
+    def __init__(self, url: str, pool_size: int):
+        super().__init__()
+        self.url = url
+        self.pool_size = max(1, pool_size)
+        self._connect_lock = asyncio.Lock()
+        self._connected = False
+
+    def _make_table(self, spec: TableSpec) -> Table:
+        return SQLTable(spec, self)
+
+    async def connect(self) -> None:
+        async with self._connect_lock:
+            if self._connected:
+                return
+            await self._open_pool()
+            async with self._transaction() as conn:
+                for spec in TABLES.values():
+                    for statement in self.table(spec.name).schema():
+                        await self.execute(statement, conn=conn)
+            self._connected = True
+
+    async def _ensure_connected(self) -> None:
+        if not self._connected:
+            await self.connect()
+
+    @abstractmethod
+    async def _open_pool(self) -> None:
+        ...
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Yield a pooled connection inside a transaction"""
+        await self._ensure_connected()
+        async with self._transaction() as conn:
+            yield conn
+
+    @abstractmethod
+    def _transaction(self):
+        ...
+
+    @abstractmethod
+    async def insert_returning_id(self, conn, sql: str, params: Tuple) -> int:
+        ...
+
+    @abstractmethod
+    async def execute(self, sql: str, params: Tuple = (), conn=None) -> int:
+        """Run a statement and return the affected row count"""
+
+    @abstractmethod
+    async def fetchone(self, sql: str, params: Tuple = (), conn=None):
+        ...
+
+    @abstractmethod
+    async def fetchall(self, sql: str, params: Tuple = (), conn=None) -> List:
+        ...
+
+
+class SQLiteStorage(SQLStorage):
+    """aiosqlite connections handed out from an asyncio.Queue pool.
+
+    WAL mode lets several uvicorn workers read concurrently while one writes.
+    """
+
+    id_column = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def __init__(self, url: str, pool_size: int):
+        super().__init__(url, pool_size)
+        self.path = url.split("sqlite:///", 1)[-1] or ":memory:"
+        self._pool: Optional[asyncio.Queue] = None
+        self._connections: List = []
+
+    async def _open_pool(self) -> None:
+        try:
+            import aiosqlite
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=sqlite requires the aiosqlite package") from e
+        self._integrity_error = aiosqlite.IntegrityError
+        self._pool = asyncio.Queue()
+        # Each :memory: connection would be its own database, so use one
+        size = 1 if self.path == ":memory:" else self.pool_size
+        for _ in range(size):
+            conn = await aiosqlite.connect(self.path)
+            await conn.execute("PRAGMA journal_mode=WAL")
+            await conn.execute("PRAGMA busy_timeout=5000")
+            self._connections.append(conn)
+            self._pool.put_nowait(conn)
+
+    @asynccontextmanager
+    async def _acquire(self):
+        await self._ensure_connected()
+        conn = await self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put_nowait(conn)
+
+    @asynccontextmanager
+    async def _transaction(self):
+        conn = await self._pool.get()
+        try:
+            try:
+                yield conn
+            except Exception:
+                await conn.rollback()
+                raise
+            await conn.commit()
+        except self._integrity_error as e:
+            raise DuplicateKeyError(str(e)) from e
+        finally:
+            self._pool.put_nowait(conn)
+
+    async def insert_returning_id(self, conn, sql: str, params: Tuple) -> int:
+        cursor = await conn.execute(sql, params)
+        return cursor.lastrowid
+
+    async def execute(self, sql: str, params: Tuple = (), conn=None) -> int:
+        if conn is not None:
+            cursor = await conn.execute(sql, params)
+            return cursor.rowcount
+        async with self._acquire() as conn:
+            cursor = await conn.execute(sql, params)
+            await conn.commit()
+            return cursor.rowcount
+
+    async def fetchone(self, sql: str, params: Tuple = (), conn=None):
+        if conn is not None:
+            return await (await conn.execute(sql, params)).fetchone()
+        async with self._acquire() as conn:
+            return await (await conn.execute(sql, params)).fetchone()
+
+    async def fetchall(self, sql: str, params: Tuple = (), conn=None) -> List:
+        if conn is not None:
+            return await (await conn.execute(sql, params)).fetchall()
+        async with self._acquire() as conn:
+            return await (await conn.execute(sql, params)).fetchall()
+
+    async def close(self) -> None:
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+        self._pool = None
+        self._connected = False
+
+
+class PostgresStorage(SQLStorage):
+    """asyncpg connection pool for Postgres-compatible databases"""
+
+    id_column = "BIGSERIAL PRIMARY KEY"
+
+    def __init__(self, url: str, pool_size: int):
+        super().__init__(url, pool_size)
+        self._pool = None
+
+    @staticmethod
+    def _sql(sql: str) -> str:
+        # Translate "?" placeholders into asyncpg's "$1, $2, ..."
+        parts = sql.split("?")
+        return "".join(f"{part}${i}" for i, part in enumerate(parts[:-1], 1)) + parts[-1]
+
+    async def _open_pool(self) -> None:
+        try:
+            import asyncpg
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=postgres requires the asyncpg package") from e
+        self._integrity_error = asyncpg.UniqueViolationError
+        self._pool = await asyncpg.create_pool(self.url, min_size=1, max_size=self.pool_size)
+
+    @asynccontextmanager
+    async def _transaction(self):
+        async with self._pool.acquire() as conn:
+            try:
+                async with conn.transaction():
+                    yield conn
+            except self._integrity_error as e:
+                raise DuplicateKeyError(str(e)) from e
+
+    async def insert_returning_id(self, conn, sql: str, params: Tuple) -> int:
+        return await conn.fetchval(self._sql(sql) + " RETURNING id", *params)
+
+    async def execute(self, sql: str, params: Tuple = (), conn=None) -> int:
+        if conn is None:
+            await self._ensure_connected()
+            async with self._pool.acquire() as conn:
+                return await self.execute(sql, params, conn=conn)
+        status = await conn.execute(self._sql(sql), *params)
+        # asyncpg returns e.g. "DELETE 1"; DDL statuses have no count
+        count = status.rsplit(" ", 1)[-1]
+        return int(count) if count.isdigit() else 0
+
+    async def fetchone(self, sql: str, params: Tuple = (), conn=None):
+        if conn is None:
+            await self._ensure_connected()
+            async with self._pool.acquire() as conn:
+                return await conn.fetchrow(self._sql(sql), *params)
+        return await conn.fetchrow(self._sql(sql), *params)
+
+    async def fetchall(self, sql: str, params: Tuple = (), conn=None) -> List:
+        if conn is None:
+            await self._ensure_connected()
+            async with self._pool.acquire() as conn:
+                return await conn.fetch(self._sql(sql), *params)
+        return await conn.fetch(self._sql(sql), *params)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+        self._connected = False
+
+
+def create_storage() -> Storage:
+    """Build the storage backend selected by Settings.STORAGE_BACKEND"""
+    backend = settings.STORAGE_BACKEND
+    if backend == "memory":
+        return InMemoryStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(settings.DATABASE_URL, settings.DATABASE_POOL_SIZE)
+    if backend == "postgres":
+        return PostgresStorage(settings.DATABASE_URL, settings.DATABASE_POOL_SIZE)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+storage = create_storage()
+on_startup(storage.connect)
+on_shutdown(storage.close)
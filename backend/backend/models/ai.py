@@ -10,9 +10,27 @@ class ResumeAnalysisResponse(BaseModel):
     message: str
     analysis: Dict[str, Any]
 
+class BatchResumeAnalysisRequest(BaseModel):
+    resumes: List[ResumeAnalysisRequest]
+
+class BatchResumeAnalysisItem(BaseModel):
+    index: int
+    status: str
+    message: str
+    analysis: Dict[str, Any]
+
+class BatchResumeAnalysisResponse(BaseModel):
+    status: str
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchResumeAnalysisItem]
+
 class JobRecommendationRequest(BaseModel):
     user_id: int
     limit: Optional[int] = 5
+    # Defaults to the candidate profile registered under the user's email
+    resume_text: Optional[str] = None
 
 class JobRecommendationResponse(BaseModel):
     status: str
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class SavedSearchCreate(BaseModel):
+    job_description: str
+    limit: int = 10
@@ -0,0 +1,29 @@
+from typing import Any, Dict, Literal, Optional
+
+from pydantic import BaseModel
+
+from .ai import ResumeAnalysisRequest
+
+TaskPriority = Literal["interactive", "normal", "bulk"]
+
+
+class ResumeAnalysisTaskRequest(ResumeAnalysisRequest):
+    priority: TaskPriority = "normal"
+
+
+class CandidateSearchTaskRequest(BaseModel):
+    job_description: str
+    limit: Optional[int] = 10
+    priority: TaskPriority = "normal"
+
+
+class TaskResponse(BaseModel):
+    id: str
+    kind: str
+    priority: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
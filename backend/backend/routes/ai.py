@@ -1,23 +1,36 @@
-from fastapi import APIRouter, Depends
-from ..models.ai import ResumeAnalysisRequest, ResumeAnalysisResponse
-from ..utils.ai_helpers import (
-    extract_skills_from_text,
-    analyze_resume_strengths,
-    calculate_job_match_score,
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from ..core.config import settings
+from ..core.metrics import TimedRoute, timed_stage
+from ..models.ai import (
+    ResumeAnalysisRequest,
+    ResumeAnalysisResponse,
+    BatchResumeAnalysisRequest,
+    BatchResumeAnalysisItem,
+    BatchResumeAnalysisResponse,
+    JobRecommendationRequest,
+    JobRecommendationResponse,
 )
+from ..models.jobs import JobRecommendation
+from ..utils.ai_helpers import analyze_resume_text, analyze_resume_chunk, extract_skills_from_text
+from ..utils.analysis_cache import analysis_cache, analysis_cache_key
+from ..utils.process_pool import get_process_pool
 from .auth import get_current_user
+from .candidates import candidates_table
+from .jobs import job_catalog
 
-router = APIRouter(prefix="/ai", tags=["ai"])
-
-# Common in-demand tech skills
-IN_DEMAND_SKILLS = [
-    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform",
-    "React", "Angular", "Vue", "Node", "Python", "Java",
-    "Docker", "Kubernetes", "CI/CD", "Microservices"
-]
+router = APIRouter(prefix="/ai", tags=["ai"], route_class=TimedRoute)
 
 @router.post("/analyze-resume", response_model=ResumeAnalysisResponse)
 async def analyze_resume(request: ResumeAnalysisRequest, current_user: dict = Depends(get_current_user)):
+    return await run_resume_analysis(request, offload=True)
+
+async def run_resume_analysis(request: ResumeAnalysisRequest, offload: bool = False) -> ResumeAnalysisResponse:
+    """Cached resume analysis, shared by the endpoint and background tasks.
+
+    With ``offload`` a cache miss is analyzed on the process pool instead
+    of blocking the event loop.
+    """
     try:
         if len(request.resume_text.strip()) < 10:
             return ResumeAnalysisResponse(
@@ -26,42 +39,20 @@ async def analyze_resume(request: ResumeAnalysisRequest, current_user: dict = De
                 analysis={}
             )
         
-        # Extract skills
-        extracted_skills = extract_skills_from_text(request.resume_text)
-        
-        # Analyze strengths and weaknesses
-        strength_analysis = analyze_resume_strengths(extracted_skills)
-        
-        # Calculate missing skills dynamically
-        extracted_skills_set = set(extracted_skills)
-        in_demand_set = set(IN_DEMAND_SKILLS)
-        missing_skills = list(in_demand_set - extracted_skills_set)
-        
-        # Calculate job match score based on skills
-        match_score = calculate_job_match_score(extracted_skills, IN_DEMAND_SKILLS)
-        
-        # Generate improvement suggestions based on missing skills
-        improvement_suggestions = []
-        if "AWS" not in extracted_skills_set or "Azure" not in extracted_skills_set or "GCP" not in extracted_skills_set:
-            improvement_suggestions.append("Learn cloud platforms like AWS, Azure, or GCP")
-        if "Docker" not in extracted_skills_set or "Kubernetes" not in extracted_skills_set:
-            improvement_suggestions.append("Gain experience with containerization (Docker, Kubernetes)")
-        if "CI/CD" not in extracted_skills_set:
-            improvement_suggestions.append("Improve your understanding of CI/CD pipelines")
-        if "Microservices" not in extracted_skills_set:
-            improvement_suggestions.append("Learn about microservices architecture")
-        if not improvement_suggestions:
-            improvement_suggestions.append("Continue expanding your technical skill set")
-        
-        analysis_result = {
-            "extracted_skills": extracted_skills,
-            "strengths": strength_analysis["strengths"],
-            "weaknesses": strength_analysis["weaknesses"],
-            "missing_skills": missing_skills[:10],  # Top 10 missing skills
-            "job_match_score": match_score,
-            "improvement_suggestions": improvement_suggestions,
-            "experience_level": "Mid-level" if len(extracted_skills) >= 5 else "Entry-level" if len(extracted_skills) >= 2 else "Beginner"
-        }
+        # Resubmissions of the same resume are served from the cache
+        with timed_stage("cache"):
+            cache_key = analysis_cache_key(request.resume_text, request.target_job_title)
+            analysis_result = await analysis_cache.get(cache_key)
+        if analysis_result is None:
+            with timed_stage("analysis"):
+                if offload:
+                    loop = asyncio.get_running_loop()
+                    analysis_result = await loop.run_in_executor(
+                        get_process_pool(), analyze_resume_text, request.resume_text
+                    )
+                else:
+                    analysis_result = analyze_resume_text(request.resume_text)
+            await analysis_cache.set(cache_key, analysis_result)
         
         return ResumeAnalysisResponse(
             status="success",
@@ -74,4 +65,87 @@ async def analyze_resume(request: ResumeAnalysisRequest, current_user: dict = De
             status="error",
             message=f"Analysis failed: {str(e)}",
             analysis={}
-        )
\ No newline at end of file
+        )
+
+@router.post("/analyze-resume/batch", response_model=BatchResumeAnalysisResponse)
+async def analyze_resume_batch(request: BatchResumeAnalysisRequest, current_user: dict = Depends(get_current_user)):
+    """Analyze many resumes at once, fanning chunks out over the process pool"""
+    if len(request.resumes) > settings.ANALYSIS_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch may contain at most {settings.ANALYSIS_BATCH_MAX_ITEMS} resumes"
+        )
+    
+    # Serve cached analyses first and only send the misses to the pool
+    keys = [analysis_cache_key(item.resume_text, item.target_job_title) for item in request.resumes]
+    outcomes = []
+    pending = []
+    for index, (item, key) in enumerate(zip(request.resumes, keys)):
+        cached = await analysis_cache.get(key)
+        if cached is not None:
+            outcomes.append({"status": "success", "message": "Resume analyzed successfully", "analysis": cached})
+        else:
+            outcomes.append(None)
+            pending.append(index)
+    
+    chunk_size = max(1, settings.ANALYSIS_BATCH_CHUNK_SIZE)
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    
+    # Without a process pool (ANALYSIS_POOL_WORKERS=0) fall back to the default
+    # thread pool so the event loop is still not blocked
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    chunk_results = await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, analyze_resume_chunk, [request.resumes[i].resume_text for i in chunk])
+            for chunk in chunks
+        ),
+        return_exceptions=True
+    )
+    
+    for chunk, chunk_outcome in zip(chunks, chunk_results):
+        if isinstance(chunk_outcome, Exception):
+            chunk_outcome = [
+                {"status": "error", "message": f"Analysis failed: {str(chunk_outcome)}", "analysis": {}}
+                for _ in chunk
+            ]
+        for index, item in zip(chunk, chunk_outcome):
+            outcomes[index] = item
+            if item["status"] == "success":
+                await analysis_cache.set(keys[index], item["analysis"])
+    
+    results = [BatchResumeAnalysisItem(index=index, **item) for index, item in enumerate(outcomes)]
+    
+    succeeded = sum(1 for item in results if item.status == "success")
+    return BatchResumeAnalysisResponse(
+        status="success" if succeeded == len(results) else "partial" if succeeded else "error",
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results
+    )
+
+@router.post("/recommend-jobs", response_model=JobRecommendationResponse)
+async def recommend_jobs(request: JobRecommendationRequest, current_user: dict = Depends(get_current_user)):
+    """Rank active jobs for the signed-in user's resume using the job skill index"""
+    if request.user_id != current_user['id']:
+        # The stored resume of another user is private
+        raise HTTPException(status_code=403, detail="Recommendations can only be requested for yourself")
+    resume_text = request.resume_text
+    if not resume_text:
+        candidate = await candidates_table.find_one("email", current_user['email'])
+        if candidate is None:
+            raise HTTPException(status_code=404, detail="No resume found for this user; provide resume_text")
+        resume_text = candidate['resume']
+    
+    with timed_stage("skill_extraction"):
+        user_skills = extract_skills_from_text(resume_text)
+    with timed_stage("matching"):
+        result = job_catalog.recommend(user_skills, request.limit)
+    
+    return JobRecommendationResponse(
+        status="success",
+        user_id=request.user_id,
+        recommendations=[JobRecommendation(**item).model_dump() for item in result["recommendations"]],
+        total_jobs_analyzed=result["total_jobs_analyzed"]
+    )
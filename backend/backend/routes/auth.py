@@ -1,37 +1,46 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from ..models.users import UserRegister, UserLogin, Token, UserResponse
-from ..utils.password_hasher import get_password_hash, verify_password
+from ..utils.password_hasher import get_password_hash_async, verify_password_async, PasswordHasherBusy
 from ..utils.validators import validate_password_strength
-from ..utils.jwt_handler import create_access_token, verify_token
-from ..core.database import get_supabase
+from ..utils.jwt_handler import create_access_token, verify_token, invalidate_user_tokens
+from ..core.metrics import TimedRoute, timed_stage
+from ..core.repositories import get_user_repository
 from datetime import timedelta
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=TimedRoute)
 security = HTTPBearer()
 
-# In-memory database (replace with Supabase later)
-users_db = []
-next_id = 1
+# Users are looked up through indexes on id and normalized email
+# (Supabase-backed when configured, the storage backend otherwise)
 
-def get_user_by_email(email: str):
-    for user in users_db:
-        if user['email'] == email:
-            return user
-    return None
+async def get_user_by_email(email: str):
+    return await get_user_repository().get_by_email(email)
 
-def get_user_by_id(user_id: int):
-    for user in users_db:
-        if user['id'] == user_id:
-            return user
-    return None
+async def get_user_by_id(user_id: int):
+    return await get_user_repository().get_by_id(user_id)
+
+def hasher_busy_exception(exc: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        user_id = verify_token(credentials.credentials)
-        user = get_user_by_id(user_id)
+        with timed_stage("auth"):
+            user_id = verify_token(credentials.credentials)
+            user = await get_user_by_id(user_id)
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
+        if not user.get('is_active', True):
+            invalidate_user_tokens(user_id)
+            raise HTTPException(
+                status_code=401,
+                detail="Inactive user",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
         return user
     except HTTPException:
         raise
@@ -44,9 +53,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 
 @router.post("/register", response_model=dict)
 async def register(user_data: UserRegister):
-    global next_id
-    
-    if get_user_by_email(user_data.email):
+    if await get_user_by_email(user_data.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Validate password strength
@@ -54,46 +61,22 @@ async def register(user_data: UserRegister):
     if not is_valid:
         raise HTTPException(status_code=400, detail=message)
     
-    hashed_password = get_password_hash(user_data.password)
-    
-    new_user = {
-        "id": next_id,
-        "name": user_data.name,
-        "email": user_data.email,
-        "hashed_password": hashed_password,
-        "is_active": True
-    }
-    users_db.append(new_user)
-    next_id += 1
-    
-    access_token = create_access_token(data={"sub": new_user['id']})
-    
-    return {
-        "status": "success",
-        "message": "User registered successfully",
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user_id": new_user['id'],
-        "user": {
-            "id": new_user['id'],
-            "name": new_user['name'],
-            "email": new_user['email']
-        }
-    }
-    
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PasswordHasherBusy as e:
+        raise hasher_busy_exception(e)
     
-    new_user = {
-        "id": next_id,
-        "name": user_data.name,
-        "email": user_data.email,
-        "hashed_password": hashed_password,
-        "is_active": True
-    }
-    users_db.append(new_user)
-    next_id += 1
+    try:
+        new_user = await get_user_repository().create({
+            "name": user_data.name,
+            "email": user_data.email,
+            "hashed_password": hashed_password,
+            "is_active": True
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    access_token = create_access_token(data={"sub": new_user['id']})
+    access_token = create_access_token(data={"sub": str(new_user['id'])})
     
     return {
         "status": "success",
@@ -110,15 +93,20 @@ async def register(user_data: UserRegister):
 
 @router.post("/login", response_model=dict)
 async def login(login_data: UserLogin):
-    user = get_user_by_email(login_data.email)
+    user = await get_user_by_email(login_data.email)
     
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
-    if not verify_password(login_data.password, user['hashed_password']):
+    try:
+        password_valid = await verify_password_async(login_data.password, user['hashed_password'])
+    except PasswordHasherBusy as e:
+        raise hasher_busy_exception(e)
+    
+    if not password_valid:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
-    access_token = create_access_token(data={"sub": user['id']})
+    access_token = create_access_token(data={"sub": str(user['id'])})
     
     return {
         "status": "success",
@@ -1,44 +1,190 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+import asyncio
+import json
+import logging
+import time
+from fastapi import APIRouter, HTTPException, Depends, Query, Header
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, EmailStr
+from typing import List, Optional, Dict, Any, AsyncIterator
 from .auth import get_current_user
-from difflib import SequenceMatcher
+from ..core.config import settings
+from ..core.lifecycle import on_shutdown, on_startup, periodic
+from ..core.metrics import TimedRoute
+from ..core.storage import storage
 from ..utils.ai_helpers import extract_skills_from_text
+from ..utils.pagination import MAX_PAGE_SIZE, decode_cursor, page_response, parse_fields
+from ..utils.ann_index import IVFIndex
+from ..utils.candidate_search import CandidateCatalog
+from ..utils.change_feed import ChangeFeed
+from ..utils.embeddings import EMBEDDING_DIM, embedding_signature
+from ..utils.feature_store import FeatureStore
 
-router = APIRouter(prefix="/candidates", tags=["candidates"])
+logger = logging.getLogger(__name__)
 
-# In-memory candidates database
-candidates_db = [
+router = APIRouter(prefix="/candidates", tags=["candidates"], route_class=TimedRoute)
+
+# Demo candidates inserted when the candidates table starts out empty
+SEED_CANDIDATES = [
     {
-        "id": 1,
         "name": "Alice Johnson",
         "resume": "Senior Python developer with 5 years experience. Expertise in FastAPI, Django, PostgreSQL, Docker, Kubernetes, AWS. Strong in microservices architecture and CI/CD pipelines.",
         "email": "alice@example.com"
     },
     {
-        "id": 2,
         "name": "Bob Smith",
         "resume": "Full-stack developer proficient in React, Node.js, JavaScript. Experience with MongoDB, MySQL, REST APIs. 3 years in web development and UX optimization.",
         "email": "bob@example.com"
     },
     {
-        "id": 3,
         "name": "Carol Davis",
         "resume": "DevOps engineer with Docker, Kubernetes, Terraform, CI/CD expertise. AWS and Azure cloud platforms. 4 years infrastructure and deployment automation.",
         "email": "carol@example.com"
     },
     {
-        "id": 4,
         "name": "David Wilson",
         "resume": "Junior Python developer with Django experience. Learning FastAPI and PostgreSQL. Git and basic Docker knowledge. 1 year professional experience.",
         "email": "david@example.com"
     }
 ]
 
+candidates_table = storage.table("candidates")
+changes_table = storage.table("candidate_changes")
+
+# Candidate records with the skill index, TF-IDF vectors and embeddings of
+# their resumes, maintained incrementally on every write. They are derived
+# from the candidates table and rebuilt from it when the app starts. The
+# embeddings' ANN index and the parsed resume features are also saved under
+# EMBEDDING_INDEX_DIR and FEATURE_STORE_DIR, if set, so unchanged resumes
+# are not parsed or embedded again.
+catalog = CandidateCatalog(settings.SEMANTIC_WEIGHT, settings.ANN_NPROBE)
+
+# Reads the candidate change log, which storage writes with every insert,
+# update and delete, for the writes of other server workers
+candidate_feed = ChangeFeed(changes_table, settings.CHANGE_LOG_GRACE_SECONDS)
+
+def index_candidate(candidate: Dict[str, Any]) -> None:
+    """Add or refresh a candidate in the search catalog"""
+    catalog.add(candidate)
+
+def unindex_candidate(candidate_id: int) -> None:
+    catalog.remove(candidate_id)
+
+@on_startup
+async def load_candidate_index() -> None:
+    if await candidates_table.count() == 0:
+        await candidates_table.insert_many(SEED_CANDIDATES)
+    semantic_index = feature_store = None
+    if settings.EMBEDDING_INDEX_DIR:
+        semantic_index = IVFIndex.load(settings.EMBEDDING_INDEX_DIR, EMBEDDING_DIM, settings.ANN_NPROBE,
+                                        embedding_signature)
+    if settings.FEATURE_STORE_DIR:
+        feature_store = FeatureStore.load(settings.FEATURE_STORE_DIR)
+    # Changes logged from here on are applied by the next sync
+    await candidate_feed.skip()
+    candidates = await candidates_table.list_all()
+    # Candidates whose resume is unchanged reuse the saved (memory-mapped)
+    # features and embeddings
+    catalog.clear(semantic_index, feature_store)
+    for candidate in candidates:
+        index_candidate(candidate)
+    catalog.retain_derived()
+    # Pack the freshly indexed candidates before serving
+    await catalog.text_index.compact_in_background()
+    if catalog.semantic_index.needs_compaction():
+        await catalog.semantic_index.compact_in_background()
+    await save_derived_indexes()
+
+@periodic(settings.DERIVED_INDEX_SAVE_SECONDS)
+@on_shutdown
+async def save_derived_indexes() -> None:
+    """Persist the ANN index and feature store if they changed since they
+    were loaded or saved
+    """
+    semantic_index, feature_store = catalog.semantic_index, catalog.feature_store
+    if settings.EMBEDDING_INDEX_DIR and semantic_index.dirty and semantic_index.needs_compaction():
+        # Only the built segment is saved; merge a large delta into it first
+        await semantic_index.compact_in_background()
+    for directory, derived in ((settings.EMBEDDING_INDEX_DIR, semantic_index),
+                               (settings.FEATURE_STORE_DIR, feature_store)):
+        if not directory or not derived.dirty:
+            continue
+        try:
+            if derived is feature_store:
+                await feature_store.save_in_background(directory)
+            else:
+                await asyncio.to_thread(derived.save, directory)
+        except OSError as exc:
+            logger.warning("Could not save %s to %s: %s", type(derived).__name__, directory, exc)
+
+@periodic(settings.INDEX_COMPACT_SECONDS)
+async def compact_candidate_indexes() -> None:
+    """Merge the TF-IDF and ANN index deltas once they are due, off the
+    request path
+    """
+    if catalog.text_index.needs_compaction():
+        await catalog.text_index.compact_in_background()
+    if catalog.semantic_index.needs_compaction():
+        await catalog.semantic_index.compact_in_background()
+
+def apply_candidate(candidate_id: int, candidate: Optional[Dict[str, Any]]) -> None:
+    """Bring the catalog in line with a candidate's stored state (None once
+    deleted); unchanged candidates are left alone
+    """
+    if candidate is None:
+        unindex_candidate(candidate_id)
+    elif catalog.records.get(candidate_id) != candidate:
+        index_candidate(candidate)
+
+@periodic(settings.INDEX_SYNC_SECONDS)
+async def sync_candidate_index() -> None:
+    """Apply candidate inserts, updates and deletes made by other workers
+    since the last load or sync
+    """
+    if time.time() - candidate_feed.read_at > settings.CHANGE_LOG_RETENTION_SECONDS / 2:
+        # Entries this worker has not read may have been pruned already
+        await resync_candidate_index()
+        return
+    changed_ids = await candidate_feed.changed_ids()
+    for start in range(0, len(changed_ids), MAX_PAGE_SIZE):
+        # Re-read the current state: present means inserted or updated, gone means deleted
+        batch = changed_ids[start:start + MAX_PAGE_SIZE]
+        current = {candidate['id']: candidate for candidate in await candidates_table.get_many(batch)}
+        for candidate_id in batch:
+            apply_candidate(candidate_id, current.get(candidate_id))
+
+async def resync_candidate_index() -> None:
+    """Re-index every candidate that differs from the candidates table, for
+    a worker that fell too far behind the change log
+    """
+    logger.warning("Candidate index fell behind the change log; resyncing from the candidates table")
+    await candidate_feed.skip()
+    candidates = {candidate['id']: candidate for candidate in await candidates_table.list_all()}
+    for candidate_id in [candidate_id for candidate_id in catalog.records if candidate_id not in candidates]:
+        unindex_candidate(candidate_id)
+    for candidate_id, candidate in candidates.items():
+        apply_candidate(candidate_id, candidate)
+
+@periodic(settings.CHANGE_LOG_RETENTION_SECONDS / 4)
+async def prune_candidate_changes() -> None:
+    await candidate_feed.prune(settings.CHANGE_LOG_RETENTION_SECONDS)
+
 class CandidateFindRequest(BaseModel):
     job_description: str
     limit: Optional[int] = 10
 
+class CandidateCreate(BaseModel):
+    name: str
+    email: EmailStr
+    resume: str
+
+class CandidateBulkCreate(BaseModel):
+    candidates: List[CandidateCreate]
+
+class CandidateUpdate(BaseModel):
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    resume: Optional[str] = None
+
 class CandidateResponse(BaseModel):
     id: int
     name: str
@@ -47,13 +193,13 @@ class CandidateResponse(BaseModel):
     match_score: float
     skill_match: float
     text_similarity: float
+    semantic_similarity: float
     matching_skills: List[str]
     missing_skills: List[str]
 
 def calculate_text_similarity(text1: str, text2: str) -> float:
-    """Calculate similarity between two texts"""
-    ratio = SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
-    return round(ratio * 100, 2)
+    """Calculate TF-IDF cosine similarity between two texts"""
+    return catalog.text_index.similarity(text1, text2)
 
 def calculate_skill_match(candidate_skills: List[str], job_skills: List[str]) -> float:
     """Calculate skill match percentage"""
@@ -68,83 +214,185 @@ def calculate_skill_match(candidate_skills: List[str], job_skills: List[str]) ->
     
     return round(match_ratio * 100, 2)
 
-@router.post("/find", response_model=dict)
-async def find_candidates(request: CandidateFindRequest, current_user: dict = Depends(get_current_user)):
-    """Find best matching candidates for a job description"""
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Number of provisional leaders sent while a streamed ranking is in progress
+PROVISIONAL_TOP = 10
+
+def ndjson_line(event: Dict[str, Any]) -> str:
+    return json.dumps(event) + "\n"
+
+async def stream_ranking(request: CandidateFindRequest) -> AsyncIterator[str]:
+    """Emit a ranking as NDJSON events.
+
+    ``meta`` comes first, then a ``provisional`` event (id, name and score of
+    the current leaders) after each group of candidates scored, then one
+    ``candidate`` line per final result in rank order and a closing
+    ``done``. Result dicts are built one line at a time, and control goes
+    back to the event loop between groups.
+    """
+    # A consistent ranking: writes while the stream is paused between groups
+    # do not leak into it, and every line belongs to index_version
+    ranking = catalog.rank(request.job_description, request.limit, consistent=True)
+    state = next(ranking)
+    yield ndjson_line({
+        "type": "meta",
+        "index_version": state.version,
+        "job_description": request.job_description,
+        "job_skills": state.job_skills,
+        "total_candidates": state.total_candidates
+    })
+    while not state.final:
+        yield ndjson_line({
+            "type": "provisional",
+            "scored_candidates": state.scored,
+            "candidates": [
+                {"id": entry[2], "name": entry[5]['name'], "match_score": entry[0]}
+                for entry in state.winners()[:PROVISIONAL_TOP]
+            ]
+        })
+        await asyncio.sleep(0)
+        state = next(ranking)
     
+    winners = state.winners()
+    for rank, entry in enumerate(winners, 1):
+        yield ndjson_line({"type": "candidate", "rank": rank, **catalog.materialize(entry, state.job_skill_set)})
+    yield ndjson_line({"type": "done", "matched_candidates": len(winners), "scored_candidates": state.scored})
+
+def check_job_description(request: CandidateFindRequest) -> None:
     if not request.job_description or len(request.job_description.strip()) < 10:
         raise HTTPException(
             status_code=400,
             detail="Job description must be at least 10 characters long"
         )
+
+@router.post("/find", response_model=dict)
+async def find_candidates(
+    request: CandidateFindRequest,
+    stream: bool = Query(False, description="Stream results as NDJSON"),
+    accept: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Find best matching candidates for a job description.
+
+    With ``?stream=1`` or ``Accept: application/x-ndjson`` the ranking is
+    streamed as newline-delimited JSON instead of one document.
+    """
+    check_job_description(request)
     
-    job_skills = extract_skills_from_text(request.job_description)
-    ranked_candidates = []
-    
-    for candidate in candidates_db:
-        # Extract candidate skills
-        candidate_skills = extract_skills_from_text(candidate['resume'])
-        
-        # Calculate skill match score (70% weight)
-        skill_score = calculate_skill_match(candidate_skills, job_skills)
-        
-        # Calculate text similarity score (30% weight)
-        text_score = calculate_text_similarity(
-            request.job_description,
-            candidate['resume']
-        )
-        
-        # Weighted combined score
-        combined_score = (skill_score * 0.7) + (text_score * 0.3)
-        
-        # Find matching and missing skills
-        matching_skills = list(set(job_skills) & set(candidate_skills))
-        missing_skills = list(set(job_skills) - set(candidate_skills))
-        
-        ranked_candidates.append({
-            "id": candidate['id'],
-            "name": candidate['name'],
-            "resume": candidate['resume'],
-            "email": candidate['email'],
-            "match_score": round(combined_score, 2),
-            "skill_match": skill_score,
-            "text_similarity": text_score,
-            "matching_skills": matching_skills,
-            "missing_skills": missing_skills
-        })
-    
-    # Sort by match score descending
-    ranked_candidates.sort(key=lambda x: x['match_score'], reverse=True)
-    
-    # Apply limit
-    limited_results = ranked_candidates[:request.limit]
+    if stream or (accept and NDJSON_MEDIA_TYPE in accept):
+        return StreamingResponse(stream_ranking(request), media_type=NDJSON_MEDIA_TYPE)
     
+    return find_response(request, catalog.search(request.job_description, request.limit))
+
+def find_response(request: CandidateFindRequest, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Body of a /find response from a catalog search result"""
     return {
         "status": "success",
+        "index_version": result["index_version"],
         "job_description": request.job_description,
-        "job_skills": job_skills,
-        "total_candidates": len(candidates_db),
-        "matched_candidates": len(limited_results),
-        "candidates": limited_results
+        "job_skills": result["job_skills"],
+        "total_candidates": result["total_candidates"],
+        "matched_candidates": len(result["candidates"]),
+        "candidates": result["candidates"]
     }
 
 @router.get("/", response_model=dict)
-async def get_all_candidates(current_user: dict = Depends(get_current_user)):
-    """Get all candidates"""
+async def get_all_candidates(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,email"),
+    skill: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """List candidates one page at a time, optionally those with a given skill"""
+    try:
+        after_id = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if skill:
+        # Walk the skill posting list from the candidate index in id order
+        skill_names = extract_skills_from_text(skill) or [skill.strip().title()]
+        ids = catalog.skill_index.ids_with_skills(skill_names, after_id=after_id, limit=limit + 1)
+        candidates = await candidates_table.get_many(ids)
+    else:
+        candidates = await candidates_table.page({}, after_id=after_id, limit=limit + 1)
+    
+    page = page_response(candidates, limit, parse_fields(fields))
     return {
         "status": "success",
-        "total_candidates": len(candidates_db),
-        "candidates": candidates_db
+        "total_candidates": await candidates_table.count(),
+        "matched_candidates": page["count"],
+        "candidates": page["data"],
+        "next_cursor": page["next_cursor"]
     }
 
 @router.get("/{candidate_id}", response_model=dict)
 async def get_candidate(candidate_id: int, current_user: dict = Depends(get_current_user)):
     """Get a specific candidate by ID"""
-    for candidate in candidates_db:
-        if candidate['id'] == candidate_id:
-            return {
-                "status": "success",
-                "candidate": candidate
-            }
+    candidate = await candidates_table.get(candidate_id)
+    if candidate is not None:
+        return {
+            "status": "success",
+            "candidate": candidate
+        }
     
     raise HTTPException(status_code=404, detail="Candidate not found")
+
+@router.post("/", response_model=dict)
+async def create_candidate(candidate_data: CandidateCreate, current_user: dict = Depends(get_current_user)):
+    """Add a candidate and index it incrementally"""
+    candidate = await candidates_table.insert(candidate_data.model_dump())
+    index_candidate(candidate)
+    return {
+        "status": "success",
+        "message": "Candidate created successfully",
+        "index_version": catalog.version,
+        "candidate": candidate
+    }
+
+@router.post("/bulk", response_model=dict)
+async def create_candidates_bulk(request: CandidateBulkCreate, current_user: dict = Depends(get_current_user)):
+    """Add many candidates in one transaction and index each of them"""
+    if len(request.candidates) > settings.CANDIDATE_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Bulk requests may contain at most {settings.CANDIDATE_BULK_MAX_ITEMS} candidates"
+        )
+    candidates = await candidates_table.insert_many(item.model_dump() for item in request.candidates)
+    for candidate in candidates:
+        index_candidate(candidate)
+    return {
+        "status": "success",
+        "message": f"{len(candidates)} candidates created successfully",
+        "index_version": catalog.version,
+        "candidates": candidates
+    }
+
+@router.patch("/{candidate_id}", response_model=dict)
+async def update_candidate(candidate_id: int, candidate_data: CandidateUpdate,
+                           current_user: dict = Depends(get_current_user)):
+    """Change some of a candidate's fields and re-index it"""
+    fields = candidate_data.model_dump(exclude_unset=True, exclude_none=True)
+    candidate = await candidates_table.update(candidate_id, fields)
+    if candidate is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    index_candidate(candidate)
+    return {
+        "status": "success",
+        "message": "Candidate updated successfully",
+        "index_version": catalog.version,
+        "candidate": candidate
+    }
+
+@router.delete("/{candidate_id}", response_model=dict)
+async def delete_candidate(candidate_id: int, current_user: dict = Depends(get_current_user)):
+    """Remove a candidate from storage and the search indexes"""
+    if not await candidates_table.delete(candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    unindex_candidate(candidate_id)
+    return {
+        "status": "success",
+        "message": "Candidate deleted successfully",
+        "index_version": catalog.version
+    }
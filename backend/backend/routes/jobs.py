@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Optional
 from ..models.jobs import JobResponse
+from ..core.config import settings
+from ..core.lifecycle import on_startup, periodic
+from ..core.metrics import TimedRoute
+from ..core.storage import storage
+from ..utils.change_feed import ChangeFeed
+from ..utils.job_search import JobCatalog
+from ..utils.pagination import MAX_PAGE_SIZE, decode_cursor, page_response, parse_fields
 from .auth import get_current_user
 
 class JobCreate(BaseModel):
@@ -12,25 +20,85 @@ class JobCreate(BaseModel):
     location: Optional[str] = None
     salary_range: Optional[str] = None
 
-router = APIRouter(prefix="/jobs", tags=["jobs"])
+router = APIRouter(prefix="/jobs", tags=["jobs"], route_class=TimedRoute)
 
-# In-memory jobs database
-jobs_db = []
-job_id_counter = 1
+# Jobs table in the configured storage backend; ids are assigned by storage
+jobs_table = storage.table("jobs")
+
+# Skill posting index over active jobs, updated as jobs are created and
+# rebuilt from the jobs table when the app starts
+job_catalog = JobCatalog()
+
+# Reads the job change log for the jobs other server workers wrote
+job_feed = ChangeFeed(jobs_table.changes, settings.CHANGE_LOG_GRACE_SECONDS)
+
+@on_startup
+async def load_job_index() -> None:
+    # Changes logged from here on are applied by the next sync
+    await job_feed.skip()
+    jobs = await jobs_table.list_all()
+    job_catalog.clear()
+    for job in jobs:
+        job_catalog.add(job)
+
+@periodic(settings.INDEX_SYNC_SECONDS)
+async def sync_job_index() -> None:
+    """Index jobs inserted, updated or deleted by other workers since the
+    last load or sync
+    """
+    if time.time() - job_feed.read_at > settings.CHANGE_LOG_RETENTION_SECONDS / 2:
+        # Entries this worker has not read may have been pruned already
+        await load_job_index()
+        return
+    changed_ids = await job_feed.changed_ids()
+    for start in range(0, len(changed_ids), MAX_PAGE_SIZE):
+        batch = changed_ids[start:start + MAX_PAGE_SIZE]
+        current = {job['id']: job for job in await jobs_table.get_many(batch)}
+        for job_id in batch:
+            if job_id in current:
+                job_catalog.add(current[job_id])
+            else:
+                job_catalog.remove(job_id)
+
+@periodic(settings.CHANGE_LOG_RETENTION_SECONDS / 4)
+async def prune_job_changes() -> None:
+    await job_feed.prune(settings.CHANGE_LOG_RETENTION_SECONDS)
 
 @router.get("/", response_model=dict)
-async def get_jobs(current_user: dict = Depends(get_current_user)):
+async def get_jobs(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,company"),
+    company: Optional[str] = None,
+    location: Optional[str] = None,
+    skill: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """List jobs one page at a time, filtered through the storage indexes"""
+    try:
+        after_id = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filters = {
+        "company": company,
+        "location": location,
+        "requirements": skill,
+        "is_active": is_active,
+    }
+    filters = {field: value for field, value in filters.items() if value is not None}
+    
+    jobs = await jobs_table.page(filters, after_id=after_id, limit=limit + 1)
     return {
         "status": "success",
-        "data": jobs_db,
-        "total": len(jobs_db)
+        **page_response(jobs, limit, parse_fields(fields)),
+        "total": await jobs_table.count()
     }
 
 @router.post("/", response_model=dict)
 async def create_job(job_data: JobCreate, current_user: dict = Depends(get_current_user)):
-    global job_id_counter
-    new_job = {
-        "id": job_id_counter,
+    new_job = await jobs_table.insert({
         "title": job_data.title,
         "company": job_data.company,
         "description": job_data.description,
@@ -39,9 +107,8 @@ async def create_job(job_data: JobCreate, current_user: dict = Depends(get_curre
         "salary_range": job_data.salary_range,
         "posted_by": current_user['id'],
         "is_active": True
-    }
-    job_id_counter += 1
-    jobs_db.append(new_job)
+    })
+    job_catalog.add(new_job)
     
     return {
         "status": "success",
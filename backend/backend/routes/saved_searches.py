@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..core.config import settings
+from ..core.lifecycle import periodic
+from ..core.metrics import TimedRoute
+from ..core.storage import storage
+from ..models.saved_searches import SavedSearchCreate
+from ..utils.pagination import MAX_PAGE_SIZE, decode_cursor, page_response
+from ..utils.saved_searches import SavedRanking, SavedRankings
+from .auth import get_current_user
+from .candidates import CandidateFindRequest, catalog, check_job_description
+
+router = APIRouter(prefix="/saved-searches", tags=["saved searches"], route_class=TimedRoute)
+
+saved_searches_table = storage.table("saved_searches")
+
+# Saved job descriptions are stored; their rankings are derived per worker
+# from the candidate catalog and only rescored for candidates that changed
+saved_rankings = SavedRankings(catalog, settings.SAVED_SEARCH_HEADROOM, settings.SAVED_SEARCH_MAX_AGE_SECONDS)
+
+@periodic(settings.SAVED_SEARCH_REFRESH_SECONDS)
+async def refresh_saved_rankings() -> None:
+    """Recompute rankings left inexact by new IDF weights or past their
+    max age, yielding to requests between them
+    """
+    for search_id in saved_rankings.due():
+        saved_rankings.refresh_due(search_id)
+        await asyncio.sleep(0)
+
+def ranking_response(search: Dict[str, Any], ranking: SavedRanking) -> Dict[str, Any]:
+    candidates = [catalog.materialize(entry, ranking.job_skill_set) for entry in ranking.top()]
+    return {
+        "status": "success",
+        "saved_search": search,
+        "index_version": ranking.version,
+        "updated_at": ranking.updated_at,
+        "refreshed_at": ranking.refreshed_at,
+        "exact": ranking.exact,
+        "job_skills": ranking.job_skills,
+        "total_candidates": ranking.total_candidates,
+        "matched_candidates": len(candidates),
+        "candidates": candidates
+    }
+
+async def get_own_search(search_id: int, current_user: dict) -> Dict[str, Any]:
+    search = await saved_searches_table.get(search_id)
+    if search is None:
+        # Possibly deleted through another worker
+        saved_rankings.discard(search_id)
+    if search is None or search['owner'] != current_user['id']:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return search
+
+@router.post("/", response_model=dict)
+async def create_saved_search(request: SavedSearchCreate, current_user: dict = Depends(get_current_user)):
+    """Save a job description and materialize its candidate ranking"""
+    check_job_description(CandidateFindRequest(job_description=request.job_description))
+    if not 1 <= request.limit <= settings.SAVED_SEARCH_MAX_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Limit must be between 1 and {settings.SAVED_SEARCH_MAX_LIMIT}"
+        )
+    search = await saved_searches_table.insert({
+        "owner": current_user['id'],
+        "job_description": request.job_description,
+        "limit": request.limit
+    })
+    return ranking_response(search, saved_rankings.read(search))
+
+@router.get("/", response_model=dict)
+async def list_saved_searches(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """List the caller's saved searches one page at a time"""
+    try:
+        after_id = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    searches = await saved_searches_table.page({"owner": current_user['id']}, after_id=after_id, limit=limit + 1)
+    return {"status": "success", **page_response(searches, limit, None)}
+
+@router.get("/{search_id}", response_model=dict)
+async def get_saved_search(search_id: int, current_user: dict = Depends(get_current_user)):
+    """Current top candidates of a saved search.
+
+    Only candidates added, changed or removed since the last read are
+    rescored; ``updated_at`` and ``index_version`` tell how fresh the
+    ranking is and ``refreshed_at`` when it was last computed in full.
+    ``exact`` is false while a change of the IDF weights may have let a
+    candidate outside the held ones in; a background refresh follows.
+    """
+    search = await get_own_search(search_id, current_user)
+    return ranking_response(search, saved_rankings.read(search))
+
+@router.delete("/{search_id}", response_model=dict)
+async def delete_saved_search(search_id: int, current_user: dict = Depends(get_current_user)):
+    """Delete one of the caller's saved searches"""
+    await get_own_search(search_id, current_user)
+    await saved_searches_table.delete(search_id)
+    saved_rankings.discard(search_id)
+    return {
+        "status": "success",
+        "message": "Saved search deleted successfully"
+    }
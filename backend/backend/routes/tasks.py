@@ -0,0 +1,70 @@
+import asyncio
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, HTTPException
+from ..core.lifecycle import on_shutdown, on_startup, periodic
+from ..core.metrics import TimedRoute
+from ..models.ai import ResumeAnalysisRequest
+from ..models.tasks import CandidateSearchTaskRequest, ResumeAnalysisTaskRequest, TaskResponse
+from ..utils.task_queue import QueueFull, task_queue
+from .ai import run_resume_analysis
+from .auth import get_current_user
+from .candidates import CandidateFindRequest, catalog, check_job_description, find_response
+
+router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=TimedRoute)
+
+async def analyze_resume_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    response = await run_resume_analysis(ResumeAnalysisRequest(**payload), offload=True)
+    return response.model_dump()
+
+async def find_candidates_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Rank against a snapshot of the catalog, giving the event loop back
+    between skill-overlap groups so requests are served meanwhile
+    """
+    request = CandidateFindRequest(**payload)
+    for state in catalog.rank(request.job_description, request.limit, consistent=True):
+        await asyncio.sleep(0)
+    return find_response(request, catalog.search_result(state))
+
+task_queue.register("analyze_resume", analyze_resume_task)
+task_queue.register("find_candidates", find_candidates_task)
+
+@on_startup
+async def start_task_queue() -> None:
+    await task_queue.start()
+
+@on_shutdown
+async def stop_task_queue() -> None:
+    await task_queue.stop()
+
+@periodic(60)
+async def evict_expired_tasks() -> None:
+    task_queue.store.evict_expired()
+
+async def submit(kind: str, payload: Dict[str, Any], priority: str, current_user: dict) -> TaskResponse:
+    try:
+        task = await task_queue.submit(kind, payload, current_user['id'], priority)
+    except QueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+    return TaskResponse(**task)
+
+@router.post("/analyze-resume", response_model=TaskResponse, status_code=202)
+async def submit_resume_analysis(request: ResumeAnalysisTaskRequest, current_user: dict = Depends(get_current_user)):
+    """Queue a resume analysis; poll GET /tasks/{id} for the result"""
+    payload = request.model_dump(exclude={"priority"})
+    return await submit("analyze_resume", payload, request.priority, current_user)
+
+@router.post("/find-candidates", response_model=TaskResponse, status_code=202)
+async def submit_candidate_search(request: CandidateSearchTaskRequest, current_user: dict = Depends(get_current_user)):
+    """Queue a candidate search; poll GET /tasks/{id} for the result"""
+    payload = request.model_dump(exclude={"priority"})
+    check_job_description(CandidateFindRequest(**payload))
+    return await submit("find_candidates", payload, request.priority, current_user)
+
+@router.get("/{task_id}", response_model=TaskResponse)
+async def get_task(task_id: str, current_user: dict = Depends(get_current_user)):
+    """Status of a task, with its result once it has finished"""
+    task = await task_queue.get(task_id)
+    # Other users' tasks are reported as missing rather than forbidden
+    if task is None or task['owner'] != current_user['id']:
+        raise HTTPException(status_code=404, detail="Task not found (results expire after a while)")
+    return TaskResponse(**task)
@@ -0,0 +1,92 @@
+"""Bulk-load synthetic users, candidates and jobs into the configured store.
+
+Run from the repository root, e.g.
+
+    STORAGE_BACKEND=sqlite python -m backend.backend.seed --candidates 200000 --jobs 20000
+
+Records are generated from the TECH_SKILLS vocabulary (see
+utils/synthetic_data.py) and inserted in batches. All seeded users share one
+password, hashed once up front. Re-running appends further records after the
+existing ones. The search indexes are rebuilt from the store when the app
+starts, so nothing else needs refreshing.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from typing import Dict, Iterable, Iterator, List
+
+from .core.config import settings
+from .core.storage import Table, storage
+from .utils.password_hasher import get_password_hash
+from .utils.synthetic_data import DISTRIBUTIONS, SkillDistribution, SyntheticDataGenerator
+
+DEFAULT_PASSWORD = "Passw0rd!"
+
+
+def batched(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+async def bulk_insert(table: Table, records: Iterable[Dict], batch_size: int = 5000) -> int:
+    """Insert records in batches (one transaction each on SQL backends)"""
+    inserted = 0
+    for batch in batched(records, batch_size):
+        await table.insert_many(batch)
+        inserted += len(batch)
+    return inserted
+
+
+async def seed(generator: SyntheticDataGenerator, candidates: int = 0, jobs: int = 0, users: int = 0,
+               password: str = DEFAULT_PASSWORD, batch_size: int = 5000) -> Dict[str, int]:
+    """Append synthetic records to the store; returns how many of each were added"""
+    added = {}
+    if users:
+        table = storage.table("users")
+        hashed_password = get_password_hash(password)
+        start = await table.count() + 1
+        added["users"] = await bulk_insert(table, generator.users(users, hashed_password, start), batch_size)
+    if candidates:
+        table = storage.table("candidates")
+        start = await table.count() + 1
+        added["candidates"] = await bulk_insert(table, generator.candidates(candidates, start), batch_size)
+    if jobs:
+        table = storage.table("jobs")
+        start = await table.count() + 1
+        added["jobs"] = await bulk_insert(table, generator.jobs(jobs, start), batch_size)
+    return added
+
+
+async def main(args: argparse.Namespace) -> None:
+    distribution = SkillDistribution(args.distribution, args.zipf_exponent, args.seed, args.hot_skills)
+    generator = SyntheticDataGenerator(args.seed, distribution)
+    if settings.STORAGE_BACKEND == "memory":
+        print("STORAGE_BACKEND=memory: seeded records are discarded when this command exits")
+
+    await storage.connect()
+    try:
+        start = time.perf_counter()
+        added = await seed(generator, args.candidates, args.jobs, args.users, args.password, args.batch_size)
+        elapsed = time.perf_counter() - start
+    finally:
+        await storage.close()
+    summary = ", ".join(f"{count} {kind}" for kind, count in added.items()) or "nothing"
+    print(f"Seeded {summary} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="shared password of the seeded users")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="zipf")
+    parser.add_argument("--zipf-exponent", type=float, default=1.1,
+                        help="skew of skill popularity; higher means fewer dominant skills")
+    parser.add_argument("--hot-skills", nargs="*", default=[],
+                        help="skills to make the most popular, in order")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,43 @@
+"""Launch the API with uvicorn, as configured by Settings.
+
+In development (the default) a single auto-reloading process serves the
+app. With ENVIRONMENT=production, WEB_CONCURRENCY worker processes (one per
+CPU unless set) share the port. Each worker keeps its own search indexes and
+caches, rebuilt from the shared store at startup, so production needs a
+shared STORAGE_BACKEND (sqlite or postgres), a TASK_STORE_URL for the
+background task records and ideally ANALYSIS_CACHE_URL.
+"""
+import uvicorn
+
+from .core.config import settings
+
+
+def check_worker_settings() -> None:
+    """Refuse settings that break once requests are spread over workers"""
+    if settings.WEB_CONCURRENCY <= 1:
+        return
+    if settings.STORAGE_BACKEND == "memory":
+        raise SystemExit(
+            "STORAGE_BACKEND=memory keeps data inside one process; "
+            "use sqlite or postgres with WEB_CONCURRENCY > 1"
+        )
+    if not settings.TASK_STORE_URL:
+        raise SystemExit(
+            "Background task records are kept per process without TASK_STORE_URL, "
+            "so a poll landing on another worker finds no task; set it with WEB_CONCURRENCY > 1"
+        )
+
+
+def run(app_path: str) -> None:
+    if settings.ENVIRONMENT != "production":
+        uvicorn.run(app_path, host=settings.HOST, port=settings.PORT, reload=True)
+        return
+    check_worker_settings()
+    uvicorn.run(
+        app_path,
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WEB_CONCURRENCY,
+        proxy_headers=True,
+        timeout_graceful_shutdown=30,
+    )
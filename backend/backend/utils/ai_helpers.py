@@ -1,5 +1,7 @@
+import hashlib
+import json
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # Define skill categories
 BACKEND_SKILLS = {"Python", "Java", "Go", "Node", "Django", "Flask", "FastAPI", "Express", "Ruby", "Php"}
@@ -16,16 +18,92 @@ TECH_SKILLS = [
     "git", "jenkins", "ci/cd", "rest", "graphql", "api", "microservices", "ux"
 ]
 
+# Common in-demand tech skills
+IN_DEMAND_SKILLS = [
+    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform",
+    "React", "Angular", "Vue", "Node", "Python", "Java",
+    "Docker", "Kubernetes", "CI/CD", "Microservices"
+]
+
+# Alternate spellings mapped to their canonical TECH_SKILLS entry
+SKILL_ALIASES = {
+    "node.js": "node", "nodejs": "node",
+    "react.js": "react", "reactjs": "react",
+    "vue.js": "vue", "vuejs": "vue",
+    "express.js": "express", "expressjs": "express",
+    "golang": "go",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "cicd": "ci/cd", "ci-cd": "ci/cd",
+    "restful": "rest",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+}
+
+def build_skill_matcher(skills: List[str], aliases: Dict[str, str]):
+    """Compile one alternation regex matching every skill and alias.
+
+    Longer terms come first so "node.js" wins over "node", and the lookarounds
+    stop short skills matching inside words ("go" in "good", "api" in
+    "rapid"). An optional plural "s" is allowed ("APIs", "microservices").
+    Returns (pattern, term -> canonical skill, canonical skill -> rank).
+    """
+    canonical = {skill: skill for skill in skills}
+    canonical.update(aliases)
+    alternation = "|".join(re.escape(term) for term in sorted(canonical, key=len, reverse=True))
+    pattern = re.compile(rf"(?<![a-z0-9])({alternation})s?(?![a-z0-9])")
+    rank = {skill: position for position, skill in enumerate(skills)}
+    return pattern, canonical, rank
+
+def _dictionary_version() -> str:
+    """Fingerprint of every table the analysis depends on"""
+    tables = {
+        "skills": TECH_SKILLS,
+        "aliases": SKILL_ALIASES,
+        "in_demand": IN_DEMAND_SKILLS,
+        "categories": [sorted(BACKEND_SKILLS), sorted(FRONTEND_SKILLS), sorted(DEVOPS_SKILLS), sorted(DATABASE_SKILLS)],
+    }
+    return hashlib.sha256(json.dumps(tables, sort_keys=True).encode()).hexdigest()[:16]
+
+_SKILL_PATTERN, _SKILL_CANONICAL, _SKILL_RANK = build_skill_matcher(TECH_SKILLS, SKILL_ALIASES)
+_SKILL_DICTIONARY_VERSION = _dictionary_version()
+
+def skill_dictionary_version() -> str:
+    """Version of the dictionaries the compiled matcher was built from, as
+    of the last sync_skill_dictionary(); cheap enough for every cache key
+    """
+    return _SKILL_DICTIONARY_VERSION
+
+def sync_skill_dictionary() -> str:
+    """Return the current skill-dictionary version, rebuilding the compiled
+    matcher first if TECH_SKILLS, SKILL_ALIASES or the category sets changed
+    since it was built. This fingerprints every table, so it runs at startup
+    and after the dictionaries are edited rather than per request; cache
+    keys then pick up the new version and old analyses are invalidated.
+    """
+    global _SKILL_PATTERN, _SKILL_CANONICAL, _SKILL_RANK, _SKILL_DICTIONARY_VERSION
+    version = _dictionary_version()
+    if version != _SKILL_DICTIONARY_VERSION:
+        _SKILL_PATTERN, _SKILL_CANONICAL, _SKILL_RANK = build_skill_matcher(TECH_SKILLS, SKILL_ALIASES)
+        _SKILL_DICTIONARY_VERSION = version
+    return version
+
+
 def extract_skills_from_text(text: str) -> List[str]:
-    """Extract potential skills from resume text"""
-    text_lower = text.lower()
-    found_skills = []
-    
-    for skill in TECH_SKILLS:
-        if skill in text_lower:
-            found_skills.append(skill.title())
-    
-    return list(set(found_skills))  # Remove duplicates
+    """Extract potential skills from resume text in a single regex pass.
+
+    Skills are returned once each, in TECH_SKILLS order.
+    """
+    found = {_SKILL_CANONICAL[term] for term in _SKILL_PATTERN.findall(text.lower())}
+    return [skill.title() for skill in sorted(found, key=_SKILL_RANK.__getitem__)]
+
+_EXPERIENCE_PATTERN = re.compile(r"(?<![0-9])([0-9]{1,2})\+?\s*(?:years?|yrs?)\b")
+
+def extract_experience_years(text: str) -> Optional[int]:
+    """Largest "N years" figure stated in the text, if any"""
+    years = [int(value) for value in _EXPERIENCE_PATTERN.findall(text.lower())]
+    return max(years) if years else None
 
 def analyze_resume_strengths(skills: List[str], experience_years: int = None) -> Dict[str, Any]:
     """Analyze resume strengths based on skills"""
@@ -66,4 +144,64 @@ def calculate_job_match_score(user_skills: List[str], job_skills: List[str]) ->
     matching_skills = user_skills_set & job_skills_set
     match_ratio = len(matching_skills) / len(job_skills_set)
     
-    return round(match_ratio * 100, 2)
\ No newline at end of file
+    return round(match_ratio * 100, 2)
+
+def analyze_resume_text(resume_text: str) -> Dict[str, Any]:
+    """Run the full skill-based analysis of a single resume"""
+    # Extract skills
+    extracted_skills = extract_skills_from_text(resume_text)
+    
+    # Analyze strengths and weaknesses
+    strength_analysis = analyze_resume_strengths(extracted_skills)
+    
+    # Calculate missing skills dynamically
+    extracted_skills_set = set(extracted_skills)
+    in_demand_set = set(IN_DEMAND_SKILLS)
+    missing_skills = list(in_demand_set - extracted_skills_set)
+    
+    # Calculate job match score based on skills
+    match_score = calculate_job_match_score(extracted_skills, IN_DEMAND_SKILLS)
+    
+    # Generate improvement suggestions based on missing skills
+    improvement_suggestions = []
+    if "AWS" not in extracted_skills_set or "Azure" not in extracted_skills_set or "GCP" not in extracted_skills_set:
+        improvement_suggestions.append("Learn cloud platforms like AWS, Azure, or GCP")
+    if "Docker" not in extracted_skills_set or "Kubernetes" not in extracted_skills_set:
+        improvement_suggestions.append("Gain experience with containerization (Docker, Kubernetes)")
+    if "CI/CD" not in extracted_skills_set:
+        improvement_suggestions.append("Improve your understanding of CI/CD pipelines")
+    if "Microservices" not in extracted_skills_set:
+        improvement_suggestions.append("Learn about microservices architecture")
+    if not improvement_suggestions:
+        improvement_suggestions.append("Continue expanding your technical skill set")
+    
+    return {
+        "extracted_skills": extracted_skills,
+        "strengths": strength_analysis["strengths"],
+        "weaknesses": strength_analysis["weaknesses"],
+        "missing_skills": missing_skills[:10],  # Top 10 missing skills
+        "job_match_score": match_score,
+        "improvement_suggestions": improvement_suggestions,
+        "experience_level": "Mid-level" if len(extracted_skills) >= 5 else "Entry-level" if len(extracted_skills) >= 2 else "Beginner"
+    }
+
+def analyze_resume_chunk(resume_texts: List[str]) -> List[Dict[str, Any]]:
+    """Analyze a chunk of resumes, reporting failures per item.
+
+    Runs in process-pool workers, so it must stay a picklable module-level
+    function that returns plain dicts.
+    """
+    results = []
+    for resume_text in resume_texts:
+        if len(resume_text.strip()) < 10:
+            results.append({"status": "error", "message": "Resume text too short", "analysis": {}})
+            continue
+        try:
+            results.append({
+                "status": "success",
+                "message": "Resume analyzed successfully",
+                "analysis": analyze_resume_text(resume_text)
+            })
+        except Exception as e:
+            results.append({"status": "error", "message": f"Analysis failed: {str(e)}", "analysis": {}})
+    return results
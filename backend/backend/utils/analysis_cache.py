@@ -0,0 +1,119 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..core.config import settings
+from .ai_helpers import skill_dictionary_version
+
+
+def normalize_resume_text(text: str) -> str:
+    """Analysis only looks at lower-cased words, so case and whitespace
+    differences between submissions must not change the key
+    """
+    return " ".join(text.split()).lower()
+
+
+def analysis_cache_key(resume_text: str, target_job_title: Optional[str] = None) -> str:
+    """Content address of an analysis: normalized resume, target title and
+    the skill-dictionary version (so synced dictionary edits invalidate old
+    entries)
+    """
+    parts = [
+        normalize_resume_text(resume_text),
+        normalize_resume_text(target_job_title or ""),
+        skill_dictionary_version(),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class RedisCacheBackend:
+    """Shared cache tier so several workers reuse each other's results"""
+
+    prefix = "pathai:analysis:"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await self._client.set(self.prefix + key, json.dumps(value), ex=self.ttl_seconds)
+
+
+class AnalysisCache:
+    """Size-bounded LRU of analysis results in front of an optional shared
+    backend. The shared tier is best effort: its errors count as misses.
+    """
+
+    def __init__(self, maxsize: int, backend=None):
+        self.maxsize = maxsize
+        self.backend = backend
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.backend_errors = 0
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        if self.backend is not None:
+            try:
+                value = await self.backend.get(key)
+            except Exception:
+                self.backend_errors += 1
+                value = None
+            if value is not None:
+                self._remember(key, value)
+                self.shared_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._remember(key, value)
+        if self.backend is not None:
+            try:
+                await self.backend.set(key, value)
+            except Exception:
+                self.backend_errors += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "backend_errors": self.backend_errors,
+        }
+
+
+def create_analysis_cache() -> AnalysisCache:
+    backend = None
+    if settings.ANALYSIS_CACHE_URL:
+        backend = RedisCacheBackend(settings.ANALYSIS_CACHE_URL, settings.ANALYSIS_CACHE_TTL_SECONDS)
+    return AnalysisCache(settings.ANALYSIS_CACHE_SIZE, backend)
+
+
+analysis_cache = create_analysis_cache()
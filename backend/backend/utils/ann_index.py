@@ -0,0 +1,411 @@
+import asyncio
+import logging
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .array_store import load_arrays, save_arrays
+from .embeddings import CONTENT_HASH_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Vectors written since the last build are scanned exhaustively until they
+# outnumber this fraction of the built ones (and at least COMPACT_MIN_DOCS)
+# and a background compaction merges them in
+COMPACT_RATIO = 0.05
+COMPACT_MIN_DOCS = 256
+# Coarse quantizer training: k-means on a sample of the vectors
+TRAIN_SAMPLE = 20000
+TRAIN_ITERATIONS = 10
+MAX_LISTS = 4096
+ASSIGN_CHUNK = 65536
+
+BUILD_ARRAYS = ("centroids", "offsets", "ids", "vectors", "hashes")
+
+
+def target_lists(count: int) -> int:
+    """Number of inverted lists for ``count`` vectors (about sqrt(count))"""
+    return max(1, min(MAX_LISTS, int(math.sqrt(count))))
+
+
+def nearest_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (by dot product) of every vector"""
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        block = vectors[start:start + ASSIGN_CHUNK]
+        assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def train_centroids(vectors: np.ndarray, lists: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids of (a sample of) unit vectors"""
+    rng = np.random.default_rng(seed)
+    sample = vectors[np.sort(rng.choice(len(vectors), min(len(vectors), TRAIN_SAMPLE), replace=False))]
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(TRAIN_ITERATIONS):
+        assignment = nearest_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        # Lists left empty keep their previous centroid
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids
+
+
+class IVFSnapshot:
+    """Read-only view of an IVFIndex at one point in time.
+
+    The built segment stores its vectors grouped by inverted list
+    (``offsets[i]:offsets[i + 1]`` are list i's rows); a query scans only
+    the ``nprobe`` lists whose centroids are closest to it. Vectors added
+    since the build sit in an append-only delta segment that every query
+    scans exhaustively. Removed or replaced vectors are masked out of both.
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, ids: np.ndarray,
+                 vectors: np.ndarray, hashes: np.ndarray, rows: Dict[int, int], live: np.ndarray,
+                 delta_ids: np.ndarray, delta_vectors: np.ndarray, delta_hashes: np.ndarray,
+                 delta_rows: Dict[int, int], delta_live: np.ndarray, nprobe: int):
+        self._centroids = centroids
+        self._offsets = offsets
+        self._ids = ids
+        self._vectors = vectors
+        self._hashes = hashes
+        self._rows = rows
+        self._live = live
+        self._delta_ids = delta_ids
+        self._delta_vectors = delta_vectors
+        self._delta_hashes = delta_hashes
+        self._delta_rows = delta_rows
+        self._delta_live = delta_live
+        self.nprobe = nprobe
+
+    def _probed_rows(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        lists = len(self._centroids)
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        if nprobe >= lists:
+            probed = np.arange(lists)
+        else:
+            probed = np.argpartition(-(self._centroids @ query), nprobe)[:nprobe]
+        starts = self._offsets[probed]
+        lengths = self._offsets[probed + 1] - starts
+        rows = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+        return rows[self._live[rows]]
+
+    def search(self, query: np.ndarray, k: int, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Approximate top ``k`` (id, score 0-100) by cosine similarity, best first"""
+        rows = self._probed_rows(query, nprobe or self.nprobe)
+        slots = np.flatnonzero(self._delta_live)
+        ids = np.concatenate((self._ids[rows], self._delta_ids[slots]))
+        scores = np.concatenate((self._vectors[rows] @ query, self._delta_vectors[slots] @ query))
+        if k < len(ids):
+            top = np.argpartition(-scores, k)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((ids, -scores))
+        return [(doc_id, max(0.0, round(score * 100, 2)))
+                for doc_id, score in zip(ids[order].tolist(), scores[order].tolist())]
+
+    def vector(self, doc_id: int) -> Optional[np.ndarray]:
+        slot = self._delta_rows.get(doc_id)
+        if slot is not None and self._delta_live[slot]:
+            return self._delta_vectors[slot]
+        row = self._rows.get(doc_id)
+        if row is not None and self._live[row]:
+            return self._vectors[row]
+        return None
+
+    def score_ids(self, query: np.ndarray, doc_ids: List[int]) -> np.ndarray:
+        """Exact scores (0-100) of a query against the given documents; ids
+        that are not indexed score 0
+        """
+        scores = np.zeros(len(doc_ids))
+        positions, vectors = [], []
+        for position, doc_id in enumerate(doc_ids):
+            vector = self.vector(doc_id)
+            if vector is not None:
+                positions.append(position)
+                vectors.append(vector)
+        if vectors:
+            scores[positions] = np.stack(vectors) @ query
+        return np.round(np.maximum(scores, 0.0) * 100, 2)
+
+    def merged(self, retrain: bool = False) -> Tuple[np.ndarray, ...]:
+        """Arrays (as BUILD_ARRAYS) of a built segment holding every live
+        vector of this view; the centroids are retrained when asked or when
+        the collection wants a rather different number of lists
+        """
+        rows = np.flatnonzero(self._live)
+        slots = np.flatnonzero(self._delta_live)
+        ids = np.concatenate((self._ids[rows], self._delta_ids[slots]))
+        vectors = np.concatenate((self._vectors[rows], self._delta_vectors[slots]))
+        hashes = np.concatenate((self._hashes[rows], self._delta_hashes[slots]))
+
+        lists = target_lists(len(ids))
+        current = len(self._centroids)
+        if retrain or not current or not lists / 2 <= current <= lists * 2:
+            centroids = train_centroids(vectors, lists) if len(ids) else self._centroids[:0]
+            assignment = nearest_lists(vectors, centroids)
+        else:
+            # Built rows keep their list; only the delta is assigned
+            centroids = self._centroids
+            list_of_row = np.repeat(np.arange(current, dtype=np.int32), np.diff(self._offsets))
+            assignment = np.concatenate((list_of_row[rows], nearest_lists(vectors[len(rows):], centroids)))
+
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=len(centroids))
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return np.ascontiguousarray(centroids), offsets, ids[order], vectors[order], hashes[order]
+
+
+class IVFIndex:
+    """Inverted-file (IVF) approximate nearest-neighbour index over unit
+    vectors, scored by cosine similarity.
+
+    Built vectors are partitioned into about sqrt(n) lists by spherical
+    k-means, so a query scans ``nprobe`` lists instead of every vector.
+    Adding, replacing or removing a vector costs O(dim): it is appended to
+    the delta segment and its old row masked. Once the delta outgrows
+    COMPACT_RATIO of the built vectors, ``compact_in_background`` merges it
+    in on a worker thread while reads keep using the current segments; the
+    centroids are only retrained when the collection has grown or shrunk
+    enough to want a different number of lists.
+
+    Each vector carries a content hash of the text it embeds. ``save``
+    writes the built segment as .npy files and ``load`` memory-maps them,
+    so a restart only re-embeds documents whose hash changed. A content
+    hash says nothing about how the text was embedded, so ``signature``
+    returns metadata identifying the embedding function (its version and
+    dictionaries); it is saved with the vectors and an index saved under a
+    different signature is not loaded.
+    """
+
+    def __init__(self, dim: int, nprobe: int = 16, signature: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.signature = signature or dict
+        self._set_built(np.empty((0, dim), dtype=np.float32), np.zeros(1, dtype=np.int64),
+                        np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32),
+                        np.empty((0, CONTENT_HASH_BYTES), dtype=np.uint8))
+        self.dirty = False
+
+    def _set_built(self, centroids, offsets, ids, vectors, hashes) -> None:
+        self._centroids = centroids
+        self._offsets = offsets
+        self._ids = ids
+        self._vectors = vectors
+        self._hashes = hashes
+        self._rows: Dict[int, int] = dict(zip(ids.tolist(), range(len(ids))))
+        self._live = np.ones(len(ids), dtype=bool)
+        self._dead_rows = 0
+        self._delta_ids = np.empty(0, dtype=np.int64)
+        self._delta_vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._delta_hashes = np.empty((0, CONTENT_HASH_BYTES), dtype=np.uint8)
+        self._delta_live = np.zeros(0, dtype=bool)
+        self._delta_rows: Dict[int, int] = {}
+        self._delta_count = 0
+        self._delta_dead = 0
+        self._masks_shared = False
+        self._snapshot = None
+        # Ids written while a background compaction runs, replayed onto its
+        # result; the build number tells a stale result apart
+        self._written_since: Optional[List[int]] = None
+        self._build = getattr(self, "_build", 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._ids) - self._dead_rows + self._delta_count - self._delta_dead
+
+    def content_hash(self, doc_id: int) -> Optional[bytes]:
+        """Content hash stored with the document's vector, if it has one"""
+        slot = self._delta_rows.get(doc_id)
+        if slot is not None and self._delta_live[slot]:
+            return self._delta_hashes[slot].tobytes()
+        row = self._rows.get(doc_id)
+        if row is not None and self._live[row]:
+            return self._hashes[row].tobytes()
+        return None
+
+    def vector(self, doc_id: int) -> Optional[np.ndarray]:
+        slot = self._delta_rows.get(doc_id)
+        if slot is not None and self._delta_live[slot]:
+            return self._delta_vectors[slot]
+        row = self._rows.get(doc_id)
+        if row is not None and self._live[row]:
+            return self._vectors[row]
+        return None
+
+    def ids(self) -> List[int]:
+        live_rows = self._ids[self._live].tolist()
+        return live_rows + self._delta_ids[:self._delta_count][self._delta_live[:self._delta_count]].tolist()
+
+    def _unshare_masks(self) -> None:
+        """Copy the live masks if a snapshot (possibly still in use after
+        later writes) holds them, before they are changed
+        """
+        if self._masks_shared:
+            self._live = self._live.copy()
+            self._delta_live = self._delta_live.copy()
+            self._masks_shared = False
+
+    def _retire(self, doc_id: int) -> None:
+        """Mask the document's current vector, wherever it lives"""
+        slot = self._delta_rows.pop(doc_id, None)
+        if slot is not None and self._delta_live[slot]:
+            self._unshare_masks()
+            self._delta_live[slot] = False
+            self._delta_dead += 1
+        row = self._rows.get(doc_id)
+        if row is not None and self._live[row]:
+            self._unshare_masks()
+            self._live[row] = False
+            self._dead_rows += 1
+
+    def _grow_delta(self) -> None:
+        capacity = max(64, 2 * len(self._delta_ids))
+        count = self._delta_count
+        ids = np.empty(capacity, dtype=np.int64)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        hashes = np.empty((capacity, CONTENT_HASH_BYTES), dtype=np.uint8)
+        live = np.zeros(capacity, dtype=bool)
+        ids[:count] = self._delta_ids[:count]
+        vectors[:count] = self._delta_vectors[:count]
+        hashes[:count] = self._delta_hashes[:count]
+        live[:count] = self._delta_live[:count]
+        self._delta_ids, self._delta_vectors, self._delta_hashes, self._delta_live = ids, vectors, hashes, live
+
+    def add(self, doc_id: int, vector: np.ndarray, content_hash: bytes = bytes(CONTENT_HASH_BYTES)) -> None:
+        """Index a new vector or replace a document's vector"""
+        self._written(doc_id)
+        self._retire(doc_id)
+        if self._delta_count == len(self._delta_ids):
+            self._grow_delta()
+        slot = self._delta_count
+        # Snapshots only see slots below their own count, so appending is safe
+        self._delta_ids[slot] = doc_id
+        self._delta_vectors[slot] = vector
+        self._delta_hashes[slot] = np.frombuffer(content_hash, dtype=np.uint8)
+        self._delta_live[slot] = True
+        self._delta_rows[doc_id] = slot
+        self._delta_count += 1
+        self._snapshot = None
+        self.dirty = True
+
+    def remove(self, doc_id: int) -> None:
+        if doc_id in self._delta_rows or doc_id in self._rows:
+            self._written(doc_id)
+            self._retire(doc_id)
+            self._snapshot = None
+            self.dirty = True
+
+    def retain(self, doc_ids: Iterable[int]) -> None:
+        """Remove every document not in ``doc_ids``"""
+        keep = set(doc_ids)
+        for doc_id in self.ids():
+            if doc_id not in keep:
+                self.remove(doc_id)
+
+    def clear(self) -> None:
+        self.__init__(self.dim, self.nprobe, self.signature)
+
+    def needs_compaction(self) -> bool:
+        pending = self._delta_count + self._dead_rows
+        return pending > max(COMPACT_MIN_DOCS, COMPACT_RATIO * len(self._ids)) or (
+            pending and not len(self._ids))
+
+    def _written(self, doc_id: int) -> None:
+        if self._written_since is not None:
+            self._written_since.append(doc_id)
+
+    def compact(self, retrain: bool = False) -> None:
+        """Merge the delta segment into a new built segment"""
+        self._set_built(*self.snapshot().merged(retrain))
+
+    async def compact_in_background(self, retrain: bool = False) -> bool:
+        """Merge the delta segment into a new built segment on a worker
+        thread, then swap it in; returns whether it was swapped in.
+
+        The merge reads a snapshot, so writes go on meanwhile; they are
+        logged and replayed onto the new segment. A result overtaken by
+        another compaction (or ``clear``) is dropped.
+        """
+        if self._written_since is not None:
+            return False
+        build = self._build
+        self._written_since = []
+        try:
+            arrays = await asyncio.to_thread(self.snapshot().merged, retrain)
+        except BaseException:
+            if self._build == build:
+                self._written_since = None
+            raise
+        if self._build != build:
+            return False
+        written = [(doc_id, self.vector(doc_id), self.content_hash(doc_id))
+                   for doc_id in dict.fromkeys(self._written_since)]
+        self._set_built(*arrays)
+        for doc_id, vector, content_hash in written:
+            if vector is None:
+                self._retire(doc_id)
+            else:
+                self.add(doc_id, vector, content_hash)
+        self.dirty = True
+        return True
+
+    def snapshot(self) -> IVFSnapshot:
+        """Current read view, shared by reads until the next write"""
+        if self._snapshot is None:
+            count = self._delta_count
+            self._snapshot = IVFSnapshot(
+                self._centroids, self._offsets, self._ids, self._vectors, self._hashes, self._rows,
+                self._live, self._delta_ids[:count], self._delta_vectors[:count], self._delta_hashes[:count],
+                dict(self._delta_rows), self._delta_live[:count], self.nprobe,
+            )
+            self._masks_shared = True
+        return self._snapshot
+
+    def search(self, query: np.ndarray, k: int, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        return self.snapshot().search(query, k, nprobe)
+
+    def score_ids(self, query: np.ndarray, doc_ids: List[int]) -> np.ndarray:
+        return self.snapshot().score_ids(query, doc_ids)
+
+    def save(self, directory: str) -> None:
+        """Write the built segment under ``directory`` (see save_arrays).
+
+        Only reads arrays that are never changed in place, so it may run on
+        a worker thread; vectors still in the delta are not saved (compact
+        first), and are embedded again after a restart.
+        """
+        arrays = (self._centroids, self._offsets, self._ids, self._vectors, self._hashes)
+        # Cleared first, so writes made while saving keep it set
+        self.dirty = False
+        try:
+            save_arrays(directory, dict(zip(BUILD_ARRAYS, arrays)), {**self.signature(), "dim": self.dim})
+        except BaseException:
+            self.dirty = True
+            raise
+
+    @classmethod
+    def load(cls, directory: str, dim: int, nprobe: int = 16,
+             signature: Optional[Callable[[], Dict[str, Any]]] = None) -> Optional["IVFIndex"]:
+        """Memory-map the index last saved under ``directory``, or None if
+        there is none or it does not match ``dim`` and ``signature``
+        """
+        loaded = load_arrays(directory, BUILD_ARRAYS)
+        if loaded is None:
+            return None
+        arrays, meta = loaded
+        centroids, offsets, ids, vectors, hashes = (arrays[name] for name in BUILD_ARRAYS)
+        if (meta.get("dim") != dim or len(ids) != len(vectors) or offsets[-1] != len(ids)
+                or hashes.shape != (len(ids), CONTENT_HASH_BYTES)):
+            logger.warning("Ignoring the ANN index in %s: it does not match this build", directory)
+            return None
+        index = cls(dim, nprobe, signature)
+        if any(meta.get(key) != value for key, value in index.signature().items()):
+            logger.info("Ignoring the ANN index in %s: it was embedded with other dictionaries", directory)
+            return None
+        # Centroids and offsets are small and read on every query; keep them in memory
+        index._set_built(np.array(centroids), np.array(offsets), ids, vectors, hashes)
+        return index
@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+# Builds other than the current one and the one a save replaces are only
+# deleted once this old (seconds): another process may still be writing them
+ORPHAN_BUILD_SECONDS = 3600
+
+
+def _current_build(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as handle:
+            return handle.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_arrays(directory: str, arrays: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> str:
+    """Write named arrays (one .npy file each) plus JSON metadata as a new
+    build under ``directory`` and return the build's name.
+
+    Every save goes to a fresh build directory; the CURRENT file is then
+    switched to it atomically, so readers never see a half-written set of
+    arrays. Several processes may save concurrently: a save deletes only
+    the build it replaced, plus builds abandoned for ORPHAN_BUILD_SECONDS
+    (e.g. by a crashed writer or the loser of a race).
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = _current_build(directory)
+    build = f"build-{uuid.uuid4().hex}"
+    path = os.path.join(directory, build)
+    os.makedirs(path)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    with open(os.path.join(path, META_FILE), "w") as handle:
+        json.dump(meta or {}, handle)
+    pointer = os.path.join(directory, f"{CURRENT_FILE}.{build}")
+    with open(pointer, "w") as handle:
+        handle.write(build)
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+    if previous is not None and previous != build:
+        shutil.rmtree(os.path.join(directory, previous), ignore_errors=True)
+    cutoff = time.time() - ORPHAN_BUILD_SECONDS
+    for entry in os.listdir(directory):
+        if not entry.startswith(("build-", f"{CURRENT_FILE}.build-")) or entry == build:
+            continue
+        entry_path = os.path.join(directory, entry)
+        try:
+            abandoned = os.path.getmtime(entry_path) < cutoff
+        except OSError:
+            continue
+        if abandoned and entry != _current_build(directory):
+            if os.path.isdir(entry_path):
+                shutil.rmtree(entry_path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+    return build
+
+
+def load_arrays(directory: str, names: Sequence[str]) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, Any]]]:
+    """Memory-map the arrays of the current build under ``directory``, with
+    its metadata; None if nothing was saved there or it cannot be read
+    """
+    # A concurrent save may replace and delete the build between reading
+    # CURRENT and opening its files; the new build is tried once
+    for attempt in range(2):
+        build = _current_build(directory)
+        if build is None:
+            return None
+        path = os.path.join(directory, build)
+        try:
+            arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}
+            with open(os.path.join(path, META_FILE)) as handle:
+                meta = json.load(handle)
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not load arrays from %s: %s", directory, exc)
+            return None
+        return arrays, meta
+    logger.warning("Could not load arrays from %s: its build kept disappearing", directory)
+    return None
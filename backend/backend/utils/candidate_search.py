@@ -0,0 +1,389 @@
+import heapq
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+from ..core.metrics import timed_stage
+from .ai_helpers import extract_skills_from_text
+from .ann_index import IVFIndex
+from .embeddings import EMBEDDING_DIM, content_hash, embed, embedding_signature
+from .feature_store import FeatureStore, extract_features
+from .skill_bitset import SkillBitsetIndex
+from .skill_index import SkillIndex
+from .text_similarity import TextSimilarityIndex
+
+# Weights of the combined candidate score
+SKILL_WEIGHT = 0.7
+TEXT_WEIGHT = 0.3
+MAX_TEXT_SCORE = 100.0
+# Candidates fetched from the ANN index per requested result
+ANN_CANDIDATES_PER_RESULT = 4
+# Candidates sharing no skill with the job scored at a time, when walking
+# them by TF-IDF score
+ZERO_OVERLAP_BATCH = 256
+# Changes kept in the catalog's journal; readers further behind start over
+JOURNAL_LIMIT = 100_000
+
+
+def skill_match_score(matched: int, job_skill_count: int) -> float:
+    """Same value as calculate_skill_match, from a precomputed overlap count"""
+    if not job_skill_count:
+        return 0.0
+    return round(matched / job_skill_count * 100, 2)
+
+
+def combined_score(skill_score: float, text_score: float) -> float:
+    return round((skill_score * SKILL_WEIGHT) + (text_score * TEXT_WEIGHT), 2)
+
+
+def blended_text_score(tfidf_score: float, semantic_score: float, semantic_weight: float) -> float:
+    """Text component of the combined score: TF-IDF and embedding similarity
+    mixed by ``semantic_weight``; stays within 0-MAX_TEXT_SCORE
+    """
+    return round(tfidf_score * (1 - semantic_weight) + semantic_score * semantic_weight, 2)
+
+
+def ranking_entry(candidate_id: int, record: Dict[str, Any], skills: Set[str], skill_score: float,
+                  tfidf_score: float, semantic_score: float, semantic_weight: float) -> tuple:
+    """Heap entry of one scored candidate (see RankingState)"""
+    text_score = blended_text_score(tfidf_score, semantic_score, semantic_weight)
+    return (combined_score(skill_score, text_score), -candidate_id, candidate_id,
+            skill_score, tfidf_score, record, skills, semantic_score)
+
+
+class RankingState:
+    """Progress of one ranking: the job skills, the running top-k heap of
+    (match_score, -id, id, skill_score, text_score, record, skills,
+    semantic_score) entries
+    and how many candidates had their text similarity computed, against
+    catalog ``version``
+    """
+
+    def __init__(self, job_skills: List[str], total_candidates: int, version: int = 0):
+        self.job_skills = job_skills
+        self.version = version
+        self.job_skill_set = set(job_skills)
+        self.total_candidates = total_candidates
+        self.heap: List[tuple] = []
+        self.scored = 0
+        self.final = False
+
+    def winners(self) -> List[tuple]:
+        """Current top entries, best first (ties broken by ascending id)"""
+        return sorted(self.heap, key=lambda entry: entry[:2], reverse=True)
+
+
+class CatalogView:
+    """The records and skill sets of a CandidateCatalog as of when the view
+    was opened.
+
+    Nothing is copied up front: while the view is open the catalog hands it
+    the previous record and skill set of each candidate before changing it
+    for the first time, and lookups prefer those over the live maps. An open
+    view costs O(1) per write to the catalog.
+    """
+
+    def __init__(self, catalog: "CandidateCatalog"):
+        self._catalog = catalog
+        self._before: Dict[int, Optional[tuple]] = {}
+
+    def preserve(self, candidate_id: int) -> None:
+        """Keep a candidate's current state before the catalog changes it"""
+        if candidate_id not in self._before:
+            record = self._catalog.records.get(candidate_id)
+            self._before[candidate_id] = None if record is None else (
+                record, self._catalog.skill_index.skills_for(candidate_id))
+
+    def _state(self, candidate_id: int) -> Optional[tuple]:
+        if candidate_id in self._before:
+            return self._before[candidate_id]
+        record = self._catalog.records.get(candidate_id)
+        return None if record is None else (record, self._catalog.skill_index.skills_for(candidate_id))
+
+    def get(self, candidate_id: int) -> Optional[Dict[str, Any]]:
+        state = self._state(candidate_id)
+        return None if state is None else state[0]
+
+    def skills_for(self, candidate_id: int) -> Set[str]:
+        state = self._state(candidate_id)
+        return set() if state is None else state[1]
+
+
+class CandidateCatalog:
+    """Candidate records plus the skill index, TF-IDF vectors and resume
+    embeddings (in an ANN index) derived from their resumes, kept in step on
+    every add/remove. Each change costs O(size of the candidate) and bumps
+    ``version``. The parsed resume features are kept in a FeatureStore, so
+    re-adding a candidate whose resume is unchanged skips parsing it. The
+    ids behind the last JOURNAL_LIMIT version bumps are journaled, so
+    derived rankings can catch up by rescoring only those candidates.
+    """
+
+    def __init__(self, semantic_weight: float = 0.5, nprobe: int = 16):
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.skill_index = SkillIndex()
+        self.skill_bits = SkillBitsetIndex()
+        self.text_index = TextSimilarityIndex()
+        self.semantic_index = IVFIndex(EMBEDDING_DIM, nprobe, embedding_signature)
+        self.feature_store = FeatureStore()
+        self.semantic_weight = semantic_weight
+        self.version = 0
+        self._journal: List[int] = []
+        self._journal_start = 0
+        self._views: Set[CatalogView] = set()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, candidate: Dict[str, Any]) -> None:
+        """Index a new candidate or re-index a changed one"""
+        for view in self._views:
+            view.preserve(candidate['id'])
+        self.records[candidate['id']] = candidate
+        # Unchanged resumes (e.g. from a loaded store and ANN index) keep
+        # their parsed features and embedding
+        digest = content_hash(candidate['resume'])
+        features = self.feature_store.get(candidate['id'], digest)
+        if features is None:
+            features = extract_features(candidate['resume'], digest)
+            self.feature_store.put(candidate['id'], features)
+        skills = self.skill_index.add_skills(candidate['id'], features.skills)
+        self.skill_bits.add(candidate['id'], skills)
+        self.text_index.add_features(candidate['id'], features.tokens)
+        if self.semantic_index.content_hash(candidate['id']) != digest:
+            self.semantic_index.add(candidate['id'], embed(candidate['resume'], skills), digest)
+        self._changed(candidate['id'])
+
+    def remove(self, candidate_id: int) -> None:
+        if candidate_id not in self.records:
+            return
+        for view in self._views:
+            view.preserve(candidate_id)
+        del self.records[candidate_id]
+        self.skill_index.remove(candidate_id)
+        self.skill_bits.remove(candidate_id)
+        self.text_index.remove(candidate_id)
+        self.semantic_index.remove(candidate_id)
+        self.feature_store.remove(candidate_id)
+        self._changed(candidate_id)
+
+    def _changed(self, candidate_id: int) -> None:
+        self.version += 1
+        self._journal.append(candidate_id)
+        if len(self._journal) > JOURNAL_LIMIT:
+            dropped = len(self._journal) // 2
+            del self._journal[:dropped]
+            self._journal_start += dropped
+
+    def changes_since(self, version: int) -> Optional[List[int]]:
+        """Ids of the candidates added, changed or removed after ``version``,
+        oldest first (with repeats); None if the journal no longer reaches
+        back that far or the catalog was cleared since
+        """
+        if version < self._journal_start:
+            return None
+        return self._journal[version - self._journal_start:]
+
+    def clear(self, semantic_index: Optional[IVFIndex] = None,
+              feature_store: Optional[FeatureStore] = None) -> None:
+        """Drop every candidate; ``semantic_index`` and ``feature_store``
+        (e.g. loaded from disk) replace the ANN index and feature store, whose
+        entries are then reused for candidates re-added with an unchanged
+        resume
+        """
+        for view in self._views:
+            for candidate_id in self.records:
+                view.preserve(candidate_id)
+        self.records.clear()
+        self.skill_index.clear()
+        self.skill_bits.clear()
+        self.text_index.clear()
+        self.semantic_index = semantic_index or IVFIndex(EMBEDDING_DIM, self.semantic_index.nprobe,
+                                                                embedding_signature)
+        self.feature_store = feature_store or FeatureStore()
+        self.version += 1
+        self._journal = []
+        self._journal_start = self.version
+
+    def retain_derived(self) -> None:
+        """Drop ANN and feature-store entries of candidates no longer in the
+        catalog (after re-adding every candidate over loaded ones)
+        """
+        self.semantic_index.retain(self.records)
+        self.feature_store.retain(self.records)
+
+    def rank(self, job_description: str, limit: Optional[int] = 10,
+             consistent: bool = False) -> Iterator[RankingState]:
+        """Compute the top ``limit`` candidates for a job description,
+        yielding the running state after each group of candidates.
+
+        Candidates are visited in groups of equal skill overlap, best first;
+        the overlaps come from one AND + popcount over the skill bitsets.
+        A group's score ceiling is its skill score plus a perfect text score,
+        so once the ceiling falls below the current k-th best score no later
+        group can enter the top k and the text similarity of the remaining
+        candidates is never computed. A bounded min-heap holds the running
+        top k. The last state yielded has ``final`` set.
+
+        Between yields the catalog may change. With ``consistent`` set the
+        ranking reads the catalog through a CatalogView opened at its start
+        (plus the text and ANN index snapshots), so every result belongs
+        to ``state.version``; callers that drain the generator without
+        awaiting in between do not need it.
+
+        The text component blends TF-IDF with the cosine similarity of
+        resume and job embeddings. Besides the skill-overlap groups, the
+        ANN index's nearest resumes are considered with an overlap of 0, so
+        a semantically close resume can still place without sharing a
+        dictionary skill.
+        """
+        with timed_stage("skill_extraction"):
+            job_skills = extract_skills_from_text(job_description)
+        view = CatalogView(self) if consistent else None
+        if view is not None:
+            self._views.add(view)
+        try:
+            yield from self._rank(job_description, job_skills, limit, view)
+        finally:
+            self._views.discard(view)
+
+    def _rank(self, job_description: str, job_skills: List[str], limit: Optional[int],
+              view: Optional[CatalogView]) -> Iterator[RankingState]:
+        records = view if view is not None else self.records
+        skills_for = view.skills_for if view is not None else self.skill_index.skills_for
+        text_index = self.text_index.snapshot()
+        semantic_index = self.semantic_index.snapshot()
+        state = RankingState(job_skills, len(self.records), self.version)
+        k = len(self.records) if limit is None else max(0, limit)
+
+        # Only candidates sharing at least one skill can score on skills; the
+        # rest can only place on text similarity, and the ANN index's nearest
+        # resumes stand in for them (or everyone, when all are wanted).
+        if state.job_skill_set:
+            ids, counts = self.skill_bits.match_counts(state.job_skill_set)
+        else:
+            ids, counts = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        if k:
+            with timed_stage("similarity"):
+                query = text_index.query_vector(job_description)
+                embedding = embed(job_description, job_skills)
+            if limit is None:
+                neighbours = list(self.records)
+            else:
+                with timed_stage("semantic_search"):
+                    neighbours = [doc_id for doc_id, _ in semantic_index.search(
+                        embedding, k * ANN_CANDIDATES_PER_RESULT)]
+            others = np.setdiff1d(np.fromiter(neighbours, dtype=np.int64, count=len(neighbours)), ids)
+            ids = np.concatenate((ids, others))
+            counts = np.concatenate((counts, np.zeros(len(others), dtype=np.int64)))
+
+        heap = state.heap
+
+        def push(group: List[int], skill_score: float, tfidf_scores: Optional[List[float]] = None) -> None:
+            with timed_stage("similarity"):
+                if tfidf_scores is None:
+                    tfidf_scores = text_index.score_ids(query, group).tolist()
+                semantic_scores = semantic_index.score_ids(embedding, group).tolist()
+            state.scored += len(group)
+            for candidate_id, tfidf_score, semantic_score in zip(group, tfidf_scores, semantic_scores):
+                # Capture the record and skill set now, so later writes cannot
+                # change an entry once it is in the heap
+                record = records.get(candidate_id)
+                if record is None:
+                    continue
+                entry = ranking_entry(candidate_id, record, skills_for(candidate_id) or set(), skill_score,
+                                      tfidf_score, semantic_score, self.semantic_weight)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+
+        order = np.argsort(-counts, kind="stable")
+        ids, counts = ids[order], counts[order]
+        boundaries = np.flatnonzero(np.diff(counts)) + 1
+        groups = zip(np.split(ids, boundaries), counts[np.concatenate(([0], boundaries))]) if k and len(ids) else ()
+        for group, matched in groups:
+            skill_score = skill_match_score(int(matched), len(state.job_skill_set))
+            ceiling = combined_score(skill_score, MAX_TEXT_SCORE)
+            if len(heap) >= k and ceiling < heap[0][0]:
+                break
+            push(group.tolist(), skill_score)
+            yield state
+
+        # The ANN's neighbours are only a sample of the candidates sharing no
+        # skill. If those can still place (always when the job has no
+        # dictionary skills, or the heap is short), the rest are walked by
+        # descending TF-IDF score, whose ceiling with a perfect semantic score
+        # ends the walk; candidates without any text match come last, so the
+        # heap still fills up.
+        if k and limit is not None and (len(heap) < k or combined_score(0.0, MAX_TEXT_SCORE) >= heap[0][0]):
+            with timed_stage("similarity"):
+                text_ids, tfidf_scores = text_index.ranked(query)
+            rest = ~np.isin(text_ids, ids)
+            text_ids, tfidf_scores = text_ids[rest], tfidf_scores[rest]
+            for start in range(0, len(text_ids), max(k, ZERO_OVERLAP_BATCH)):
+                ceiling = combined_score(0.0, blended_text_score(
+                    float(tfidf_scores[start]), MAX_TEXT_SCORE, self.semantic_weight))
+                if len(heap) >= k and ceiling < heap[0][0]:
+                    break
+                end = start + max(k, ZERO_OVERLAP_BATCH)
+                push(text_ids[start:end].tolist(), 0.0, tfidf_scores[start:end].tolist())
+                yield state
+
+        state.final = True
+        yield state
+
+    def score(self, job_description: str, job_skills: List[str], candidate_ids: Iterable[int]) -> List[tuple]:
+        """Ranking entries, as rank builds them, of the given candidates
+        (ids no longer in the catalog are skipped)
+        """
+        ids = [candidate_id for candidate_id in dict.fromkeys(candidate_ids) if candidate_id in self.records]
+        if not ids:
+            return []
+        job_skill_set = set(job_skills)
+        text_index = self.text_index.snapshot()
+        with timed_stage("similarity"):
+            tfidf_scores = text_index.score_ids(text_index.query_vector(job_description), ids).tolist()
+            semantic_scores = self.semantic_index.snapshot().score_ids(
+                embed(job_description, job_skills), ids).tolist()
+        entries = []
+        for candidate_id, tfidf_score, semantic_score in zip(ids, tfidf_scores, semantic_scores):
+            skills = self.skill_index.skills_for(candidate_id)
+            skill_score = skill_match_score(len(job_skill_set & skills), len(job_skill_set))
+            entries.append(ranking_entry(candidate_id, self.records[candidate_id], skills, skill_score,
+                                         tfidf_score, semantic_score, self.semantic_weight))
+        return entries
+
+    def search(self, job_description: str, limit: Optional[int] = 10) -> Dict[str, Any]:
+        """Top ``limit`` candidates for a job description, as response dicts"""
+        for state in self.rank(job_description, limit):
+            pass
+        return self.search_result(state)
+
+    def search_result(self, state: RankingState) -> Dict[str, Any]:
+        """Response dict of a finished ranking"""
+        return {
+            "index_version": state.version,
+            "job_skills": state.job_skills,
+            "total_candidates": state.total_candidates,
+            "scored_candidates": state.scored,
+            "candidates": [self.materialize(entry, state.job_skill_set) for entry in state.winners()],
+        }
+
+    @staticmethod
+    def materialize(entry: tuple, job_skill_set: Set[str]) -> Dict[str, Any]:
+        """Build the response dict for one ranked heap entry"""
+        (match_score, _, candidate_id, skill_score, text_score, candidate, candidate_skills,
+         semantic_score) = entry
+        return {
+            "id": candidate['id'],
+            "name": candidate['name'],
+            "resume": candidate['resume'],
+            "email": candidate['email'],
+            "match_score": match_score,
+            "skill_match": skill_score,
+            "text_similarity": text_score,
+            "semantic_similarity": semantic_score,
+            "matching_skills": list(job_skill_set & candidate_skills),
+            "missing_skills": list(job_skill_set - candidate_skills),
+        }
@@ -0,0 +1,68 @@
+import time
+from typing import Any, Dict, List, Set
+
+from ..core.storage import PROCESS_ID, Table
+from .pagination import MAX_PAGE_SIZE
+
+
+class ChangeFeed:
+    """Reader of a table's change log (see TableSpec.changes), reporting the
+    ids of records other processes inserted, updated or deleted.
+
+    Log ids are allocated before their transaction commits, so an entry can
+    become visible after entries with higher ids. Entries are therefore read
+    again until they are ``grace_seconds`` old: ``settled_through`` only
+    moves past ids that old (no transaction is expected to stay open
+    longer), and the ids above it already reported are remembered so each
+    entry is reported once.
+    """
+
+    def __init__(self, changes: Table, grace_seconds: float, origin: str = PROCESS_ID):
+        self.changes = changes
+        self.grace_seconds = grace_seconds
+        self.origin = origin
+        self.settled_through = 0
+        self._seen: Set[int] = set()
+        # Every entry recorded before this time has been read
+        self.read_at = 0.0
+
+    async def _read(self) -> List[Dict[str, Any]]:
+        read_at = time.time()
+        entries, after_id = [], self.settled_through
+        while page := await self.changes.page({}, after_id=after_id, limit=MAX_PAGE_SIZE):
+            entries.extend(page)
+            after_id = page[-1]['id']
+        fresh = [entry for entry in entries if entry['id'] not in self._seen]
+        self._seen.update(entry['id'] for entry in fresh)
+        settled = [entry['id'] for entry in entries if entry.get('recorded_at', 0) < read_at - self.grace_seconds]
+        if settled:
+            self.settled_through = max(settled)
+            self._seen = {change_id for change_id in self._seen if change_id > self.settled_through}
+        self.read_at = read_at
+        return fresh
+
+    async def skip(self) -> None:
+        """Mark every entry logged so far as read, before (re)loading the
+        whole table
+        """
+        await self._read()
+
+    async def changed_ids(self) -> List[int]:
+        """Ids of the records other processes changed since the last read,
+        oldest change first
+        """
+        return list(dict.fromkeys(
+            entry['record_id'] for entry in await self._read() if entry['origin'] != self.origin
+        ))
+
+    async def prune(self, retention_seconds: float) -> None:
+        """Delete entries older than ``retention_seconds`` (every worker
+        prunes; deleting an entry twice is harmless)
+        """
+        cutoff = time.time() - retention_seconds
+        while entries := await self.changes.page({}, limit=MAX_PAGE_SIZE):
+            expired = [entry for entry in entries if entry.get('recorded_at', 0) < cutoff]
+            for entry in expired:
+                await self.changes.delete(entry['id'])
+            if len(expired) < len(entries):
+                break
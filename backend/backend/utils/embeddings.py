@@ -0,0 +1,123 @@
+import hashlib
+import json
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .ai_helpers import extract_skills_from_text, sync_skill_dictionary
+
+# Bump whenever embed() changes in a way embedding_signature() does not
+# already capture, so saved vectors are recomputed
+EMBEDDING_VERSION = 1
+# Width of every embedding. Features are hashed straight into it with a
+# random sign (the "hashing trick"), which acts as a sparse random projection
+# of the bag of words, skills and concepts.
+EMBEDDING_DIM = 128
+# Size of a content_hash() digest
+CONTENT_HASH_BYTES = 16
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9+#]{2,}")
+STOPWORDS = frozenset(
+    "and the with for from into over our are was were has have had this that "
+    "years year experience strong using used use who will can all across".split()
+)
+
+# Relative weight of each feature kind; skills and the concepts they imply
+# carry most of the semantic signal, words add context
+WORD_WEIGHT = 1.0
+SKILL_WEIGHT = 2.0
+CONCEPT_WEIGHT = 2.5
+
+# Broader concepts each dictionary skill belongs to
+SKILL_CONCEPTS: Dict[str, Tuple[str, ...]] = {
+    "python": ("backend", "scripting"), "java": ("backend", "jvm"), "go": ("backend", "systems"),
+    "node": ("backend", "javascript-ecosystem"), "ruby": ("backend", "scripting"),
+    "php": ("backend", "scripting"), "rust": ("systems",), "c++": ("systems",), "c#": ("backend", "systems"),
+    "django": ("backend", "web-frameworks"), "flask": ("backend", "web-frameworks"),
+    "fastapi": ("backend", "web-frameworks", "apis"), "express": ("backend", "web-frameworks", "apis"),
+    "javascript": ("frontend", "javascript-ecosystem"), "typescript": ("frontend", "javascript-ecosystem"),
+    "react": ("frontend", "web-frameworks"), "angular": ("frontend", "web-frameworks"),
+    "vue": ("frontend", "web-frameworks"), "ux": ("frontend", "design"),
+    "mysql": ("databases", "relational-databases"), "postgresql": ("databases", "relational-databases"),
+    "sql": ("databases", "relational-databases"), "mongodb": ("databases", "nosql-databases"),
+    "redis": ("databases", "nosql-databases", "caching"), "nosql": ("databases", "nosql-databases"),
+    "aws": ("cloud", "devops"), "azure": ("cloud", "devops"), "gcp": ("cloud", "devops"),
+    "docker": ("containers", "devops"), "kubernetes": ("containers", "devops", "cloud"),
+    "terraform": ("devops", "infrastructure-as-code", "cloud"), "jenkins": ("devops", "ci-cd"),
+    "ci/cd": ("devops", "ci-cd"), "git": ("devops",),
+    "rest": ("apis",), "graphql": ("apis",), "api": ("apis",), "microservices": ("apis", "backend"),
+}
+
+# Free-text phrases that name a concept without naming a dictionary skill
+CONCEPT_TERMS: Dict[str, Tuple[str, ...]] = {
+    "relational database": ("databases", "relational-databases"), "rdbms": ("relational-databases",),
+    "database": ("databases",), "data modeling": ("databases",), "caching": ("caching",),
+    "backend": ("backend",), "back-end": ("backend",), "server-side": ("backend",),
+    "frontend": ("frontend",), "front-end": ("frontend",), "user interface": ("frontend", "design"),
+    "web design": ("frontend", "design"), "cloud": ("cloud",), "container": ("containers",),
+    "orchestration": ("containers",), "devops": ("devops",), "infrastructure": ("devops",),
+    "deployment": ("devops", "ci-cd"), "continuous integration": ("ci-cd",),
+    "site reliability": ("devops",), "web services": ("apis",), "distributed systems": ("backend", "systems"),
+    "low-level": ("systems",), "scripting": ("scripting",),
+}
+CONCEPT_PATTERN = re.compile(
+    r"(?<![a-z0-9])(" + "|".join(re.escape(term) for term in sorted(CONCEPT_TERMS, key=len, reverse=True))
+    + r")s?(?![a-z0-9])"
+)
+
+
+def embedding_signature() -> Dict[str, Any]:
+    """Identifies the embedding function: EMBEDDING_VERSION, a digest of its
+    dictionaries and weights, and the skill-dictionary version. Vectors saved
+    under another signature are stale.
+    """
+    tables = json.dumps([EMBEDDING_DIM, sorted(STOPWORDS), WORD_WEIGHT, SKILL_WEIGHT, CONCEPT_WEIGHT,
+                         SKILL_CONCEPTS, CONCEPT_TERMS], sort_keys=True)
+    return {
+        "embedding_version": f"{EMBEDDING_VERSION}:{hashlib.sha256(tables.encode()).hexdigest()[:16]}",
+        "skill_dictionary": sync_skill_dictionary(),
+    }
+
+
+def _hashed(feature: str) -> Tuple[int, float]:
+    """Embedding column and sign of a feature (crc32, stable across runs)"""
+    digest = zlib.crc32(feature.encode())
+    return digest % EMBEDDING_DIM, 1.0 if digest & 0x80000000 else -1.0
+
+
+def _add_features(vector: np.ndarray, features: Iterable[str], weight: float) -> None:
+    for feature, count in Counter(features).items():
+        column, sign = _hashed(feature)
+        vector[column] += sign * weight * (1.0 + math.log(count))
+
+
+def embed(text: str, skills: Optional[Iterable[str]] = None) -> np.ndarray:
+    """Unit-length embedding of a resume or job description.
+
+    ``skills`` are the text's extracted dictionary skills (any case) when
+    the caller already has them. Each skill also contributes its broader
+    concepts, as do concept phrases in the text, so "Postgres" and
+    "relational databases" land near each other.
+    """
+    lowered = text.lower()
+    skill_names = [skill.lower() for skill in (extract_skills_from_text(text) if skills is None else skills)]
+    concepts = [concept for skill in skill_names for concept in SKILL_CONCEPTS.get(skill, ())]
+    concepts += [concept for term in CONCEPT_PATTERN.findall(lowered) for concept in CONCEPT_TERMS[term]]
+    words = [word for word in WORD_PATTERN.findall(lowered) if word not in STOPWORDS]
+
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    _add_features(vector, (f"w:{word}" for word in words), WORD_WEIGHT)
+    _add_features(vector, (f"s:{skill}" for skill in skill_names), SKILL_WEIGHT)
+    _add_features(vector, (f"c:{concept}" for concept in concepts), CONCEPT_WEIGHT)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def content_hash(text: str) -> bytes:
+    """Fingerprint of an embedded text, to spot persisted vectors that are
+    stale (128-bit, so two resumes practically never share one)
+    """
+    return hashlib.blake2b(text.encode(), digest_size=CONTENT_HASH_BYTES).digest()
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .ai_helpers import TECH_SKILLS, extract_skills_from_text, sync_skill_dictionary
+from .array_store import load_arrays, save_arrays
+from .embeddings import CONTENT_HASH_BYTES, content_hash
+from .text_similarity import N_FEATURES, hash_features
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("ids", "hashes", "skill_bits", "token_indptr", "token_indices", "token_tf")
+
+
+class CandidateFeatures(NamedTuple):
+    """Everything the search indexes derive from one resume"""
+    content_hash: bytes
+    skills: List[str]
+    tokens: Tuple[np.ndarray, np.ndarray]
+
+
+def extract_features(resume: str, digest: Optional[bytes] = None) -> CandidateFeatures:
+    """Parse a resume into its features (the expensive part of indexing it)"""
+    return CandidateFeatures(
+        content_hash(resume) if digest is None else digest,
+        extract_skills_from_text(resume),
+        hash_features(resume),
+    )
+
+
+class FeatureStore:
+    """Columnar store of per-candidate resume features, keyed by candidate id.
+
+    One row per candidate: a content hash of the resume, its skills as a
+    bitset over the skill vocabulary (``skill_bits``, uint64 words) and its
+    hashed, sublinear-TF tokens in CSR form (``token_indptr`` /
+    ``token_indices`` / ``token_tf``). ``save`` writes the columns as .npy
+    files and ``load`` memory-maps them, so a restarted worker rebuilds its
+    indexes without parsing any resume whose hash is unchanged. Features
+    put or removed since the load are held separately and merged into new
+    columns on the next save.
+    """
+
+    def __init__(self, vocabulary: Sequence[str] = TECH_SKILLS):
+        self.vocabulary = list(vocabulary)
+        self.words = max(1, -(-len(self.vocabulary) // 64))
+        self._bit_of = {skill: bit for bit, skill in enumerate(self.vocabulary)}
+        self._set_columns({
+            "ids": np.empty(0, dtype=np.int64),
+            "hashes": np.empty((0, CONTENT_HASH_BYTES), dtype=np.uint8),
+            "skill_bits": np.empty((0, self.words), dtype=np.uint64),
+            "token_indptr": np.zeros(1, dtype=np.int64),
+            "token_indices": np.empty(0, dtype=np.int32),
+            "token_tf": np.empty(0, dtype=np.float32),
+        })
+        self.dirty = False
+
+    def _set_columns(self, columns: Dict[str, np.ndarray]) -> None:
+        self.columns = columns
+        self._rows: Dict[int, int] = dict(zip(columns["ids"].tolist(), range(len(columns["ids"]))))
+        self._changed: Dict[int, CandidateFeatures] = {}
+        self._removed = set()
+
+    def __len__(self) -> int:
+        return len(self._rows) - len(self._removed) + sum(doc_id not in self._rows for doc_id in self._changed)
+
+    def encode_skills(self, skills: Iterable[str]) -> np.ndarray:
+        """Skill bitset (uint64 words) of extracted skill names"""
+        bits = np.zeros(self.words, dtype=np.uint64)
+        for skill in skills:
+            bit = self._bit_of.get(skill.lower())
+            if bit is not None:
+                bits[bit // 64] |= np.uint64(1 << (bit % 64))
+        return bits
+
+    def decode_skills(self, bits: np.ndarray) -> List[str]:
+        """Skill names of a bitset, as extract_skills_from_text returns them"""
+        unpacked = np.unpackbits(np.asarray(bits, dtype="<u8").view(np.uint8), bitorder="little")
+        return [self.vocabulary[bit].title() for bit in np.flatnonzero(unpacked[:len(self.vocabulary)])]
+
+    def _row_features(self, row: int) -> CandidateFeatures:
+        columns = self.columns
+        start, end = columns["token_indptr"][row], columns["token_indptr"][row + 1]
+        return CandidateFeatures(
+            columns["hashes"][row].tobytes(),
+            self.decode_skills(columns["skill_bits"][row]),
+            (columns["token_indices"][start:end], columns["token_tf"][start:end]),
+        )
+
+    def get(self, doc_id: int, digest: bytes) -> Optional[CandidateFeatures]:
+        """Stored features of a candidate, if they were derived from a resume
+        with content hash ``digest``
+        """
+        features = self._changed.get(doc_id)
+        if features is None:
+            row = self._rows.get(doc_id)
+            if row is None or doc_id in self._removed or self.columns["hashes"][row].tobytes() != digest:
+                return None
+            features = self._row_features(row)
+        return features if features.content_hash == digest else None
+
+    def put(self, doc_id: int, features: CandidateFeatures) -> None:
+        self._changed[doc_id] = features
+        self._removed.discard(doc_id)
+        self.dirty = True
+
+    def remove(self, doc_id: int) -> None:
+        if self._changed.pop(doc_id, None) is not None or doc_id in self._rows:
+            if doc_id in self._rows:
+                self._removed.add(doc_id)
+            self.dirty = True
+
+    def retain(self, doc_ids: Iterable[int]) -> None:
+        """Remove every candidate not in ``doc_ids``"""
+        keep = set(doc_ids)
+        for doc_id in [*self._rows, *self._changed]:
+            if doc_id not in keep:
+                self.remove(doc_id)
+
+    def _merged_columns(self, columns: Dict[str, np.ndarray], changed: Dict[int, CandidateFeatures],
+                        removed: Set[int]) -> Dict[str, np.ndarray]:
+        """Stored ``columns`` with the ``changed`` and ``removed`` rows applied,
+        as fresh columns: kept stored rows, then changed ones
+        """
+        replaced = removed | changed.keys()
+        rows = np.fromiter((row for row, doc_id in enumerate(columns["ids"].tolist()) if doc_id not in replaced),
+                           dtype=np.int64)
+        starts = columns["token_indptr"][rows]
+        lengths = columns["token_indptr"][rows + 1] - starts
+        # Position of every kept token: its row start plus its offset in the row
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+
+        changed = list(changed.items())
+        token_lengths = np.array([len(f.tokens[0]) for _, f in changed], dtype=np.int64)
+        return {
+            "ids": np.concatenate((columns["ids"][rows], np.array([doc_id for doc_id, _ in changed], dtype=np.int64))),
+            "hashes": np.concatenate((columns["hashes"][rows],
+                                      np.frombuffer(b"".join(f.content_hash for _, f in changed),
+                                                    dtype=np.uint8).reshape(-1, CONTENT_HASH_BYTES))),
+            "skill_bits": np.concatenate((columns["skill_bits"][rows],
+                                          np.array([self.encode_skills(f.skills) for _, f in changed],
+                                                   dtype=np.uint64).reshape(-1, self.words))),
+            "token_indptr": np.concatenate(([0], np.cumsum(np.concatenate((lengths, token_lengths))))),
+            "token_indices": np.concatenate((columns["token_indices"][offsets],
+                                             *(f.tokens[0] for _, f in changed))).astype(np.int32),
+            "token_tf": np.concatenate((columns["token_tf"][offsets],
+                                        *(f.tokens[1] for _, f in changed))).astype(np.float32),
+        }
+
+    def _write(self, directory: str, columns: Dict[str, np.ndarray], changed: Dict[int, CandidateFeatures],
+               removed: Set[int]) -> Dict[str, np.ndarray]:
+        merged = self._merged_columns(columns, changed, removed)
+        meta = {
+            "skill_dictionary": sync_skill_dictionary(),
+            "vocabulary": self.vocabulary,
+            "n_features": N_FEATURES,
+        }
+        save_arrays(directory, merged, meta)
+        return merged
+
+    def save(self, directory: str) -> None:
+        """Write the current rows as a new build under ``directory``"""
+        self._set_columns(self._write(directory, self.columns, self._changed, self._removed))
+        self.dirty = False
+
+    async def save_in_background(self, directory: str) -> None:
+        """``save`` with the merge and the writes on a worker thread.
+
+        Features put or removed while it runs are kept pending on top of
+        the new columns, for the next save.
+        """
+        columns, changed, removed = self.columns, dict(self._changed), set(self._removed)
+        self.dirty = False
+        try:
+            merged = await asyncio.to_thread(self._write, directory, columns, changed, removed)
+        except BaseException:
+            self.dirty = True
+            raise
+        # Changes the save did not include: features put anew, and saved
+        # ones removed meanwhile (which are rows of the new columns now)
+        pending = {doc_id: features for doc_id, features in self._changed.items()
+                   if changed.get(doc_id) is not features}
+        gone = {doc_id for doc_id in changed if doc_id not in self._changed} | (self._removed - removed)
+        self._set_columns(merged)
+        self._changed = pending
+        self._removed = {doc_id for doc_id in gone if doc_id in self._rows}
+        self.dirty = bool(self._changed or self._removed)
+
+    @classmethod
+    def load(cls, directory: str, vocabulary: Sequence[str] = TECH_SKILLS) -> Optional["FeatureStore"]:
+        """Memory-map the store last saved under ``directory``, or None if
+        there is none or it was derived with different skill dictionaries
+        or token hashing
+        """
+        loaded = load_arrays(directory, COLUMNS)
+        if loaded is None:
+            return None
+        columns, meta = loaded
+        if (meta.get("skill_dictionary") != sync_skill_dictionary() or meta.get("vocabulary") != list(vocabulary)
+                or meta.get("n_features") != N_FEATURES
+                or columns["hashes"].shape != (len(columns["ids"]), CONTENT_HASH_BYTES)):
+            logger.info("Ignoring the feature store in %s: it was built with other dictionaries", directory)
+            return None
+        store = cls(vocabulary)
+        store._set_columns(columns)
+        return store
@@ -0,0 +1,69 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .ai_helpers import extract_skills_from_text
+from .skill_bitset import SkillBitsetIndex
+
+
+def job_skills_for(job: Dict[str, Any]) -> List[str]:
+    """Skills a job asks for: known skills found in its requirements and
+    description, plus requirements outside the skill dictionary as-is
+    """
+    skills = []
+    for requirement in job.get('requirements') or []:
+        skills.extend(extract_skills_from_text(requirement) or [requirement.strip().title()])
+    skills.extend(extract_skills_from_text(job.get('description') or ""))
+    return list(dict.fromkeys(skill for skill in skills if skill))
+
+
+class JobCatalog:
+    """Active jobs plus the skill bitsets of their skills"""
+
+    def __init__(self):
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.skill_bits = SkillBitsetIndex()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, job: Dict[str, Any]) -> None:
+        """Index a job, or drop it from the index if it is no longer active"""
+        if not job.get('is_active', True):
+            self.remove(job['id'])
+            return
+        self.records[job['id']] = job
+        self.skill_bits.add(job['id'], job_skills_for(job))
+
+    def remove(self, job_id: int) -> None:
+        self.records.pop(job_id, None)
+        self.skill_bits.remove(job_id)
+
+    def clear(self) -> None:
+        self.records.clear()
+        self.skill_bits.clear()
+
+    def recommend(self, user_skills: List[str], limit: Optional[int] = 5) -> Dict[str, Any]:
+        """Rank the active jobs sharing at least one skill with the user.
+
+        Scores match calculate_job_match_score. The skill postings pick the
+        sharing jobs and only their bitsets are compared; skill names are
+        only decoded for the jobs returned.
+        """
+        comparison = self.skill_bits.compare(user_skills)
+        scores = comparison.document_scores()
+        ranked = np.lexsort((comparison.ids, -scores))[:limit]
+
+        recommendations = []
+        for position in ranked.tolist():
+            job_id = int(comparison.ids[position])
+            job = self.records[job_id]
+            recommendations.append({
+                "job_id": job_id,
+                "title": job['title'],
+                "company": job['company'],
+                "match_score": float(scores[position]),
+                "matching_skills": sorted(comparison.shared_skills(position)),
+                "missing_skills": sorted(comparison.document_only_skills(position)),
+            })
+        return {"recommendations": recommendations, "total_jobs_analyzed": len(comparison.ids)}
@@ -1,6 +1,8 @@
-from jose import JWTError, jwt
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Set, Tuple
 from fastapi import HTTPException, status
 from ..core.config import settings
 
@@ -11,20 +13,109 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt  # imported on first use to keep app startup fast
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+
+class TokenCache:
+    """Bounded LRU of already verified tokens.
+
+    Entries are keyed by the SHA-256 digest of the token (the raw token is
+    never kept) and hold the decoded claims until the token's ``exp``. A
+    per-user reverse map lets deactivation drop every cached token of a user.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, digest: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[1].get("exp", 0) <= time.time():
+            self._discard(digest)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return entry
+
+    def put(self, digest: str, user_id: int, claims: Dict[str, Any]) -> None:
+        if self.maxsize <= 0:
+            return
+        self._discard(digest)
+        self._entries[digest] = (user_id, claims)
+        self._by_user.setdefault(user_id, set()).add(digest)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def _discard(self, digest: str) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        digests = self._by_user.get(entry[0])
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[entry[0]]
+
+    def invalidate_user(self, user_id: int) -> None:
+        for digest in list(self._by_user.get(user_id, ())):
+            self._discard(digest)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
+def invalidate_user_tokens(user_id: int) -> None:
+    """Forget cached verifications for a user, e.g. when it is deactivated"""
+    token_cache.invalidate_user(user_id)
+
 def verify_token(token: str):
+    digest = TokenCache.digest(token)
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return cached[0]
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
+        subject = payload.get("sub")
+        if subject is None:
             raise credentials_exception
-        return user_id
-    except JWTError:
-        raise credentials_exception
\ No newline at end of file
+        # "sub" must be a string per RFC 7519; user ids are ints internally
+        user_id = int(subject)
+    except (JWTError, ValueError):
+        raise credentials_exception
+    token_cache.put(digest, user_id, payload)
+    return user_id
@@ -0,0 +1,46 @@
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing just past ``last_id``"""
+    payload = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Return the id to resume after; raises ValueError for malformed cursors"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode()))["after"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(after, int):
+        raise ValueError("Invalid cursor")
+    return after
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a ``fields=a,b`` projection; None means every field"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    return names or None
+
+def project(record: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Keep only the requested fields (``id`` is always kept)"""
+    if fields is None:
+        return record
+    return {key: record[key] for key in ("id", *fields) if key in record}
+
+def page_response(records: List[Dict[str, Any]], limit: int, fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Trim a ``limit + 1`` fetch to one page and work out the next cursor"""
+    has_more = len(records) > limit
+    records = records[:limit]
+    return {
+        "data": [project(record, fields) for record in records],
+        "count": len(records),
+        "next_cursor": encode_cursor(records[-1]["id"]) if has_more else None,
+    }
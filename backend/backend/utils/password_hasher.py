@@ -1,10 +1,132 @@
-from passlib.context import CryptContext
+import asyncio
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
 from ..core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_pwd_context = None
+
+def get_pwd_context():
+    """The passlib context, imported and built on first use"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+    return _pwd_context
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; carries a Retry-After hint"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class LatencyStats:
+    """Count/sum/max plus a window of recent samples for percentiles"""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean() * 1000, 2),
+            "p50_ms": round(self.percentile(0.50) * 1000, 2),
+            "p95_ms": round(self.percentile(0.95) * 1000, 2),
+            "p99_ms": round(self.percentile(0.99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class PasswordHashExecutor:
+    """Bounded thread pool for bcrypt work with admission control.
+
+    bcrypt releases the GIL, so a few threads hash in parallel without
+    blocking the event loop. At most ``max_workers + max_queue`` calls are
+    admitted at once; beyond that callers get PasswordHasherBusy instead of
+    an unbounded queue. The pending counter is only touched from the event
+    loop thread, so it needs no lock.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max(1, max_workers)
+        self.capacity = self.max_workers + max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self.rejected = 0
+        self.hash_latency = LatencyStats()
+        self.queue_wait = LatencyStats()
+
+    def _retry_after(self) -> int:
+        # Time to drain the current backlog at the observed hashing rate
+        backlog_seconds = self.hash_latency.mean() * self._pending / self.max_workers
+        return max(1, math.ceil(backlog_seconds))
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.capacity:
+            self.rejected += 1
+            raise PasswordHasherBusy(self._retry_after())
+
+        submitted = time.perf_counter()
+
+        def timed_call():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        self._pending += 1
+        try:
+            result, waited, elapsed = await asyncio.wrap_future(self._executor.submit(timed_call))
+        finally:
+            self._pending -= 1
+        self.queue_wait.observe(waited)
+        self.hash_latency.observe(elapsed)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "in_flight": self._pending,
+            "rejected": self.rejected,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "hash_latency": self.hash_latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+
+password_executor = PasswordHashExecutor(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_executor.run(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_executor.run(verify_password, plain_password, hashed_password)
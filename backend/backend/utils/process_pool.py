@@ -0,0 +1,26 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from ..core.config import settings
+from ..core.lifecycle import on_shutdown
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared CPU-bound worker pool, creating it on first use.
+
+    Returns None when ANALYSIS_POOL_WORKERS is 0, which callers pass straight
+    to ``loop.run_in_executor`` to use the default thread pool instead.
+    """
+    global _process_pool
+    if settings.ANALYSIS_POOL_WORKERS <= 0:
+        return None
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.ANALYSIS_POOL_WORKERS)
+    return _process_pool
+
+@on_shutdown
+async def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,174 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from .ai_helpers import extract_skills_from_text
+from .candidate_search import MAX_TEXT_SCORE, TEXT_WEIGHT, CandidateCatalog
+
+
+def reweigh_margin(catalog: CandidateCatalog) -> float:
+    """Most a match score can move when only the IDF weights change: the
+    whole TF-IDF share of its text component
+    """
+    return TEXT_WEIGHT * (1 - catalog.semantic_weight) * MAX_TEXT_SCORE
+
+
+class SavedRanking:
+    """Materialized ranking of one saved job description, kept up to date
+    by rescoring only the candidates that changed.
+
+    It holds the best ``limit + headroom`` ranking entries (as
+    CandidateCatalog.rank builds them) and ``floor``, a key (match_score,
+    -id) that no candidate outside them exceeds. Catching up with the
+    catalog reads the ids changed since ``version`` from its journal, drops
+    their entries, rescores the ones still present and keeps those above
+    the floor; entries pushed out past the capacity raise the floor. The
+    top ``limit`` are exact while that many entries are held above the
+    floor (``exact``).
+
+    When the text index compacts (its ``generation`` changes) the IDF
+    weights change, so the held entries are rescored under the new weights
+    and the floor is raised by the most the TF-IDF part of a score can move
+    (``reweigh_margin``), which keeps it a bound for the candidates outside.
+    If that leaves fewer than ``limit`` entries above it, the ranking stays
+    readable but inexact until a full refresh, which callers run in the
+    background. The ranking is recomputed in full on the spot only when
+    fewer than ``limit`` entries remain or the journal no longer reaches
+    back to ``version``.
+    """
+
+    def __init__(self, job_description: str, limit: int, headroom: int = 50, max_age: float = 0):
+        self.job_description = job_description
+        self.limit = limit
+        self.capacity = limit + headroom
+        self.max_age = max_age
+        self.job_skills = extract_skills_from_text(job_description)
+        self.job_skill_set = set(self.job_skills)
+        self.entries: Dict[int, tuple] = {}
+        self.floor: Optional[tuple] = None
+        self.version = -1
+        self.generation = -1
+        self.total_candidates = 0
+        self.refreshed_at = 0.0
+        self.updated_at = 0.0
+
+    def refresh(self, catalog: CandidateCatalog) -> None:
+        """Rank the whole catalog again"""
+        for state in catalog.rank(self.job_description, self.capacity + 1):
+            pass
+        winners = state.winners()
+        self.entries = {entry[2]: entry for entry in winners[:self.capacity]}
+        self.floor = winners[self.capacity][:2] if len(winners) > self.capacity else None
+        self.version = state.version
+        self.generation = catalog.text_index.generation
+        self.total_candidates = state.total_candidates
+        self.refreshed_at = self.updated_at = time.time()
+
+    def catch_up(self, catalog: CandidateCatalog) -> bool:
+        """Apply the catalog's changes since the last catch-up; returns
+        whether that took a full refresh
+        """
+        changed = catalog.changes_since(self.version)
+        if changed is None:
+            self.refresh(catalog)
+            return True
+        reweighed = catalog.text_index.generation != self.generation
+        if not changed and not reweighed:
+            return False
+        for candidate_id in changed:
+            self.entries.pop(candidate_id, None)
+        rescored, kept = changed, set()
+        if reweighed:
+            # Outside candidates may gain up to the margin under the new
+            # weights; the held ones are rescored exactly
+            kept = set(self.entries)
+            rescored = list(kept) + changed
+            self.entries = {}
+            if self.floor is not None:
+                self.floor = (round(self.floor[0] + reweigh_margin(catalog), 2), self.floor[1])
+            self.generation = catalog.text_index.generation
+        for entry in catalog.score(self.job_description, self.job_skills, rescored):
+            if entry[2] in kept or self.floor is None or entry[:2] > self.floor:
+                self.entries[entry[2]] = entry
+        if len(self.entries) > self.capacity:
+            ranked = sorted(self.entries.values(), key=lambda entry: entry[:2], reverse=True)
+            self.entries = {entry[2]: entry for entry in ranked[:self.capacity]}
+            evicted = ranked[self.capacity][:2]
+            self.floor = evicted if self.floor is None else max(self.floor, evicted)
+        self.version = catalog.version
+        self.total_candidates = len(catalog)
+        self.updated_at = time.time()
+        if self.floor is not None and len(self.entries) < self.limit:
+            self.refresh(catalog)
+            return True
+        return False
+
+    @property
+    def exact(self) -> bool:
+        """Whether the top ``limit`` are certainly the catalog's best"""
+        if self.floor is None:
+            return True
+        return sum(entry[:2] > self.floor for entry in self.entries.values()) >= self.limit
+
+    def due(self) -> bool:
+        """Whether a background refresh should recompute the ranking"""
+        return not self.exact or self.max_age > 0 and time.time() - self.refreshed_at > self.max_age
+
+    def top(self) -> List[tuple]:
+        """The best ``limit`` entries, best first"""
+        return sorted(self.entries.values(), key=lambda entry: entry[:2], reverse=True)[:self.limit]
+
+
+class SavedRankings:
+    """This worker's materialized saved searches, by saved search id.
+
+    Rankings are built on first read (each worker keeps its own, in step
+    with its own catalog) and caught up on every later read, so a read
+    costs O(limit + headroom) plus the rescoring of candidates changed
+    since the previous one. Rankings left inexact by new IDF weights or
+    older than ``max_age`` are recomputed by ``refresh_due``, off the read
+    path.
+    """
+
+    def __init__(self, catalog: CandidateCatalog, headroom: int = 50, max_age: float = 0):
+        self.catalog = catalog
+        self.headroom = headroom
+        self.max_age = max_age
+        self._rankings: Dict[int, SavedRanking] = {}
+        self.refreshes = 0
+        self.background_refreshes = 0
+        self.incremental_updates = 0
+
+    def read(self, search: Dict[str, Any]) -> SavedRanking:
+        """Up-to-date ranking of a saved search record"""
+        ranking = self._rankings.get(search['id'])
+        if ranking is None or ranking.job_description != search['job_description'] or ranking.limit != search['limit']:
+            ranking = self._rankings[search['id']] = SavedRanking(
+                search['job_description'], search['limit'], self.headroom, self.max_age)
+        version, generation = ranking.version, ranking.generation
+        if ranking.catch_up(self.catalog):
+            self.refreshes += 1
+        elif (ranking.version, ranking.generation) != (version, generation):
+            self.incremental_updates += 1
+        return ranking
+
+    def due(self) -> List[int]:
+        """Ids of the saved searches whose ranking awaits a background refresh"""
+        return [search_id for search_id, ranking in self._rankings.items() if ranking.due()]
+
+    def refresh_due(self, search_id: int) -> None:
+        """Recompute a ranking returned by ``due``, if it still needs it"""
+        ranking = self._rankings.get(search_id)
+        if ranking is not None and ranking.due():
+            ranking.refresh(self.catalog)
+            self.background_refreshes += 1
+
+    def discard(self, search_id: int) -> None:
+        self._rankings.pop(search_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "materialized": len(self._rankings),
+            "refreshes": self.refreshes,
+            "background_refreshes": self.background_refreshes,
+            "incremental_updates": self.incremental_updates,
+        }
@@ -0,0 +1,247 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .ai_helpers import TECH_SKILLS
+
+# Set bits of every byte value, for NumPy versions without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+# Comparisons popcount every row instead of collecting the sharing rows from
+# the postings once these cover more than 1/FULL_SCAN_FRACTION of the rows
+FULL_SCAN_FRACTION = 8
+
+
+def popcount_rows(words: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a 2-D uint64 array"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+def match_ratio_scores(matched: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """round(matched / total * 100, 2) per element (0 where total is 0).
+
+    Python's round() fills a table with one cell per (matched, total) pair
+    and the elements are looked up in it, so the values are identical to
+    calculate_skill_match's.
+    """
+    if not len(matched):
+        return np.empty(0)
+    table = np.array([
+        [round(count / total * 100, 2) if total else 0.0 for total in range(int(totals.max()) + 1)]
+        for count in range(int(matched.max()) + 1)
+    ])
+    return table[matched, totals]
+
+
+class SkillComparison:
+    """One query skill set compared with many documents' skill sets.
+
+    ``matched`` counts shared skills per document and ``sizes`` each
+    document's skill count; the bitmask arrays hold, per document, the
+    shared skills, the query skills it lacks and its skills the query
+    lacks. Skills outside the vocabulary (the query's ``unknown`` and the
+    documents' extras) are compared by name. Skill names are only decoded
+    for the rows asked for.
+    """
+
+    def __init__(self, index: "SkillBitsetIndex", rows: np.ndarray, matched: np.ndarray,
+                 query_size: int, query_bits: np.ndarray, unknown: List[str]):
+        self._index = index
+        self._rows = rows
+        self.ids = index._ids[rows]
+        self.matched = matched
+        self.sizes = index._sizes[rows]
+        self.query_size = query_size
+        document_bits = index._bits[rows]
+        self.shared = document_bits & query_bits
+        self.query_only = query_bits & ~document_bits
+        self.document_only = document_bits & ~query_bits
+        self._unknown = unknown
+
+    def query_scores(self) -> np.ndarray:
+        """Share of the query's skills each document has (calculate_skill_match)"""
+        return match_ratio_scores(self.matched, np.full(len(self.matched), self.query_size))
+
+    def document_scores(self) -> np.ndarray:
+        """Share of each document's skills the query has (calculate_job_match_score)"""
+        return match_ratio_scores(self.matched, self.sizes)
+
+    def _extras(self, position: int) -> Tuple[str, ...]:
+        return self._index._extras.get(int(self._rows[position]), ())
+
+    def shared_skills(self, position: int) -> List[str]:
+        extras = self._extras(position)
+        return self._index.decode(self.shared[position]) + [skill for skill in self._unknown if skill in extras]
+
+    def query_only_skills(self, position: int) -> List[str]:
+        """Query skills the document lacks, including ones outside the vocabulary"""
+        extras = self._extras(position)
+        return self._index.decode(self.query_only[position]) + [
+            skill for skill in self._unknown if skill not in extras]
+
+    def document_only_skills(self, position: int) -> List[str]:
+        return self._index.decode(self.document_only[position]) + [
+            skill for skill in self._extras(position) if skill not in self._unknown]
+
+
+class SkillBitsetIndex:
+    """Skill sets of a document collection as fixed-width bitmasks.
+
+    Every vocabulary skill (TECH_SKILLS by default) gets a bit and every
+    document a row of uint64 words, so comparing one skill set with many
+    documents is an AND plus a popcount instead of a set intersection per
+    document. A posting set of rows per bit picks the documents sharing a
+    skill, so a comparison only touches those rows (unless they are most
+    of the collection, where a full scan is cheaper). Document skills outside
+    the vocabulary (e.g. free-text job requirements) never get a bit: they
+    are kept as a short per-row list, with their own postings, and still
+    count towards the document's size. Rows of removed documents are zeroed
+    and reused.
+    """
+
+    def __init__(self, vocabulary: Sequence[str] = tuple(skill.title() for skill in TECH_SKILLS)):
+        self._vocabulary = tuple(dict.fromkeys(vocabulary))
+        self._bit_of: Dict[str, int] = {skill: bit for bit, skill in enumerate(self._vocabulary)}
+        self._names: List[str] = list(self._vocabulary)
+        words = max(1, -(-len(self._names) // 64))
+        self._bits = np.zeros((0, words), dtype=np.uint64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._sizes = np.empty(0, dtype=np.int64)
+        self._postings: Dict[int, Set[int]] = {}
+        self._extras: Dict[int, Tuple[str, ...]] = {}
+        self._extra_postings: Dict[str, Set[int]] = {}
+        self._row_of: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._used = 0
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def words(self) -> int:
+        return self._bits.shape[1]
+
+    def encode(self, skills: Iterable[str]) -> Tuple[np.ndarray, List[str]]:
+        """Bitmask of a skill set, plus its skills outside the vocabulary"""
+        positions, unknown = [], []
+        for skill in set(skills):
+            bit = self._bit_of.get(skill)
+            if bit is None:
+                unknown.append(skill)
+            else:
+                positions.append(bit)
+        mask = np.zeros(self.words, dtype=np.uint64)
+        for bit in positions:
+            mask[bit // 64] |= np.uint64(1 << (bit % 64))
+        return mask, unknown
+
+    @staticmethod
+    def _positions(mask: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(np.asarray(mask, dtype="<u8").view(np.uint8), bitorder="little"))
+
+    def decode(self, mask: np.ndarray) -> List[str]:
+        """Skill names of a bitmask, in bit order"""
+        return [self._names[bit] for bit in self._positions(mask)]
+
+    def add(self, doc_id: int, skills: Iterable[str]) -> None:
+        """Index (or re-index) a document's skill set"""
+        skills = set(skills)
+        mask, extras = self.encode(skills)
+        row = self._row_of.get(doc_id)
+        if row is None:
+            row = self._free.pop() if self._free else self._append_row()
+            self._row_of[doc_id] = row
+        else:
+            self._unpost(row)
+        self._bits[row] = mask
+        self._ids[row] = doc_id
+        self._sizes[row] = len(skills)
+        for bit in self._positions(mask).tolist():
+            self._postings.setdefault(bit, set()).add(row)
+        if extras:
+            self._extras[row] = tuple(sorted(extras))
+            for skill in extras:
+                self._extra_postings.setdefault(skill, set()).add(row)
+
+    def _unpost(self, row: int) -> None:
+        for bit in self._positions(self._bits[row]).tolist():
+            posting = self._postings[bit]
+            posting.discard(row)
+            if not posting:
+                del self._postings[bit]
+        for skill in self._extras.pop(row, ()):
+            posting = self._extra_postings[skill]
+            posting.discard(row)
+            if not posting:
+                del self._extra_postings[skill]
+
+    def _append_row(self) -> int:
+        if self._used == len(self._bits):
+            capacity = max(64, 2 * len(self._bits))
+            bits = np.zeros((capacity, self.words), dtype=np.uint64)
+            bits[:self._used] = self._bits[:self._used]
+            ids = np.full(capacity, -1, dtype=np.int64)
+            ids[:self._used] = self._ids[:self._used]
+            sizes = np.zeros(capacity, dtype=np.int64)
+            sizes[:self._used] = self._sizes[:self._used]
+            self._bits, self._ids, self._sizes = bits, ids, sizes
+        self._used += 1
+        return self._used - 1
+
+    def remove(self, doc_id: int) -> None:
+        row = self._row_of.pop(doc_id, None)
+        if row is not None:
+            self._unpost(row)
+            self._bits[row] = 0
+            self._ids[row] = -1
+            self._sizes[row] = 0
+            self._free.append(row)
+
+    def clear(self) -> None:
+        self.__init__(self._vocabulary)
+
+    def _sharing_rows(self, query: np.ndarray, unknown: List[str]) -> Optional[np.ndarray]:
+        """Sorted rows of the documents sharing at least one skill, or None
+        when the postings cover so many rows that a full scan is cheaper
+        """
+        postings = [self._postings.get(bit, ()) for bit in self._positions(query).tolist()]
+        postings += [self._extra_postings.get(skill, ()) for skill in unknown]
+        if sum(len(posting) for posting in postings) * FULL_SCAN_FRACTION > self._used:
+            return None
+        rows = set().union(*postings)
+        rows = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        rows.sort()
+        return rows
+
+    def _match(self, skills: Set[str], sharing_only: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        query, unknown = self.encode(skills)
+        rows = self._sharing_rows(query, unknown) if sharing_only else None
+        filter_shared = sharing_only and rows is None
+        if rows is None:
+            rows = np.flatnonzero(self._ids[:self._used] >= 0)
+        counts = popcount_rows(self._bits[rows] & query)
+        for skill in unknown:
+            extra_rows = self._extra_postings.get(skill)
+            if extra_rows:
+                positions = np.searchsorted(rows, np.fromiter(extra_rows, dtype=np.int64, count=len(extra_rows)))
+                counts[positions] += 1
+        if filter_shared:
+            sharing = counts > 0
+            rows, counts = rows[sharing], counts[sharing]
+        return rows, counts, query, unknown
+
+    def match_counts(self, skills: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, shared-skill counts) of the documents sharing any skill"""
+        rows, counts, _, _ = self._match(set(skills), sharing_only=True)
+        return self._ids[rows], counts
+
+    def compare(self, skills: Iterable[str], sharing_only: bool = True) -> SkillComparison:
+        """Compare a skill set with the documents sharing at least one skill
+        with it (or, without ``sharing_only``, with every document)
+        """
+        skills = set(skills)
+        rows, counts, query, unknown = self._match(skills, sharing_only)
+        return SkillComparison(self, rows, counts, len(skills), query, unknown)
@@ -0,0 +1,97 @@
+import bisect
+import itertools
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..core.storage import sorted_contains
+from .ai_helpers import extract_skills_from_text
+
+
+class SkillIndex:
+    """Inverted index from skill to the ids of the documents that mention it.
+
+    Skills are extracted once when a document is added or updated, so queries
+    only touch documents sharing at least one skill with the query. Posting
+    lists hold sorted ids, so they can be paged by bisecting.
+    """
+
+    def __init__(self):
+        self._skills: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._skills)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._skills
+
+    def add(self, doc_id: int, text: str) -> Set[str]:
+        """Index (or re-index) a document and return its extracted skills"""
+        return self.add_skills(doc_id, extract_skills_from_text(text))
+
+    def add_skills(self, doc_id: int, skills: Iterable[str]) -> Set[str]:
+        """Index a document from an already extracted skill list"""
+        self.remove(doc_id)
+        skill_set = set(skills)
+        self._skills[doc_id] = skill_set
+        for skill in skill_set:
+            ids = self._postings.setdefault(skill, [])
+            # New documents usually have the highest id, so this is an append
+            if not ids or ids[-1] < doc_id:
+                ids.append(doc_id)
+            else:
+                bisect.insort(ids, doc_id)
+        return skill_set
+
+    def remove(self, doc_id: int) -> None:
+        skill_set = self._skills.pop(doc_id, None)
+        if not skill_set:
+            return
+        for skill in skill_set:
+            posting = self._postings.get(skill)
+            if posting is None or not sorted_contains(posting, doc_id):
+                continue
+            del posting[bisect.bisect_left(posting, doc_id)]
+            if not posting:
+                del self._postings[skill]
+
+    def skills_for(self, doc_id: int) -> Set[str]:
+        return self._skills.get(doc_id, set())
+
+    def ids_with_skill(self, skill: str) -> List[int]:
+        """Sorted ids of the documents with a skill (not a copy)"""
+        return self._postings.get(skill, [])
+
+    def ids_with_skills(self, skills: Iterable[str], after_id: Optional[int] = None,
+                        limit: int = 20) -> List[int]:
+        """Up to ``limit`` ids, in order and after ``after_id``, of the
+        documents with every one of ``skills``
+        """
+        # Walk the shortest posting list, checking the others by bisection
+        postings = sorted((self.ids_with_skill(skill) for skill in set(skills)), key=len)
+        if not postings:
+            return []
+        ordered, others = postings[0], postings[1:]
+        start = 0 if after_id is None else bisect.bisect_right(ordered, after_id)
+        results = []
+        for doc_id in itertools.islice(ordered, start, None):
+            if all(sorted_contains(ids, doc_id) for ids in others):
+                results.append(doc_id)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def match_counts(self, skills: Iterable[str]) -> Dict[int, int]:
+        """Return {doc_id: number of shared skills} for documents sharing any skill"""
+        counts: Dict[int, int] = defaultdict(int)
+        for skill in set(skills):
+            for doc_id in self._postings.get(skill, ()):
+                counts[doc_id] += 1
+        return counts
+
+    def all_ids(self) -> List[int]:
+        return list(self._skills)
+
+    def clear(self) -> None:
+        self._skills.clear()
+        self._postings.clear()
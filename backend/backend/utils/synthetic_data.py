@@ -0,0 +1,154 @@
+import itertools
+import random
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .ai_helpers import TECH_SKILLS
+
+DISTRIBUTIONS = ("uniform", "zipf")
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Emma", "Farid", "Grace", "Hiro", "Ines", "Jamal",
+    "Kavya", "Liam", "Maria", "Noah", "Olga", "Priya", "Quentin", "Rosa", "Sven", "Tariq",
+    "Uma", "Victor", "Wen", "Ximena", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Johnson", "Smith", "Davis", "Wilson", "Garcia", "Chen", "Kowalski", "Nakamura", "Okafor",
+    "Patel", "Rossi", "Schmidt", "Silva", "Tanaka", "Nguyen", "Murphy", "Haddad", "Larsen",
+]
+ROLES = [
+    "Backend Engineer", "Frontend Developer", "Full-stack Developer", "DevOps Engineer",
+    "Data Engineer", "Machine Learning Engineer", "Mobile Developer", "Site Reliability Engineer",
+    "Platform Engineer", "QA Automation Engineer",
+]
+SENIORITY = ["Junior", "Mid-level", "Senior", "Staff", "Principal"]
+COMPANIES = [
+    "Tech Corp", "Web Solutions", "DataWorks", "CloudNine", "Acme Labs", "BrightPath",
+    "Quantum Apps", "Northwind", "BlueOcean Analytics", "Helix Health",
+]
+LOCATIONS = ["Remote", "Bangalore", "Berlin", "London", "New York", "San Francisco", "Singapore", "Toronto"]
+ACHIEVEMENTS = [
+    "Built and maintained microservices handling millions of requests per day.",
+    "Led a team of engineers delivering features in an agile environment.",
+    "Improved API latency and reliability through profiling and caching.",
+    "Designed CI/CD pipelines and automated deployment workflows.",
+    "Mentored junior developers and ran code reviews.",
+    "Migrated legacy systems to cloud-native infrastructure.",
+    "Collaborated with product and design on customer-facing releases.",
+    "Wrote thorough tests and documentation for shared libraries.",
+]
+
+
+class SkillDistribution:
+    """Popularity of each TECH_SKILLS entry when sampling a profile.
+
+    ``uniform`` picks every skill equally often; ``zipf`` gives the skill
+    at popularity rank r a weight of 1 / r**exponent, so a few skills are
+    very common and the rest form a long tail, as in real resumes. The
+    rank order is a seeded shuffle of the vocabulary; ``hot_skills`` are
+    moved to the front of it.
+    """
+
+    def __init__(self, kind: str = "zipf", exponent: float = 1.1, seed: int = 7,
+                 hot_skills: Sequence[str] = ()):
+        if kind not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown skill distribution: {kind}")
+        skills = list(TECH_SKILLS)
+        random.Random(seed).shuffle(skills)
+        hot = [skill.lower() for skill in hot_skills]
+        unknown = set(hot) - set(skills)
+        if unknown:
+            raise ValueError(f"Unknown skills: {', '.join(sorted(unknown))}")
+        self.skills = hot + [skill for skill in skills if skill not in hot]
+        if kind == "uniform":
+            weights = [1.0] * len(self.skills)
+        else:
+            weights = [1.0 / rank ** exponent for rank in range(1, len(self.skills) + 1)]
+        self.cum_weights = list(itertools.accumulate(weights))
+
+    def sample(self, rng: random.Random, count: int) -> List[str]:
+        """``count`` distinct skills drawn by popularity"""
+        count = min(count, len(self.skills))
+        chosen: Dict[str, None] = {}
+        while len(chosen) < count:
+            for skill in rng.choices(self.skills, cum_weights=self.cum_weights, k=count - len(chosen)):
+                chosen[skill] = None
+        return list(chosen)
+
+
+class SyntheticDataGenerator:
+    """Deterministic generator of users, candidates and job postings.
+
+    Record ``i`` only depends on the seed and ``i``, so corpora can be
+    generated in batches, resumed, or grown without changing earlier rows.
+    """
+
+    def __init__(self, seed: int = 7, distribution: Optional[SkillDistribution] = None,
+                 resume_skills: Tuple[int, int] = (3, 12), job_skills: Tuple[int, int] = (3, 8)):
+        self.seed = seed
+        self.distribution = distribution or SkillDistribution(seed=seed)
+        self.resume_skills = resume_skills
+        self.job_skills = job_skills
+
+    def _rng(self, kind: str, index: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{index}")
+
+    @staticmethod
+    def _name(rng: random.Random) -> str:
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+    def resume(self, rng: random.Random) -> str:
+        skills = self.distribution.sample(rng, rng.randint(*self.resume_skills))
+        years = rng.randint(0, 15)
+        seniority = SENIORITY[min(len(SENIORITY) - 1, years // 3)]
+        pivot = max(1, len(skills) // 2)
+        sentences = [
+            f"{seniority} {rng.choice(ROLES)} with {years} years experience.",
+            f"Expertise in {', '.join(skills[:pivot])}.",
+            *rng.sample(ACHIEVEMENTS, rng.randint(1, 3)),
+        ]
+        if skills[pivot:]:
+            sentences.append(f"Also worked with {', '.join(skills[pivot:])}.")
+        return " ".join(sentences)
+
+    def candidate(self, index: int) -> Dict[str, Any]:
+        rng = self._rng("candidate", index)
+        return {
+            "name": self._name(rng),
+            "email": f"candidate{index}@example.com",
+            "resume": self.resume(rng),
+        }
+
+    def job(self, index: int, posted_by: int = 1) -> Dict[str, Any]:
+        rng = self._rng("job", index)
+        skills = self.distribution.sample(rng, rng.randint(*self.job_skills))
+        role = rng.choice(ROLES)
+        return {
+            "title": f"{rng.choice(SENIORITY)} {role}",
+            "company": rng.choice(COMPANIES),
+            "description": f"We are hiring a {role} to build and run production systems "
+                           f"with {', '.join(skills)}. {rng.choice(ACHIEVEMENTS)}",
+            "requirements": [skill.title() for skill in skills[:max(1, len(skills) - 1)]],
+            "location": rng.choice(LOCATIONS),
+            "salary_range": f"${rng.randint(6, 20) * 10}k-${rng.randint(21, 30) * 10}k",
+            "posted_by": posted_by,
+            "is_active": rng.random() > 0.05,
+        }
+
+    def user(self, index: int, hashed_password: str) -> Dict[str, Any]:
+        """A user record sharing a precomputed password hash (no bcrypt per row)"""
+        rng = self._rng("user", index)
+        return {
+            "name": self._name(rng),
+            "email": f"user{index}@example.com",
+            "hashed_password": hashed_password,
+            "is_active": True,
+        }
+
+    def candidates(self, count: int, start: int = 1) -> Iterator[Dict[str, Any]]:
+        return (self.candidate(i) for i in range(start, start + count))
+
+    def jobs(self, count: int, start: int = 1, posted_by: int = 1) -> Iterator[Dict[str, Any]]:
+        return (self.job(i, posted_by) for i in range(start, start + count))
+
+    def users(self, count: int, hashed_password: str, start: int = 1) -> Iterator[Dict[str, Any]]:
+        return (self.user(i, hashed_password) for i in range(start, start + count))
@@ -0,0 +1,251 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first; interactive work overtakes queued bulk work
+PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class QueueFull(Exception):
+    """The owner already has the maximum number of unfinished tasks"""
+
+
+class LocalTaskStore:
+    """Task records of this process. Finished tasks are evicted once their
+    result is older than the TTL, oldest first.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        self.evict_expired()
+        return self._tasks.get(task_id)
+
+    async def save(self, task: Dict[str, Any]) -> None:
+        self._tasks[task["id"]] = task
+        if task["finished_at"] is not None:
+            self._finished[task["id"]] = task["finished_at"] + self.ttl_seconds
+
+    def evict_expired(self) -> int:
+        now = time.time()
+        evicted = 0
+        while self._finished:
+            task_id, expires_at = next(iter(self._finished.items()))
+            if expires_at > now:
+                break
+            del self._finished[task_id]
+            self._tasks.pop(task_id, None)
+            evicted += 1
+        return evicted
+
+
+class RedisTaskStore:
+    """Shared task records, so any server worker can answer a status poll.
+    Redis expires finished tasks after the TTL.
+    """
+
+    prefix = "pathai:task:"
+
+    def __init__(self, url: str, ttl_seconds: float):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(self.prefix + task_id)
+        return json.loads(raw) if raw is not None else None
+
+    async def save(self, task: Dict[str, Any]) -> None:
+        # Unfinished tasks also expire eventually, in case their worker died
+        ttl = self.ttl_seconds if task["finished_at"] is not None else max(self.ttl_seconds, 86400)
+        await self._client.set(self.prefix + task["id"], json.dumps(task), ex=int(ttl))
+
+    def evict_expired(self) -> int:
+        return 0
+
+
+class TaskQueue:
+    """In-process priority queue of background tasks.
+
+    Tasks run on ``workers`` coroutines in this process's event loop,
+    highest priority first and FIFO within a priority, skipping owners
+    who already have ``per_user_limit`` tasks running. Each owner may
+    have at most ``per_user_max_pending`` unfinished tasks. Task records
+    (status, result or error) go to ``store``, where finished ones live
+    for the result TTL.
+    """
+
+    def __init__(self, store, workers: int = 4, per_user_limit: int = 2, per_user_max_pending: int = 100):
+        self.store = store
+        self.workers = workers
+        self.per_user_limit = per_user_limit
+        self.per_user_max_pending = per_user_max_pending
+        self._handlers: Dict[str, Handler] = {}
+        # Each owner's queued (priority, sequence, task id), plus a heap of
+        # (priority, sequence, owner) holding the head of every owner with a
+        # free running slot; heap entries whose head has since changed are
+        # skipped when popped
+        self._owner_queues: Dict[Any, List[Tuple[int, int, str]]] = {}
+        self._ready: List[Tuple[int, int, Any]] = []
+        self._queued: Dict[str, Dict[str, Any]] = {}
+        self._sequence = itertools.count()
+        self._running: Dict[Any, int] = defaultdict(int)
+        self._pending: Dict[Any, int] = defaultdict(int)
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._workers: List["asyncio.Task[None]"] = []
+        self.completed = 0
+        self.failed = 0
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """Make ``kind`` tasks run ``handler(payload)``; it returns the result dict"""
+        self._handlers[kind] = handler
+
+    async def submit(self, kind: str, payload: Dict[str, Any], owner: Any, priority: str = "normal") -> Dict[str, Any]:
+        """Queue a task and return its record (status ``queued``)"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown task kind: {kind}")
+        if self._pending[owner] >= self.per_user_max_pending:
+            raise QueueFull(f"At most {self.per_user_max_pending} unfinished tasks per user")
+        task = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "owner": owner,
+            "priority": priority,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        await self.store.save(task)
+        self._queued[task["id"]] = {"task": task, "payload": payload}
+        self._pending[owner] += 1
+        queue = self._owner_queues.setdefault(owner, [])
+        heapq.heappush(queue, (PRIORITIES[priority], next(self._sequence), task["id"]))
+        if queue[0][2] == task["id"]:
+            self._mark_ready(owner)
+        await self._notify()
+        return task
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(task_id)
+
+    async def _notify(self) -> None:
+        if self._wakeup is not None:
+            async with self._wakeup:
+                self._wakeup.notify_all()
+
+    def _mark_ready(self, owner: Any) -> None:
+        """List the owner's head task as runnable, if the owner has a free slot"""
+        queue = self._owner_queues.get(owner)
+        if queue and self._running.get(owner, 0) < self.per_user_limit:
+            priority, sequence, _ = queue[0]
+            heapq.heappush(self._ready, (priority, sequence, owner))
+
+    def _pop_runnable(self) -> Optional[Dict[str, Any]]:
+        """Highest-priority queued task whose owner is under the running cap,
+        in O(log n) amortized
+        """
+        while self._ready:
+            priority, sequence, owner = heapq.heappop(self._ready)
+            queue = self._owner_queues.get(owner)
+            stale = not queue or queue[0][:2] != (priority, sequence)
+            if stale or self._running.get(owner, 0) >= self.per_user_limit:
+                continue
+            _, _, task_id = heapq.heappop(queue)
+            if not queue:
+                del self._owner_queues[owner]
+            self._running[owner] += 1
+            self._mark_ready(owner)
+            return self._queued.pop(task_id)
+        return None
+
+    async def _next(self) -> Dict[str, Any]:
+        async with self._wakeup:
+            while True:
+                entry = self._pop_runnable()
+                if entry is not None:
+                    return entry
+                await self._wakeup.wait()
+
+    async def _run(self, entry: Dict[str, Any]) -> None:
+        task = entry["task"]
+        owner = task["owner"]
+        try:
+            task.update(status="running", started_at=time.time())
+            await self.store.save(task)
+            task["result"] = await self._handlers[task["kind"]](entry["payload"])
+            task["status"] = "succeeded"
+            self.completed += 1
+        except Exception as exc:
+            logger.exception("Task %s (%s) failed", task["id"], task["kind"])
+            task.update(status="failed", error=str(exc))
+            self.failed += 1
+        finally:
+            task["finished_at"] = time.time()
+            self._running[owner] -= 1
+            self._pending[owner] -= 1
+            for counts in (self._running, self._pending):
+                if counts[owner] <= 0:
+                    del counts[owner]
+            if self._running.get(owner, 0) == self.per_user_limit - 1:
+                # The owner was at the cap, so its head task was not listed
+                self._mark_ready(owner)
+        await self.store.save(task)
+
+    async def _work(self) -> None:
+        while True:
+            entry = await self._next()
+            try:
+                await self._run(entry)
+            except Exception:
+                logger.exception("Could not store the outcome of task %s", entry["task"]["id"])
+            finally:
+                # A freed per-user slot may unblock a skipped task
+                await self._notify()
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Condition()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queued),
+            "running": sum(self._running.values()),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+def create_task_queue() -> TaskQueue:
+    if settings.TASK_STORE_URL:
+        store = RedisTaskStore(settings.TASK_STORE_URL, settings.TASK_RESULT_TTL_SECONDS)
+    else:
+        store = LocalTaskStore(settings.TASK_RESULT_TTL_SECONDS)
+    return TaskQueue(store, settings.TASK_WORKERS, settings.TASK_USER_CONCURRENCY, settings.TASK_USER_MAX_PENDING)
+
+
+task_queue = create_task_queue()
@@ -0,0 +1,350 @@
+import asyncio
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Hashed feature space shared by every vector; 2**18 keeps collisions rare
+# for resume-sized vocabularies
+N_FEATURES = 2 ** 18
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word unigrams plus adjacent-word bigrams"""
+    words = TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hash_features(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (feature indices, sublinear term frequencies) for a text.
+
+    crc32 is used instead of ``hash()`` so feature ids are stable across
+    processes and restarts.
+    """
+    counts = Counter(zlib.crc32(token.encode()) & (N_FEATURES - 1) for token in tokenize(text))
+    if not counts:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return indices, 1.0 + np.log(tf)
+
+
+# Sparse vector: sorted feature indices and their weights
+SparseVector = Tuple[np.ndarray, np.ndarray]
+
+
+def lookup(query: SparseVector, indices: np.ndarray) -> np.ndarray:
+    """Weights of a sparse query vector at the given feature indices (0
+    where it has none)
+    """
+    query_indices, query_weights = query
+    if not len(query_indices):
+        return np.zeros(len(indices), dtype=np.float32)
+    positions = np.minimum(np.searchsorted(query_indices, indices), len(query_indices) - 1)
+    return np.where(query_indices[positions] == indices, query_weights[positions], np.float32(0))
+
+
+# A delta segment holding more than this fraction of the base segment's
+# documents (and at least COMPACT_MIN_DOCS) is due to be merged into it
+COMPACT_RATIO = 0.1
+COMPACT_MIN_DOCS = 256
+
+
+class QueryScores:
+    """Similarity scores (0-100) of one query against every indexed document"""
+
+    def __init__(self, scores: np.ndarray, rows: Dict[int, int], delta_scores: Dict[int, float]):
+        self.scores = scores
+        self._rows = rows
+        self._delta_scores = delta_scores
+
+    def __getitem__(self, doc_id: int) -> float:
+        return self.get(doc_id)
+
+    def get(self, doc_id: int, default: float = 0.0) -> float:
+        if doc_id in self._delta_scores:
+            return self._delta_scores[doc_id]
+        row = self._rows.get(doc_id)
+        return default if row is None else float(self.scores[row])
+
+
+class TextIndexSnapshot:
+    """Read-only view of a TextSimilarityIndex at one point in time.
+
+    The base segment is a CSR-style matrix of IDF-weighted, L2-normalised
+    rows built at the last compaction; rows whose document was removed or
+    re-added since are masked out by ``live``. Newer documents sit in the
+    delta segment, weighted with the base segment's IDF. Compaction builds
+    new arrays instead of mutating these, so a snapshot stays valid while
+    the index keeps changing.
+    """
+
+    def __init__(self, rows: Dict[int, int], row_ids: np.ndarray, indptr: np.ndarray, row_of_nnz: np.ndarray,
+                 indices: np.ndarray, weights: np.ndarray, idf: np.ndarray, live: np.ndarray,
+                 delta: Dict[int, Tuple[np.ndarray, np.ndarray]]):
+        self._rows = rows
+        self._row_ids = row_ids
+        self._indptr = indptr
+        self._row_of_nnz = row_of_nnz
+        self._indices = indices
+        self._weights = weights
+        self._idf = idf
+        self._live = live
+        self._delta = delta
+
+    def query_vector(self, text: str) -> SparseVector:
+        """IDF-weighted and L2-normalised sparse query vector for ``text``"""
+        indices, tf = hash_features(text)
+        order = np.argsort(indices)
+        return weigh(indices[order], tf[order], self._idf)
+
+    def _row(self, doc_id: int) -> int:
+        row = self._rows.get(doc_id, -1)
+        return row if row >= 0 and self._live[row] else -1
+
+    def _score_all(self, query: SparseVector) -> Tuple[np.ndarray, Dict[int, float]]:
+        # A pass over every non-zero: a dense copy of the query is the
+        # cheapest lookup here
+        dense = np.zeros(N_FEATURES, dtype=np.float32)
+        dense[query[0]] = query[1]
+        products = self._weights * dense[self._indices]
+        scores = np.bincount(self._row_of_nnz, weights=products, minlength=len(self._rows))
+        scores[~self._live] = 0.0
+        delta_scores = {
+            doc_id: round(float(np.dot(dense[indices], weights)) * 100, 2)
+            for doc_id, (indices, weights) in self._delta.items()
+        }
+        return np.round(scores * 100, 2), delta_scores
+
+    def query(self, text: str) -> QueryScores:
+        """Score ``text`` against every indexed document in one pass"""
+        scores, delta_scores = self._score_all(self.query_vector(text))
+        return QueryScores(scores, self._rows, delta_scores)
+
+    def ranked(self, query: SparseVector) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, scores 0-100) of every indexed document against a query
+        vector, best first, from one pass over the collection
+        """
+        scores, delta_scores = self._score_all(query)
+        live = np.flatnonzero(self._live)
+        ids = np.concatenate((self._row_ids[live], np.fromiter(delta_scores, dtype=np.int64, count=len(delta_scores))))
+        scores = np.concatenate((scores[live], np.fromiter(delta_scores.values(), dtype=np.float64,
+                                                           count=len(delta_scores))))
+        order = np.argsort(-scores, kind="stable")
+        return ids[order], scores[order]
+
+    def similarity(self, text1: str, text2: str) -> float:
+        """Cosine similarity (0-100) of two texts under the current IDF weights"""
+        (indices1, weights1), (indices2, weights2) = self.query_vector(text1), self.query_vector(text2)
+        _, positions1, positions2 = np.intersect1d(indices1, indices2, assume_unique=True, return_indices=True)
+        return round(float(np.dot(weights1[positions1], weights2[positions2])) * 100, 2)
+
+    def score_ids(self, query: SparseVector, doc_ids: List[int]) -> np.ndarray:
+        """Scores (0-100) of a query vector against only the given documents.
+
+        Gathers just those rows' non-zeros, so scoring a small subset costs
+        O(their size) rather than a pass over the whole collection.
+        """
+        rows = np.fromiter((self._row(doc_id) for doc_id in doc_ids), dtype=np.int64, count=len(doc_ids))
+        known = rows >= 0
+        # Unknown ids read row 0's bounds (clipped, for an empty base segment)
+        # and are then given no non-zeros
+        safe = np.where(known, rows, 0)
+        starts = np.where(known, self._indptr[safe], 0)
+        lengths = np.where(known, self._indptr[np.minimum(safe + 1, len(self._indptr) - 1)] - starts, 0)
+        total = int(lengths.sum())
+        # Position of every gathered non-zero: its row start plus its offset in the row
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        products = self._weights[offsets] * lookup(query, self._indices[offsets])
+        owners = np.repeat(np.arange(len(doc_ids)), lengths)
+        # float64 even when nothing was gathered (bincount then returns ints)
+        scores = np.bincount(owners, weights=products, minlength=len(doc_ids)).astype(np.float64)
+        if self._delta:
+            for position, doc_id in enumerate(doc_ids):
+                vector = self._delta.get(doc_id)
+                if vector is not None:
+                    scores[position] = np.dot(lookup(query, vector[0]), vector[1])
+        return np.round(scores * 100, 2)
+
+
+def weigh(indices: np.ndarray, tf: np.ndarray, idf: np.ndarray) -> SparseVector:
+    """IDF-weight and L2-normalise one hashed document, as (indices, weights)"""
+    weights = tf * idf[indices]
+    norm = math.sqrt(float(np.dot(weights, weights)))
+    if norm:
+        weights = weights / norm
+    return indices, weights.astype(np.float32)
+
+
+def build_base(docs: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, ...]:
+    """Base segment arrays (row ids, indptr, row of every non-zero, indices,
+    weights) and the smoothed IDF of a whole collection
+    """
+    doc_ids = list(docs)
+    rows = [docs[doc_id] for doc_id in doc_ids]
+    lengths = np.fromiter((len(idx) for idx, _ in rows), dtype=np.int64, count=len(rows))
+    if rows:
+        indices = np.concatenate([idx for idx, _ in rows])
+        tf = np.concatenate([values for _, values in rows])
+    else:
+        indices = np.empty(0, dtype=np.int32)
+        tf = np.empty(0, dtype=np.float32)
+    row_of_nnz = np.repeat(np.arange(len(rows), dtype=np.int32), lengths)
+
+    # Smoothed IDF, as in scikit-learn's TfidfTransformer
+    df = np.bincount(indices, minlength=N_FEATURES)
+    idf = (np.log((1 + len(rows)) / (1 + df)) + 1).astype(np.float32)
+
+    weights = tf * idf[indices]
+    norms = np.sqrt(np.bincount(row_of_nnz, weights=weights * weights, minlength=len(rows)))
+    norms[norms == 0] = 1.0
+    return (np.array(doc_ids, dtype=np.int64), np.concatenate(([0], np.cumsum(lengths))), row_of_nnz,
+            indices, (weights / norms[row_of_nnz]).astype(np.float32), idf)
+
+
+class TextSimilarityIndex:
+    """TF-IDF vectors for a document collection, scored by cosine similarity.
+
+    Documents are hashed into sparse term-frequency rows when added. Reads
+    go through a TextIndexSnapshot: one sparse matrix-vector product over
+    the base segment plus the (small) delta segment. Adding, replacing or
+    removing a document costs O(its size): it goes to the delta segment and
+    masks its old base row. Once the delta outgrows COMPACT_RATIO of the
+    base, ``compact_in_background`` builds a new base segment with fresh IDF
+    weights on a worker thread and swaps it in, so compaction is amortised
+    over the writes and never runs on a read.
+    """
+
+    def __init__(self):
+        self._docs: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._delta: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._rows: Dict[int, int] = {}
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._row_of_nnz = np.empty(0, dtype=np.int32)
+        self._indices = np.empty(0, dtype=np.int32)
+        self._weights = np.empty(0, dtype=np.float32)
+        self._idf = np.ones(N_FEATURES, dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._dead_rows = 0
+        self._live_shared = False
+        self._snapshot = None
+        # Ids written while a background compaction runs, replayed onto its result
+        self._written_since: Optional[List[int]] = None
+        # Bumped by every compaction, i.e. whenever the IDF weights change
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _retire(self, doc_id: int) -> None:
+        """Mask the document's base row, if it still has a live one"""
+        row = self._rows.get(doc_id)
+        if row is not None and self._live[row]:
+            if self._live_shared:
+                # A snapshot (possibly still in use after later writes)
+                # holds the mask; copy it before changing it
+                self._live = self._live.copy()
+                self._live_shared = False
+            self._live[row] = False
+            self._dead_rows += 1
+
+    def add(self, doc_id: int, text: str) -> None:
+        self.add_features(doc_id, hash_features(text))
+
+    def add_features(self, doc_id: int, features: Tuple[np.ndarray, np.ndarray]) -> None:
+        """Add a document from its precomputed hash_features"""
+        if self._written_since is not None:
+            self._written_since.append(doc_id)
+        self._retire(doc_id)
+        self._docs[doc_id] = features
+        self._delta[doc_id] = weigh(*features, self._idf)
+        self._snapshot = None
+
+    def remove(self, doc_id: int) -> None:
+        if self._docs.pop(doc_id, None) is not None:
+            if self._written_since is not None:
+                self._written_since.append(doc_id)
+            self._retire(doc_id)
+            self._delta.pop(doc_id, None)
+            self._snapshot = None
+
+    def clear(self) -> None:
+        self._docs.clear()
+        self.compact()
+
+    def needs_compaction(self) -> bool:
+        pending = len(self._delta) + self._dead_rows
+        return pending > max(COMPACT_MIN_DOCS, COMPACT_RATIO * len(self._rows)) or (
+            pending and not self._rows)
+
+    def compact(self) -> None:
+        """Rebuild the base segment from every document and refresh the IDF"""
+        self._install(build_base(self._docs))
+
+    def _install(self, base: Tuple[np.ndarray, ...]) -> None:
+        row_ids, self._indptr, self._row_of_nnz, self._indices, self._weights, self._idf = base
+        self._row_ids = row_ids
+        self._rows = {doc_id: row for row, doc_id in enumerate(row_ids.tolist())}
+        self._live = np.ones(len(row_ids), dtype=bool)
+        self._live_shared = False
+        self._dead_rows = 0
+        self._delta = {}
+        self._snapshot = None
+        self._written_since = None
+        self.generation += 1
+
+    async def compact_in_background(self) -> bool:
+        """Build the new base segment on a worker thread, then swap it in;
+        returns whether it was swapped in.
+
+        The build reads a copy of the document map, so writes go on
+        meanwhile; they are logged and replayed onto the new segment (under
+        its IDF). A build overtaken by another compaction is dropped.
+        """
+        if self._written_since is not None:
+            return False
+        generation = self.generation
+        self._written_since = []
+        try:
+            base = await asyncio.to_thread(build_base, dict(self._docs))
+        except BaseException:
+            if self.generation == generation:
+                self._written_since = None
+            raise
+        if self.generation != generation:
+            return False
+        written = list(dict.fromkeys(self._written_since))
+        self._install(base)
+        for doc_id in written:
+            features = self._docs.get(doc_id)
+            self._retire(doc_id)
+            if features is not None:
+                self._delta[doc_id] = weigh(*features, self._idf)
+        return True
+
+    def snapshot(self) -> TextIndexSnapshot:
+        """Current read view, shared by reads until the next write"""
+        if self._snapshot is None:
+            self._snapshot = TextIndexSnapshot(
+                self._rows, self._row_ids, self._indptr, self._row_of_nnz, self._indices, self._weights,
+                self._idf, self._live, dict(self._delta)
+            )
+            self._live_shared = True
+        return self._snapshot
+
+    def query_vector(self, text: str) -> SparseVector:
+        return self.snapshot().query_vector(text)
+
+    def query(self, text: str) -> QueryScores:
+        return self.snapshot().query(text)
+
+    def similarity(self, text1: str, text2: str) -> float:
+        return self.snapshot().similarity(text1, text2)
+
+    def score_ids(self, query: SparseVector, doc_ids: List[int]) -> np.ndarray:
+        return self.snapshot().score_ids(query, doc_ids)
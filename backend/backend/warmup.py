@@ -0,0 +1,48 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict
+
+from .core.config import settings
+from .core.lifecycle import on_startup
+from .routes.candidates import catalog
+from .routes.jobs import job_catalog
+from .utils.ai_helpers import analyze_resume_chunk, extract_skills_from_text, sync_skill_dictionary
+from .utils.process_pool import get_process_pool
+
+WARMUP_TEXT = (
+    "Senior Python developer with FastAPI, PostgreSQL, Docker and Kubernetes "
+    "experience building REST APIs on AWS."
+)
+
+# What the last warmup did, reported by /health
+report: Dict[str, Any] = {}
+
+@on_startup
+async def warm_caches() -> None:
+    """Pay the first-request costs (skill matcher, TF-IDF matrix, analysis
+    worker processes) during startup, before the worker reports ready.
+    Registered after the index loaders, so the indexes are already filled.
+    """
+    start = time.perf_counter()
+    version = sync_skill_dictionary()
+    skills = extract_skills_from_text(WARMUP_TEXT)
+    catalog.search(WARMUP_TEXT, limit=1)
+    job_catalog.recommend(skills, limit=1)
+
+    pool = get_process_pool()
+    if pool is not None:
+        # One task per worker process so they are all forked and imported
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, analyze_resume_chunk, [WARMUP_TEXT])
+            for _ in range(settings.ANALYSIS_POOL_WORKERS)
+        ))
+
+    report.update({
+        "pid": os.getpid(),
+        "skill_dictionary": version,
+        "candidates_indexed": len(catalog),
+        "jobs_indexed": len(job_catalog),
+        "seconds": round(time.perf_counter() - start, 3),
+    })
@@ -0,0 +1,135 @@
+"""Micro-benchmarks of the hot helpers behind the API endpoints.
+
+Needs pytest-benchmark (see requirements.txt in this directory). Run from
+the repository root:
+
+    python -m pytest backend/benchmarks/bench_micro.py --benchmark-json=micro.json
+
+and compare two saved runs with ``pytest-benchmark compare``.
+"""
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from backend.backend.routes.candidates import calculate_skill_match, calculate_text_similarity, catalog
+from backend.backend.utils.ai_helpers import extract_skills_from_text
+from backend.backend.utils.embeddings import embed
+from backend.backend.utils.saved_searches import SavedRanking
+from backend.backend.utils.skill_bitset import SkillBitsetIndex
+from backend.backend.utils.jwt_handler import create_access_token, token_cache, verify_token
+from backend.backend.utils.password_hasher import get_password_hash, verify_password
+
+from .corpus import make_candidates, make_job_description, make_resume
+
+RESUME_WORDS = [50, 500, 5000]
+
+
+@pytest.fixture(scope="module")
+def rng():
+    return random.Random(7)
+
+
+@pytest.fixture(scope="module")
+def indexed_catalog():
+    catalog.clear()
+    for candidate_id, candidate in enumerate(make_candidates(1000), start=1):
+        catalog.add({"id": candidate_id, **candidate})
+    # As the background compaction would
+    catalog.text_index.compact()
+    catalog.semantic_index.compact()
+    yield catalog
+    catalog.clear()
+
+
+@pytest.mark.parametrize("words", RESUME_WORDS)
+def test_extract_skills_from_text(benchmark, rng, words):
+    resume = make_resume(rng, words=words)
+    benchmark(extract_skills_from_text, resume)
+
+
+@pytest.mark.parametrize("words", RESUME_WORDS)
+def test_calculate_text_similarity(benchmark, rng, indexed_catalog, words):
+    resume = make_resume(rng, words=words)
+    job_description = make_job_description(rng)
+    benchmark(calculate_text_similarity, resume, job_description)
+
+
+@pytest.fixture(scope="module")
+def skill_bitsets(rng):
+    index = SkillBitsetIndex()
+    for candidate_id in range(100_000):
+        index.add(candidate_id, extract_skills_from_text(make_resume(rng, 3, 12, words=0)))
+    return index
+
+
+def test_bitset_skill_scores(benchmark, rng, skill_bitsets):
+    job_skills = extract_skills_from_text(make_job_description(rng))
+    benchmark(lambda: skill_bitsets.compare(job_skills).query_scores())
+
+
+@pytest.mark.parametrize("words", RESUME_WORDS)
+def test_embed(benchmark, rng, words):
+    benchmark(embed, make_resume(rng, words=words))
+
+
+@pytest.mark.parametrize("k", [10, 100])
+def test_semantic_search(benchmark, rng, indexed_catalog, k):
+    query = embed(make_job_description(rng))
+    benchmark(indexed_catalog.semantic_index.search, query, k)
+
+
+def test_calculate_skill_match(benchmark, rng):
+    candidate_skills = extract_skills_from_text(make_resume(rng, 10, 20))
+    job_skills = extract_skills_from_text(make_job_description(rng))
+    benchmark(calculate_skill_match, candidate_skills, job_skills)
+
+
+@pytest.mark.parametrize("limit", [10, 100])
+def test_catalog_search(benchmark, rng, indexed_catalog, limit):
+    job_description = make_job_description(rng)
+    benchmark(indexed_catalog.search, job_description, limit)
+
+
+def test_saved_search_catch_up(benchmark, rng, indexed_catalog):
+    """Saved-search read after one candidate changed, vs test_catalog_search"""
+    ranking = SavedRanking(make_job_description(rng), 10)
+    ranking.refresh(indexed_catalog)
+    candidate_ids = list(indexed_catalog.records)
+
+    def change_and_read():
+        indexed_catalog.add(indexed_catalog.records[rng.choice(candidate_ids)])
+        ranking.catch_up(indexed_catalog)
+        return ranking.top()
+
+    benchmark(change_and_read)
+
+
+def test_password_hash(benchmark):
+    benchmark.pedantic(get_password_hash, args=("Passw0rd!",), rounds=5, iterations=1)
+
+
+def test_password_verify(benchmark):
+    hashed = get_password_hash("Passw0rd!")
+    benchmark.pedantic(verify_password, args=("Passw0rd!", hashed), rounds=5, iterations=1)
+
+
+def test_jwt_create(benchmark):
+    benchmark(create_access_token, data={"sub": "1"})
+
+
+def test_jwt_verify_uncached(benchmark):
+    token = create_access_token(data={"sub": "1"})
+
+    def verify():
+        token_cache.invalidate_user(1)
+        return verify_token(token)
+
+    benchmark(verify)
+
+
+def test_jwt_verify_cached(benchmark):
+    token = create_access_token(data={"sub": "1"})
+    verify_token(token)
+    benchmark(verify_token, token)
@@ -0,0 +1,29 @@
+"""Synthetic resumes and job descriptions for benchmarks."""
+import random
+from typing import Dict, List
+
+from backend.backend.utils.ai_helpers import TECH_SKILLS
+from backend.backend.utils.synthetic_data import SyntheticDataGenerator
+
+FILLER = (
+    "experience with building scalable services and leading teams in agile "
+    "environments delivering production systems for customers across regions "
+    "designed implemented maintained improved reliability performance"
+).split()
+
+GENERATOR = SyntheticDataGenerator()
+
+
+def make_resume(rng: random.Random, min_skills: int = 3, max_skills: int = 10, words: int = 60) -> str:
+    """Resume of roughly ``words`` filler words, for input-size sweeps"""
+    tokens = rng.sample(TECH_SKILLS, rng.randint(min_skills, max_skills)) + rng.choices(FILLER, k=words)
+    rng.shuffle(tokens)
+    return " ".join(tokens)
+
+
+def make_job_description(rng: random.Random) -> str:
+    return GENERATOR.job(rng.randrange(1 << 30))["description"]
+
+
+def make_candidates(count: int, start_id: int = 1) -> List[Dict]:
+    return list(GENERATOR.candidates(count, start_id))
@@ -0,0 +1,192 @@
+"""Concurrent load test of the API endpoints, served in-process.
+
+Requests go through httpx's ASGI transport straight into the app, so the
+numbers cover routing, auth, validation, the handlers and serialization
+without network noise. Each endpoint is measured against synthetic
+candidate pools of increasing size. Run from the repository root:
+
+    python -m backend.benchmarks.load --pools 1000 10000 100000 \\
+        --concurrency 16 --requests 500 --output load.json
+
+Pass ``--compare previous.json`` to print the change against an earlier run.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from backend.main import app
+from backend.backend.core.rate_limit import rate_limiter
+from backend.backend.routes.candidates import candidates_table, load_candidate_index
+from backend.backend.routes.jobs import jobs_table, load_job_index
+from backend.backend.seed import seed
+
+from .corpus import GENERATOR, make_job_description, make_resume
+
+CANDIDATES_PER_JOB = 10
+BENCH_USER = {"name": "Load Test", "email": "loadtest@example.com", "password": "Passw0rd!"}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def endpoint_calls(rng: random.Random) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Request factories for each measured endpoint (method, url, payload)"""
+    return {
+        "POST /candidates/find": lambda: {
+            "method": "POST", "url": "/candidates/find",
+            "json": {"job_description": make_job_description(rng), "limit": 10},
+        },
+        "POST /ai/analyze-resume": lambda: {
+            "method": "POST", "url": "/ai/analyze-resume",
+            "json": {"resume_text": make_resume(rng), "target_job_title": "Backend Engineer"},
+        },
+        "GET /candidates/": lambda: {"method": "GET", "url": "/candidates/", "params": {"limit": 20}},
+        "GET /jobs/": lambda: {"method": "GET", "url": "/jobs/", "params": {"limit": 20}},
+        "GET /auth/me": lambda: {"method": "GET", "url": "/auth/me"},
+    }
+
+
+async def grow_pool(size: int) -> None:
+    """Top the candidates table up to ``size`` rows (and jobs to a tenth of
+    that) with synthetic records, then rebuild the indexes
+    """
+    candidates = max(0, size - await candidates_table.count())
+    jobs = max(0, size // CANDIDATES_PER_JOB - await jobs_table.count())
+    await seed(GENERATOR, candidates=candidates, jobs=jobs)
+    await load_candidate_index()
+    await load_job_index()
+
+
+async def authenticate(client: httpx.AsyncClient) -> Dict[str, str]:
+    response = await client.post("/auth/register", json=BENCH_USER)
+    if response.status_code != 200:
+        response = await client.post("/auth/login", json={
+            "email": BENCH_USER["email"], "password": BENCH_USER["password"],
+        })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def measure(client: httpx.AsyncClient, make_request: Callable[[], Dict[str, Any]],
+                  headers: Dict[str, str], concurrency: int, total: int) -> Dict[str, Any]:
+    """Issue ``total`` requests from ``concurrency`` workers; report latency
+    percentiles (ms), throughput and failures
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            request = make_request()
+            start = time.perf_counter()
+            response = await client.request(headers=headers, **request)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+async def run(pools: List[int], concurrency: int, total: int, endpoints: Optional[List[str]] = None,
+              seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    calls = endpoint_calls(rng)
+    selected = endpoints or list(calls)
+    results = []
+    # One user sends every request; measure the handlers, not the limiter
+    rate_limiter.rate = 0
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            headers = await authenticate(client)
+            for pool in sorted(pools):
+                build_start = time.perf_counter()
+                await grow_pool(pool)
+                build_s = round(time.perf_counter() - build_start, 3)
+                for name in selected:
+                    # One warm-up pass so lazy initialisation is not measured
+                    await measure(client, calls[name], headers, 1, 1)
+                    result = await measure(client, calls[name], headers, concurrency, total)
+                    result.update({"endpoint": name, "pool_size": pool, "concurrency": concurrency,
+                                   "index_build_s": build_s})
+                    results.append(result)
+                    print(f"{name:<26} pool={pool:<7} p50={result['p50_ms']:>9.2f}ms "
+                          f"p95={result['p95_ms']:>9.2f}ms p99={result['p99_ms']:>9.2f}ms "
+                          f"{result['throughput_rps']:>8.1f} req/s errors={result['errors']}")
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {"pools": sorted(pools), "concurrency": concurrency, "requests": total, "seed": seed},
+        "results": results,
+    }
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print the p50/p95/throughput change of each (endpoint, pool) pair"""
+    before = {(r["endpoint"], r["pool_size"]): r for r in previous["results"]}
+    for result in current["results"]:
+        old = before.get((result["endpoint"], result["pool_size"]))
+        if old is None:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "throughput_rps"):
+            change = (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            deltas.append(f"{key}={change:+.1f}%")
+        print(f"{result['endpoint']:<26} pool={result['pool_size']:<7} " + " ".join(deltas))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pools", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint and pool")
+    parser.add_argument("--endpoints", nargs="+", help="subset of endpoint names to measure")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.pools, args.concurrency, args.requests, args.endpoints, args.seed))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
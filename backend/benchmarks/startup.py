@@ -0,0 +1,99 @@
+"""Measure how long importing the app takes, from ``python -X importtime``.
+
+Each run imports the module in a fresh interpreter. Run from the repository
+root:
+
+    python -m backend.benchmarks.startup --runs 5 --budget-ms 1500
+
+It exits non-zero when the median import time exceeds the budget or an
+integration that should load on first use (LAZY_MODULES) was imported.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+APP_MODULE = "backend.main"
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+# Imported on first use (or in a startup hook), never by importing the app
+LAZY_MODULES = ("passlib", "bcrypt", "jose", "supabase")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of ``import time: self | cumulative | name`` (microseconds)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"self_us": int(self_us), "cumulative_us": int(cumulative_us), "name": name.strip()})
+    return rows
+
+
+def import_once(module: str = APP_MODULE) -> Dict[str, Any]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")]))}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    total = next(row for row in reversed(rows) if row["name"] == module)
+    return {"import_ms": total["cumulative_us"] / 1000, "process_ms": wall_ms, "rows": rows}
+
+
+def measure(module: str = APP_MODULE, runs: int = 5) -> Dict[str, Any]:
+    """Median import and process times over ``runs`` cold interpreters, the
+    packages with the most import time, and any eagerly loaded LAZY_MODULES
+    """
+    samples = [import_once(module) for _ in range(runs)]
+    by_package: Dict[str, int] = defaultdict(int)
+    for row in samples[-1]["rows"]:
+        by_package[row["name"].split(".")[0]] += row["self_us"]
+    imported = {row["name"].split(".")[0] for row in samples[-1]["rows"]}
+    return {
+        "module": module,
+        "runs": runs,
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "process_ms": round(statistics.median(s["process_ms"] for s in samples), 1),
+        "slowest_packages": [
+            (name, round(us / 1000, 1))
+            for name, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:15]
+        ],
+        "eager_lazy_modules": sorted(imported & set(LAZY_MODULES)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=APP_MODULE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    report = measure(args.module, args.runs)
+    print(f"import {report['module']}: {report['import_ms']}ms "
+          f"(whole process {report['process_ms']}ms, median of {report['runs']})")
+    for name, ms in report["slowest_packages"]:
+        print(f"  {name:<24} {ms:>8.1f}ms")
+
+    failures = []
+    if report["import_ms"] > args.budget_ms:
+        failures.append(f"import time {report['import_ms']}ms exceeds the {args.budget_ms}ms budget")
+    if report["eager_lazy_modules"]:
+        failures.append(f"imported eagerly: {', '.join(report['eager_lazy_modules'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Startup budget checks. Run from the repository root:
+
+    python -m pytest backend/benchmarks/test_startup.py
+
+Plain ``python -m pytest`` collects it too, so the budget is checked with
+the rest of the suite.
+
+Set STARTUP_IMPORT_BUDGET_MS to tighten or relax the budget for a machine.
+"""
+from .startup import DEFAULT_BUDGET_MS, measure
+
+
+def test_app_import_within_budget():
+    report = measure(runs=3)
+    assert report["import_ms"] <= DEFAULT_BUDGET_MS, report["slowest_packages"]
+
+
+def test_optional_integrations_load_lazily():
+    assert measure(runs=1)["eager_lazy_modules"] == []
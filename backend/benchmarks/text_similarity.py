@@ -0,0 +1,64 @@
+"""Compare the TF-IDF text-similarity engine with the old SequenceMatcher path.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.text_similarity --candidates 2000
+"""
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from backend.backend.utils.text_similarity import TextSimilarityIndex
+
+from .corpus import make_resume
+
+
+def sequence_matcher_similarity(text1: str, text2: str) -> float:
+    """The previous calculate_text_similarity implementation"""
+    ratio = SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+    return round(ratio * 100, 2)
+
+
+def run(n_candidates: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    resumes = {i: make_resume(rng) for i in range(n_candidates)}
+    job_description = make_resume(rng)
+
+    start = time.perf_counter()
+    index = TextSimilarityIndex()
+    for doc_id, resume in resumes.items():
+        index.add(doc_id, resume)
+    index.compact()  # pack the matrix so build time is reported separately
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = index.query(job_description)
+    tfidf_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    baseline = {doc_id: sequence_matcher_similarity(job_description, resume) for doc_id, resume in resumes.items()}
+    sequence_s = time.perf_counter() - start
+
+    top_tfidf = set(sorted(resumes, key=lambda doc_id: scores[doc_id], reverse=True)[:10])
+    top_baseline = set(sorted(resumes, key=baseline.get, reverse=True)[:10])
+    return {
+        "candidates": n_candidates,
+        "tfidf_build_ms": round(build_s * 1000, 2),
+        "tfidf_query_ms": round(tfidf_s * 1000, 2),
+        "sequence_matcher_ms": round(sequence_s * 1000, 2),
+        "speedup": round(sequence_s / tfidf_s, 1) if tfidf_s else None,
+        "top10_overlap": len(top_tfidf & top_baseline),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+    for n_candidates in args.candidates:
+        print(run(n_candidates))
+
+
+if __name__ == "__main__":
+    main()
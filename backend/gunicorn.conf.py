@@ -0,0 +1,19 @@
+# Gunicorn alternative to backend/backend/server.py for production:
+#
+#     pip install gunicorn
+#     ENVIRONMENT=production gunicorn -c backend/gunicorn.conf.py backend.main:app
+#
+# Worker count and bind address come from the same Settings as server.py.
+from backend.backend.core.config import settings
+from backend.backend.server import check_worker_settings
+
+check_worker_settings()
+
+bind = f"{settings.HOST}:{settings.PORT}"
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+# Each worker imports the app itself, so nothing with open connections or
+# threads is inherited across fork; startup (and warmup) runs per worker.
+preload_app = False
+graceful_timeout = 30
+timeout = 60
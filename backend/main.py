@@ -1,14 +1,29 @@
+import os
+from fastapi import Depends
+from fastapi.responses import JSONResponse, PlainTextResponse
 from backend.backend.app import app
+from backend.backend.core.lifecycle import is_ready
+from backend.backend.core.metrics import metrics, require_metrics_access
+from backend.backend.core.rate_limit import rate_limiter
 from backend.backend.routes import auth as auth_routes
 from backend.backend.routes import jobs as jobs_routes
 from backend.backend.routes import ai as ai_routes
 from backend.backend.routes import candidates as candidates_routes
+from backend.backend.routes import tasks as tasks_routes
+from backend.backend.routes import saved_searches as saved_searches_routes
+from backend.backend import warmup
+from backend.backend.utils.password_hasher import password_executor
+from backend.backend.utils.jwt_handler import token_cache
+from backend.backend.utils.analysis_cache import analysis_cache
+from backend.backend.utils.task_queue import task_queue
 
 # Include routers
 app.include_router(auth_routes.router)
 app.include_router(jobs_routes.router)
 app.include_router(ai_routes.router)
 app.include_router(candidates_routes.router)
+app.include_router(tasks_routes.router)
+app.include_router(saved_searches_routes.router)
 
 @app.get("/")
 async def root():
@@ -18,10 +33,33 @@ async def root():
         "docs": "/docs"
     }
 
+# Component stats exported as gauges on /metrics
+metrics.register_collector("password_hashing", password_executor.metrics)
+metrics.register_collector("token_cache", token_cache.stats)
+metrics.register_collector("analysis_cache", analysis_cache.stats)
+metrics.register_collector("tasks", task_queue.stats)
+metrics.register_collector("rate_limit", rate_limiter.stats)
+metrics.register_collector("saved_searches", saved_searches_routes.saved_rankings.stats)
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_access)])
+async def prometheus_metrics():
+    """Request and component metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "message": "API is running smoothly"}
+    if not is_ready():
+        return JSONResponse(status_code=503, content={"status": "starting", "pid": os.getpid()})
+    return {
+        "status": "healthy",
+        "message": "API is running smoothly",
+        "warmup": warmup.report,
+        "password_hashing": password_executor.metrics(),
+        "token_cache": token_cache.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "tasks": task_queue.stats()
+    }
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
+    from backend.backend.server import run
+    run("backend.main:app")
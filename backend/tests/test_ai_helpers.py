@@ -0,0 +1,40 @@
+import pytest
+
+from backend.backend.utils import ai_helpers
+from backend.backend.utils.ai_helpers import extract_skills_from_text, sync_skill_dictionary
+
+
+def test_short_skills_only_match_whole_words():
+    text = "A good, rapid learner who likes django-style gophers and restaurants"
+    assert extract_skills_from_text(text) == ["Django"]
+    assert extract_skills_from_text("Go, Rust; C++ and C# (REST APIs)") == ["C++", "C#", "Go", "Rust", "Rest", "Api"]
+
+
+def test_aliases_and_plurals_map_to_their_skill():
+    text = "Node.js and ReactJS on k8s, backed by Postgres and Mongo, deployed on Amazon Web Services via CICD"
+    assert extract_skills_from_text(text) == [
+        "React", "Node", "Postgresql", "Mongodb", "Aws", "Kubernetes", "Ci/Cd"]
+    # Longer terms win: "node.js" is one skill, not "node" plus a stray "js"
+    assert extract_skills_from_text("nodejs nodejs node") == ["Node"]
+    assert extract_skills_from_text("Microservices and GraphQL APIs") == ["Graphql", "Api", "Microservices"]
+
+
+def test_skills_come_once_each_in_dictionary_order():
+    assert extract_skills_from_text("docker python DOCKER Python golang go") == ["Python", "Go", "Docker"]
+    assert extract_skills_from_text("") == []
+
+
+@pytest.fixture
+def edited_dictionary(monkeypatch):
+    yield monkeypatch
+    monkeypatch.undo()
+    sync_skill_dictionary()
+
+
+def test_sync_rebuilds_the_matcher_after_edits(edited_dictionary):
+    version = sync_skill_dictionary()
+    edited_dictionary.setitem(ai_helpers.SKILL_ALIASES, "py", "python")
+    # The compiled matcher only changes once the dictionaries are synced
+    assert extract_skills_from_text("py developer") == []
+    assert sync_skill_dictionary() != version
+    assert extract_skills_from_text("py developer") == ["Python"]
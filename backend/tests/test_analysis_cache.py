@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from backend.backend.utils import ai_helpers
+from backend.backend.utils.ai_helpers import sync_skill_dictionary
+from backend.backend.utils.analysis_cache import AnalysisCache, analysis_cache_key
+
+RESUME = "Senior Python developer.\n  Docker, AWS and FastAPI."
+
+
+def test_key_ignores_case_and_whitespace_but_not_the_target():
+    key = analysis_cache_key(RESUME, "Backend Engineer")
+    assert analysis_cache_key("senior   python developer. docker, aws and fastapi.", " backend engineer ") == key
+    assert analysis_cache_key(RESUME, "Frontend Engineer") != key
+    assert analysis_cache_key(RESUME) == analysis_cache_key(RESUME, "")
+
+
+@pytest.fixture
+def edited_dictionary(monkeypatch):
+    yield monkeypatch
+    monkeypatch.undo()
+    sync_skill_dictionary()
+
+
+def test_keys_change_once_dictionary_edits_are_synced(edited_dictionary):
+    sync_skill_dictionary()
+    key = analysis_cache_key(RESUME)
+    edited_dictionary.setattr(ai_helpers, "IN_DEMAND_SKILLS", ai_helpers.IN_DEMAND_SKILLS + ["Rust"])
+    # Keys are not re-fingerprinted per request, only after a sync
+    assert analysis_cache_key(RESUME) == key
+    sync_skill_dictionary()
+    assert analysis_cache_key(RESUME) != key
+
+    edited_dictionary.undo()
+    sync_skill_dictionary()
+    assert analysis_cache_key(RESUME) == key
+
+
+def test_entries_cached_before_a_sync_are_not_served_after_it(edited_dictionary):
+    cache = AnalysisCache(maxsize=10)
+
+    async def main():
+        sync_skill_dictionary()
+        await cache.set(analysis_cache_key(RESUME), {"skills": ["Python"]})
+        assert await cache.get(analysis_cache_key(RESUME)) == {"skills": ["Python"]}
+        edited_dictionary.setitem(ai_helpers.SKILL_ALIASES, "py", "python")
+        sync_skill_dictionary()
+        assert await cache.get(analysis_cache_key(RESUME)) is None
+
+    asyncio.run(main())
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
@@ -0,0 +1,81 @@
+import asyncio
+
+import numpy as np
+
+from backend.backend.utils.ann_index import IVFIndex
+from backend.backend.utils.embeddings import EMBEDDING_DIM, content_hash, embed, embedding_signature
+
+
+def test_snapshot_isolated_from_insert_then_delete():
+    index = IVFIndex(EMBEDDING_DIM)
+    for doc_id, text in ((1, "Python FastAPI developer"), (2, "React TypeScript engineer")):
+        index.add(doc_id, embed(text))
+    index.compact()
+    index.add(4, embed("Go and Rust systems programmer"))
+    query = embed("Python developer")
+    snapshot = index.snapshot()
+    before = snapshot.score_ids(query, [1, 4]).tolist()
+
+    index.add(3, embed("Python data engineer"))
+    index.remove(1)
+    index.remove(4)
+
+    assert snapshot.score_ids(query, [1, 4]).tolist() == before
+    assert {doc_id for doc_id, _ in snapshot.search(query, 10)} == {1, 2, 4}
+    assert index.snapshot().score_ids(query, [1, 4]).tolist() == [0.0, 0.0]
+
+
+def test_load_rejects_other_embedding_signature(tmp_path):
+    index = IVFIndex(EMBEDDING_DIM, signature=lambda: {"embedding_version": "1:a", "skill_dictionary": "x"})
+    index.add(1, embed("Python FastAPI developer"), content_hash("Python FastAPI developer"))
+    index.compact()
+    index.save(str(tmp_path))
+
+    same = IVFIndex.load(str(tmp_path), EMBEDDING_DIM, signature=index.signature)
+    assert same is not None and same.content_hash(1) == content_hash("Python FastAPI developer")
+    assert IVFIndex.load(str(tmp_path), EMBEDDING_DIM,
+                         signature=lambda: {"embedding_version": "1:a", "skill_dictionary": "y"}) is None
+    assert IVFIndex.load(str(tmp_path), EMBEDDING_DIM, signature=embedding_signature) is None
+
+
+def test_background_compaction_replays_writes_made_meanwhile():
+    texts = {doc_id: f"Python developer number {doc_id} with Docker" for doc_id in range(1, 301)}
+
+    async def main():
+        index = IVFIndex(EMBEDDING_DIM)
+        for doc_id, text in texts.items():
+            index.add(doc_id, embed(text), content_hash(text))
+        compaction = asyncio.create_task(index.compact_in_background())
+        await asyncio.sleep(0)
+        # Written while the merge runs on its thread
+        texts[1] = "Go and Rust systems programmer"
+        index.add(1, embed(texts[1]), content_hash(texts[1]))
+        index.remove(2)
+        del texts[2]
+        texts[301] = "React TypeScript engineer"
+        index.add(301, embed(texts[301]), content_hash(texts[301]))
+        assert await compaction
+        return index
+
+    index = asyncio.run(main())
+    assert not index.needs_compaction() and index._delta_count == 2
+    assert sorted(index.ids()) == sorted(texts)
+    for doc_id, text in texts.items():
+        assert index.content_hash(doc_id) == content_hash(text)
+        assert np.array_equal(index.vector(doc_id), embed(text))
+
+
+def test_background_compaction_overtaken_by_a_rebuild_is_dropped():
+    async def main():
+        index = IVFIndex(EMBEDDING_DIM)
+        for doc_id in range(1, 301):
+            index.add(doc_id, embed(f"Data engineer {doc_id}"))
+        compaction = asyncio.create_task(index.compact_in_background())
+        await asyncio.sleep(0)
+        index.remove(5)
+        index.compact()
+        assert not await compaction
+        return index
+
+    index = asyncio.run(main())
+    assert 5 not in index.ids() and len(index) == 299
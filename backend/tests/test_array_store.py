@@ -0,0 +1,57 @@
+import os
+import time
+
+import numpy as np
+
+from backend.backend.utils import array_store
+from backend.backend.utils.array_store import load_arrays, save_arrays
+
+
+def test_save_keeps_builds_other_writers_are_writing(tmp_path):
+    directory = str(tmp_path)
+    first = save_arrays(directory, {"values": np.arange(3)})
+    # Another process has started a build but not switched CURRENT to it yet
+    in_progress = tmp_path / "build-other"
+    in_progress.mkdir()
+    second = save_arrays(directory, {"values": np.arange(5)})
+
+    assert in_progress.exists()
+    assert not (tmp_path / first).exists()
+    arrays, _ = load_arrays(directory, ["values"])
+    assert list(arrays["values"]) == list(range(5))
+    assert second in os.listdir(directory)
+
+
+def test_save_deletes_abandoned_builds(tmp_path):
+    directory = str(tmp_path)
+    abandoned = tmp_path / "build-crashed"
+    abandoned.mkdir()
+    stale = time.time() - array_store.ORPHAN_BUILD_SECONDS - 1
+    os.utime(abandoned, (stale, stale))
+    build = save_arrays(directory, {"values": np.arange(2)}, {"dim": 2})
+
+    assert not abandoned.exists()
+    assert sorted(os.listdir(directory)) == sorted(["CURRENT", build])
+    assert load_arrays(directory, ["values"])[1] == {"dim": 2}
+
+
+def test_load_follows_a_build_replaced_while_reading(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    save_arrays(directory, {"values": np.arange(2)})
+    current_build = array_store._current_build
+    reads = []
+
+    def racing_current_build(path):
+        build = current_build(path)
+        reads.append(build)
+        if len(reads) == 1:
+            # A concurrent save replaces and deletes the build just read
+            monkeypatch.setattr(array_store, "_current_build", current_build)
+            save_arrays(directory, {"values": np.arange(4)})
+            monkeypatch.setattr(array_store, "_current_build", racing_current_build)
+        return build
+
+    monkeypatch.setattr(array_store, "_current_build", racing_current_build)
+    arrays, _ = load_arrays(directory, ["values"])
+    assert list(arrays["values"]) == list(range(4))
+    assert len(reads) == 2 and reads[0] != reads[1]
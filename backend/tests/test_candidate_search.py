@@ -0,0 +1,91 @@
+import re
+
+from backend.backend.utils.ai_helpers import extract_skills_from_text
+from backend.backend.utils.candidate_search import CandidateCatalog
+from backend.backend.utils.synthetic_data import SyntheticDataGenerator
+
+CANDIDATES = 2000
+JOBS = 15
+
+
+def build_catalog(job_descriptions) -> CandidateCatalog:
+    generator = SyntheticDataGenerator()
+    catalog = CandidateCatalog()
+    for candidate_id, candidate in enumerate(generator.candidates(CANDIDATES), start=1):
+        catalog.add({**candidate, "id": candidate_id})
+    # Near copies of each job description missing one of its skills: their
+    # text scores are high enough to place above candidates sharing more
+    # skills, so a ceiling that is too low would drop them
+    candidate_id = CANDIDATES
+    for job_description in job_descriptions:
+        for skill in extract_skills_from_text(job_description):
+            candidate_id += 1
+            resume = re.sub(re.escape(skill), "", job_description, flags=re.IGNORECASE)
+            catalog.add({"id": candidate_id, "name": f"Copy {candidate_id}",
+                         "email": f"copy{candidate_id}@example.com", "resume": resume})
+    return catalog
+
+
+def brute_force_top(catalog, job_description, limit):
+    """Score every candidate, then sort"""
+    entries = catalog.score(job_description, extract_skills_from_text(job_description), list(catalog.records))
+    return [entry[:3] for entry in sorted(entries, key=lambda entry: entry[:2], reverse=True)[:limit]]
+
+
+def test_early_exit_ranking_matches_full_scoring():
+    generator = SyntheticDataGenerator()
+    job_descriptions = [generator.job(job_index)["description"] for job_index in range(1, JOBS + 1)]
+    catalog = build_catalog(job_descriptions)
+    skipped = 0
+    for job_description in job_descriptions:
+        for limit in (1, 10, 50):
+            for state in catalog.rank(job_description, limit):
+                pass
+            assert [entry[:3] for entry in state.winners()] == brute_force_top(catalog, job_description, limit)
+            skipped += state.scored < len(catalog)
+    # The ceiling check must actually skip candidates, not just be correct
+    assert skipped
+
+
+def test_jobs_without_dictionary_skills_rank_on_text():
+    catalog = build_catalog([])
+    for job_description in ("Experienced engineer to lead a small product team",
+                            "Senior developer for our backend platform, remote friendly",
+                            "Friendly team player who enjoys mentoring colleagues"):
+        assert not extract_skills_from_text(job_description)
+        for limit in (1, 10, 200):
+            for state in catalog.rank(job_description, limit):
+                pass
+            assert [entry[:3] for entry in state.winners()] == brute_force_top(catalog, job_description, limit)
+
+
+def test_consistent_ranking_ignores_writes_between_groups():
+    generator = SyntheticDataGenerator()
+    job_description = generator.job(1)["description"]
+    catalog = build_catalog([job_description])
+    expected = catalog.search(job_description, 100)["candidates"]
+    leaders = {result["id"] for result in expected}
+    other_resume = generator.job(2)["description"]
+    next_id = len(catalog) + 10_000
+
+    ranking = catalog.rank(job_description, 100, consistent=True)
+    state = next(ranking)
+    assert not state.final
+    # Rename everyone and drop the leaders not scored yet while it is paused
+    held = {entry[2] for entry in state.heap}
+    for candidate_id in list(catalog.records):
+        if candidate_id in leaders and candidate_id not in held:
+            catalog.remove(candidate_id)
+        else:
+            catalog.add({**catalog.records[candidate_id], "name": "Renamed"})
+    catalog.add({"id": next_id, "name": "New", "email": "new@example.com", "resume": job_description})
+    for state in ranking:
+        catalog.add({**catalog.records[1], "resume": other_resume})
+    assert [catalog.materialize(entry, state.job_skill_set) for entry in state.winners()] == expected
+    assert not catalog._views
+
+    ranking = catalog.rank(job_description, 100, consistent=True)
+    next(ranking)
+    assert len(catalog._views) == 1
+    ranking.close()
+    assert not catalog._views
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from backend.backend.core import storage
+from backend.backend.core.config import settings
+from backend.backend.routes import candidates
+
+
+async def other_worker(write, *args, recorded_at=None):
+    """Run a table write as another worker would: its change-log entry
+    carries another origin (and possibly an older timestamp)
+    """
+    origin, clock = storage.PROCESS_ID, time.time
+    storage.PROCESS_ID = "other"
+    if recorded_at is not None:
+        time.time = lambda: recorded_at
+    try:
+        return await write(*args)
+    finally:
+        storage.PROCESS_ID, time.time = origin, clock
+
+
+def test_change_log_is_pruned_and_lagging_workers_resync(monkeypatch):
+    monkeypatch.setattr(settings, "CHANGE_LOG_RETENTION_SECONDS", 60)
+    table = candidates.candidates_table
+
+    async def main():
+        await candidates.load_candidate_index()
+        catalog = candidates.catalog
+
+        for _ in range(3):
+            await other_worker(table.update, 1, {"resume": "Java developer"}, recorded_at=time.time() - 120)
+        await other_worker(table.update, 1, {"resume": "Rust systems engineer"})
+        await other_worker(table.update, 2, {"resume": "Go backend developer"})
+        added = await other_worker(table.insert, {"name": "Eve", "email": "eve@example.com",
+                                                 "resume": "Elixir developer"})
+        # This worker's own writes are already in its catalog and skipped
+        await table.update(3, {"resume": "Unsynced on purpose"})
+        await candidates.sync_candidate_index()
+        assert catalog.records[1]["resume"] == "Rust systems engineer"
+        assert catalog.records[added["id"]]["resume"] == "Elixir developer"
+        assert catalog.records[3]["resume"] != "Unsynced on purpose"
+
+        # Entries past the retention window go; recent ones stay
+        await candidates.prune_candidate_changes()
+        remaining = await candidates.changes_table.list_all()
+        assert all(change["recorded_at"] > time.time() - 60 for change in remaining)
+        assert [change["record_id"] for change in remaining][-4:] == [1, 2, added["id"], 3]
+
+        # A worker that has not synced for half the window may have missed
+        # pruned entries, so it compares its catalog with the whole table
+        monkeypatch.setattr(candidates.candidate_feed, "read_at", time.time() - 31)
+        await table.delete(4)
+        await candidates.sync_candidate_index()
+        assert catalog.records[3]["resume"] == "Unsynced on purpose"
+        assert 4 not in catalog.records
+        assert sorted(catalog.records) == [record["id"] for record in await table.list_all()]
+        assert time.time() - candidates.candidate_feed.read_at < 5
+
+    asyncio.run(main())
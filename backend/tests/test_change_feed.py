@@ -0,0 +1,67 @@
+import asyncio
+import bisect
+import time
+
+import pytest
+
+from backend.backend.core.storage import InMemoryStorage, SQLiteStorage
+from backend.backend.utils.change_feed import ChangeFeed
+
+
+def test_entries_committed_late_are_still_reported():
+    async def main():
+        changes = InMemoryStorage().table("candidate_changes")
+        feed = ChangeFeed(changes, grace_seconds=60, origin="self")
+        now = time.time()
+        first = await changes.insert({"record_id": 1, "origin": "other", "recorded_at": now})
+        # Id 2 is taken by a transaction that has not committed yet
+        late = await changes.insert({"record_id": 2, "origin": "other", "recorded_at": now})
+        await changes.delete(late["id"])
+        await changes.insert({"record_id": 3, "origin": "other", "recorded_at": now})
+        await changes.insert({"record_id": 4, "origin": "self", "recorded_at": now})
+        assert await feed.changed_ids() == [1, 3]
+
+        # The transaction commits: its entry appears below ids already read
+        changes._records[late["id"]] = late
+        bisect.insort(changes._order, late["id"])
+        assert await feed.changed_ids() == [2]
+        assert await feed.changed_ids() == []
+        assert feed.settled_through == 0
+
+        # Once entries are older than the grace period they are not read again
+        feed.grace_seconds = -1
+        assert await feed.changed_ids() == []
+        assert feed.settled_through > first["id"]
+        await changes.insert({"record_id": 5, "origin": "other", "recorded_at": time.time()})
+        assert await feed.changed_ids() == [5]
+
+    asyncio.run(main())
+
+
+def test_sql_writes_log_their_changes_in_the_same_transaction(tmp_path):
+    pytest.importorskip("aiosqlite")
+
+    async def main():
+        storage = SQLiteStorage(f"sqlite:///{tmp_path / 'feed.db'}", 2)
+        await storage.connect()
+        try:
+            jobs = storage.table("jobs")
+            feed = ChangeFeed(jobs.changes, grace_seconds=60, origin="other")
+            stored = await jobs.insert_many([{"title": "A", "requirements": ["Python"]},
+                                             {"title": "B", "requirements": []}])
+            await jobs.update(stored[0]["id"], {"title": "A2"})
+            await jobs.delete(stored[1]["id"])
+            assert await feed.changed_ids() == [stored[0]["id"], stored[1]["id"]]
+
+            # A failed transaction leaves neither the row nor its entry
+            with pytest.raises(RuntimeError):
+                async with storage.transaction() as conn:
+                    rows = await jobs._insert_rows(conn, [{"title": "C"}])
+                    await jobs._log(conn, [rows[0]["id"]])
+                    raise RuntimeError("crash before commit")
+            assert await feed.changed_ids() == []
+            assert await jobs.count() == 1
+        finally:
+            await storage.close()
+
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+import asyncio
+
+from backend.backend.utils import feature_store as feature_store_module
+from backend.backend.utils.embeddings import content_hash
+from backend.backend.utils.feature_store import FeatureStore, extract_features
+
+RESUMES = {
+    1: "Python FastAPI developer with Docker",
+    2: "React TypeScript engineer",
+    3: "Go and Rust systems programmer on Kubernetes",
+    4: "Data engineer: Python, Spark and AWS",
+}
+
+
+def stored(store, doc_id, resume):
+    features = store.get(doc_id, content_hash(resume))
+    return None if features is None else (features.skills, features.tokens[0].tolist(), features.tokens[1].tolist())
+
+
+def expected(resume):
+    features = extract_features(resume)
+    return features.skills, features.tokens[0].tolist(), features.tokens[1].tolist()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = FeatureStore()
+    for doc_id, resume in RESUMES.items():
+        store.put(doc_id, extract_features(resume))
+    store.save(str(tmp_path))
+    store.remove(2)
+    store.put(5, extract_features("Java Spring developer"))
+    store.save(str(tmp_path))
+
+    loaded = FeatureStore.load(str(tmp_path))
+    assert len(loaded) == 4 and not loaded.dirty
+    for doc_id in (1, 3, 4):
+        assert stored(loaded, doc_id, RESUMES[doc_id]) == expected(RESUMES[doc_id])
+    assert stored(loaded, 2, RESUMES[2]) is None
+    # Features of another resume version are not returned
+    assert stored(loaded, 1, RESUMES[1] + " and Go") is None
+
+
+def test_background_save_keeps_changes_made_meanwhile(tmp_path, monkeypatch):
+    store = FeatureStore()
+    for doc_id, resume in RESUMES.items():
+        store.put(doc_id, extract_features(resume))
+    store.save(str(tmp_path))
+    store.put(5, extract_features("Java Spring developer"))
+    store.put(6, extract_features("Swift iOS developer"))
+    store.remove(4)
+
+    write = FeatureStore._write
+
+    def write_while_changing(self, *args):
+        merged = write(self, *args)
+        # Made by requests while the save runs on its worker thread
+        store.put(1, extract_features(RESUMES[1] + " and Go"))
+        store.remove(2)
+        store.remove(5)
+        store.put(4, extract_features(RESUMES[4]))
+        store.put(7, extract_features("PHP Laravel developer"))
+        return merged
+
+    monkeypatch.setattr(FeatureStore, "_write", write_while_changing)
+    asyncio.run(store.save_in_background(str(tmp_path)))
+    monkeypatch.setattr(FeatureStore, "_write", write)
+
+    current = {1: RESUMES[1] + " and Go", 3: RESUMES[3], 4: RESUMES[4], 6: "Swift iOS developer",
+               7: "PHP Laravel developer"}
+    assert store.dirty and len(store) == len(current)
+    for doc_id, resume in current.items():
+        assert stored(store, doc_id, resume) == expected(resume)
+    assert stored(store, 2, RESUMES[2]) is None and stored(store, 5, "Java Spring developer") is None
+
+    store.save(str(tmp_path))
+    loaded = FeatureStore.load(str(tmp_path))
+    assert sorted(loaded.columns["ids"].tolist()) == sorted(current)
+    for doc_id, resume in current.items():
+        assert stored(loaded, doc_id, resume) == expected(resume)
+
+
+def test_failed_background_save_stays_dirty(tmp_path, monkeypatch):
+    store = FeatureStore()
+    store.put(1, extract_features(RESUMES[1]))
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(feature_store_module, "save_arrays", fail)
+    try:
+        asyncio.run(store.save_in_background(str(tmp_path)))
+    except OSError:
+        pass
+    assert store.dirty and stored(store, 1, RESUMES[1]) == expected(RESUMES[1])
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from backend.backend.core.config import settings
+from backend.backend.core.storage import storage
+from backend.backend.utils import jwt_handler
+from backend.backend.utils.jwt_handler import TokenCache, create_access_token, token_cache, verify_token
+from backend.main import app
+
+
+def test_tokens_carry_the_user_id_as_a_string_subject():
+    from jose import jwt
+
+    token = create_access_token({"sub": str(42)})
+    assert jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])["sub"] == "42"
+    assert verify_token(token) == 42
+
+
+@pytest.mark.parametrize("claims", [{}, {"sub": "not-a-user-id"}, {"sub": 42}])
+def test_tokens_without_a_valid_subject_are_rejected(claims):
+    with pytest.raises(HTTPException) as raised:
+        verify_token(create_access_token(claims))
+    assert raised.value.status_code == 401
+
+
+def test_cached_tokens_expire_with_their_exp_claim(monkeypatch):
+    cache = TokenCache(maxsize=10)
+    now = time.time()
+    cache.put("a", 1, {"sub": "1", "exp": now + 10})
+    assert cache.get("a") == (1, {"sub": "1", "exp": now + 10})
+
+    monkeypatch.setattr(jwt_handler.time, "time", lambda: now + 10)
+    assert cache.get("a") is None
+    # The expired entry is dropped, not just skipped
+    assert cache.stats()["size"] == 0 and cache._by_user == {}
+
+
+def test_cache_evicts_the_least_recently_used_and_invalidates_per_user():
+    cache = TokenCache(maxsize=2)
+    exp = time.time() + 60
+    cache.put("a", 1, {"exp": exp})
+    cache.put("b", 2, {"exp": exp})
+    cache.get("a")
+    cache.put("c", 1, {"exp": exp})
+    assert cache.get("b") is None and cache.stats()["evictions"] == 1
+
+    cache.invalidate_user(1)
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_repeat_verifications_hit_the_cache():
+    token = create_access_token({"sub": "7"})
+    hits = token_cache.hits
+    assert verify_token(token) == 7 and verify_token(token) == 7
+    assert token_cache.hits == hits + 1
+
+
+def test_deactivated_users_lose_their_cached_tokens():
+    with TestClient(app) as client:
+        response = client.post("/auth/register", json={
+            "name": "D", "email": "deactivated@example.com", "password": "Passw0rd!"})
+        user_id = response.json()["user_id"]
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        assert client.get("/auth/me", headers=headers).status_code == 200
+        assert user_id in token_cache._by_user
+
+        client.portal.call(storage.table("users").update, user_id, {"is_active": False})
+        response = client.get("/auth/me", headers=headers)
+        assert response.status_code == 401 and response.json()["detail"] == "Inactive user"
+        assert user_id not in token_cache._by_user
@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+
+from backend.backend.core.config import settings
+from backend.backend.core.metrics import MetricsRegistry
+from backend.main import app
+
+
+def test_stage_timings_are_labelled_with_the_method():
+    registry = MetricsRegistry()
+    registry.request_finished("GET", "/candidates/{candidate_id}", 200, 0.002, 100, {"endpoint": 0.001})
+    registry.request_finished("PATCH", "/candidates/{candidate_id}", 200, 0.02, 100, {"endpoint": 0.015})
+    lines = registry.render().splitlines()
+
+    stage_counts = [line for line in lines if line.startswith("pathai_http_request_stage_duration_seconds_count")]
+    assert stage_counts == [
+        'pathai_http_request_stage_duration_seconds_count'
+        '{method="GET",route="/candidates/{candidate_id}",stage="endpoint"} 1',
+        'pathai_http_request_stage_duration_seconds_count'
+        '{method="PATCH",route="/candidates/{candidate_id}",stage="endpoint"} 1',
+    ]
+    # Stages are summaries: no bucket series
+    assert "# TYPE pathai_http_request_stage_duration_seconds summary" in lines
+    assert not any(line.startswith("pathai_http_request_stage_duration_seconds_bucket") for line in lines)
+
+
+def test_metrics_only_served_to_allowed_hosts_or_with_the_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_HOSTS", ["127.0.0.1"])
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 403
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+        assert response.status_code == 200 and "pathai_http_requests_total" in response.text
+
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+        assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 403
+        # TestClient requests come from the "testclient" host
+        monkeypatch.setattr(settings, "METRICS_ALLOWED_HOSTS", ["testclient"])
+        assert client.get("/metrics").status_code == 200
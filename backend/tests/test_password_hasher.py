@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.backend.utils import password_hasher
+from backend.backend.utils.password_hasher import PasswordHasherBusy, PasswordHashExecutor
+from backend.main import app
+
+
+def test_admission_is_bounded_and_slots_are_released():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    def blocked(value):
+        release.wait(5)
+        return value
+
+    def failing():
+        raise RuntimeError("hash failed")
+
+    async def main():
+        executor.hash_latency.observe(3.0)
+        admitted = [asyncio.create_task(executor.run(blocked, value)) for value in (1, 2)]
+        await asyncio.sleep(0)
+        assert executor.metrics()["in_flight"] == 2
+        # Full: the backlog of two 3 s hashes on one worker drains in 6 s
+        with pytest.raises(PasswordHasherBusy) as raised:
+            await executor.run(blocked, 3)
+        assert raised.value.retry_after == 6
+        release.set()
+        assert await asyncio.gather(*admitted) == [1, 2]
+        # A failed call gives its slot back too
+        with pytest.raises(RuntimeError):
+            await executor.run(failing)
+        assert executor.metrics()["in_flight"] == 0
+        assert await executor.run(blocked, 4) == 4
+
+    asyncio.run(main())
+    assert executor.rejected == 1
+
+
+def test_busy_hasher_answers_503_with_retry_after(monkeypatch):
+    async def busy(fn, *args):
+        raise PasswordHasherBusy(7)
+
+    monkeypatch.setattr(password_hasher.password_executor, "run", busy)
+    with TestClient(app) as client:
+        response = client.post("/auth/register", json={
+            "name": "Busy", "email": "busy-hasher@example.com", "password": "Passw0rd!"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "7"
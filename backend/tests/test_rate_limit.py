@@ -0,0 +1,147 @@
+import asyncio
+
+from backend.backend.core import rate_limit
+from backend.backend.core.rate_limit import LocalRateLimitBackend, RateLimiter, RateLimitMiddleware
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def request_scope(path, method="POST", client="10.0.0.1", token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return {"type": "http", "method": method, "path": path, "headers": headers, "client": (client, 50000)}
+
+
+async def call(middleware, scope):
+    """Status and headers of the response to one request"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    start = messages[0]
+    return start["status"], dict((name.decode(), value.decode()) for name, value in start["headers"])
+
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_bucket_refuses_until_refilled(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    limiter = RateLimiter(LocalRateLimitBackend(), rate=2, burst=10, concurrency=4)
+
+    async def main():
+        assert [await limiter.take("user:1", 4) for _ in range(2)] == [0, 0]
+        # 2 tokens left: 4 more are 1 second of refill away, and nothing is taken
+        assert await limiter.take("user:1", 4) == 1.0
+        assert await limiter.take("user:2", 4) == 0
+        clock.now += 1
+        assert await limiter.take("user:1", 4) == 0
+        # The bucket never refills beyond its burst
+        clock.now += 100
+        assert await limiter.take("user:1", 10) == 0
+        assert await limiter.take("user:1", 1) == 0.5
+
+    asyncio.run(main())
+    assert limiter.stats()["limited"] == 2
+
+
+def test_retry_after_rounds_the_wait_up(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    limiter = RateLimiter(LocalRateLimitBackend(), rate=4, burst=20, concurrency=4)
+    middleware = RateLimitMiddleware(ok, limiter)
+    monkeypatch.setattr(rate_limit, "verify_token", lambda token: 7)
+
+    async def main():
+        scope = request_scope("/candidates/find", token="t")
+        assert (await call(middleware, scope))[0] == 200
+        status, headers = await call(middleware, scope)
+        assert status == 429 and headers["retry-after"] == "5"
+        # Free routes are never limited
+        assert (await call(middleware, request_scope("/health", method="GET", token="t")))[0] == 200
+
+    asyncio.run(main())
+
+
+def test_concurrency_slots_are_released(monkeypatch):
+    limiter = RateLimiter(LocalRateLimitBackend(), rate=1000, burst=1000, concurrency=2)
+    monkeypatch.setattr(rate_limit, "verify_token", lambda token: 7)
+    release = asyncio.Event()
+
+    async def slow(scope, receive, send):
+        if scope["method"] != "GET":
+            await release.wait()
+        if scope["path"] == "/ai/analyze-resume":
+            raise RuntimeError("analysis failed")
+        await ok(scope, receive, send)
+
+    middleware = RateLimitMiddleware(slow, limiter)
+
+    async def main():
+        running = [asyncio.create_task(call(middleware, request_scope(path, token="t")))
+                   for path in ("/candidates/find", "/ai/analyze-resume")]
+        await asyncio.sleep(0)
+        status, headers = await call(middleware, request_scope("/candidates/bulk", token="t"))
+        assert status == 429 and headers["retry-after"] == "1"
+        # Cheap requests hold no slot
+        assert (await call(middleware, request_scope("/candidates/", method="GET", token="t")))[0] == 200
+        release.set()
+        results = await asyncio.gather(*running, return_exceptions=True)
+        assert results[0][0] == 200 and isinstance(results[1], RuntimeError)
+        # Both the finished and the failed request gave their slot back
+        assert limiter.backend._active == {}
+        assert (await call(middleware, request_scope("/candidates/bulk", token="t")))[0] == 200
+
+    asyncio.run(main())
+    assert limiter.stats()["concurrency_limited"] == 1
+
+
+def test_anonymous_requests_share_a_larger_budget_per_address(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    limiter = RateLimiter(LocalRateLimitBackend(), rate=1, burst=20, concurrency=1, anonymous=(10, 100, 8))
+    middleware = RateLimitMiddleware(ok, limiter)
+
+    def invalid(token):
+        raise rate_limit.HTTPException(status_code=401)
+
+    monkeypatch.setattr(rate_limit, "verify_token", invalid)
+
+    async def main():
+        # Ten logins from one address fit its budget, whether or not they
+        # carry a (rejected) token; the eleventh waits for a refill
+        statuses = [(await call(middleware, request_scope("/auth/login", token="bad" if n % 2 else None)))[0]
+                    for n in range(10)]
+        assert statuses == [200] * 10
+        status, headers = await call(middleware, request_scope("/auth/login"))
+        assert status == 429 and headers["retry-after"] == "1"
+        # Other addresses have their own budget
+        assert (await call(middleware, request_scope("/auth/register", client="10.0.0.2")))[0] == 200
+
+    asyncio.run(main())
+    assert limiter.quota("ip:10.0.0.1") == (10, 100, 8)
+    assert limiter.quota("user:7") == (1, 20, 1)
+
+
+def test_zero_anonymous_rate_leaves_anonymous_requests_unlimited():
+    limiter = RateLimiter(LocalRateLimitBackend(), rate=1, burst=10, concurrency=1, anonymous=(0, 0, 8))
+    middleware = RateLimitMiddleware(ok, limiter)
+
+    async def main():
+        for _ in range(5):
+            assert (await call(middleware, request_scope("/auth/login")))[0] == 200
+
+    asyncio.run(main())
@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+
+def register(client, email):
+    response = client.post("/auth/register", json={"name": "R", "email": email, "password": "Passw0rd!"})
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return headers, client.get("/auth/me", headers=headers).json()["user"]
+
+
+def test_recommendations_only_for_the_signed_in_user():
+    with TestClient(app) as client:
+        headers, user = register(client, "recommend-owner@example.com")
+        other_headers, other = register(client, "recommend-other@example.com")
+        client.post("/candidates/", headers=other_headers, json={
+            "name": "Other", "email": "recommend-other@example.com", "resume": "Private Python resume"})
+
+        response = client.post("/ai/recommend-jobs", headers=headers, json={"user_id": other["id"]})
+        assert response.status_code == 403
+        response = client.post("/ai/recommend-jobs", headers=headers, json={
+            "user_id": other["id"], "resume_text": "Python developer"})
+        assert response.status_code == 403
+
+        response = client.post("/ai/recommend-jobs", headers=other_headers, json={"user_id": other["id"]})
+        assert response.status_code == 200
+        response = client.post("/ai/recommend-jobs", headers=headers, json={"user_id": user["id"]})
+        assert response.status_code == 404
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from backend.backend.core.repositories import TableUserRepository
+from backend.backend.core.storage import InMemoryStorage
+
+
+def test_users_are_found_by_id_and_normalized_email():
+    repository = TableUserRepository(InMemoryStorage().table("users"))
+
+    async def main():
+        alice = await repository.create({"name": "Alice", "email": "Alice@Example.com", "hashed_password": "x"})
+        bob = await repository.create({"name": "Bob", "email": "bob@example.com", "hashed_password": "y"})
+        assert alice["id"] != bob["id"] and await repository.count() == 2
+
+        assert (await repository.get_by_id(alice["id"]))["name"] == "Alice"
+        assert (await repository.get_by_email("  alice@EXAMPLE.com "))["id"] == alice["id"]
+        assert (await repository.get_by_email("bob@example.com"))["id"] == bob["id"]
+        assert await repository.get_by_email("carol@example.com") is None
+        assert await repository.get_by_id(alice["id"] + bob["id"] + 1) is None
+
+        # The email index is unique up to case and surrounding spaces
+        with pytest.raises(ValueError):
+            await repository.create({"name": "Alice 2", "email": " ALICE@example.com", "hashed_password": "z"})
+        assert await repository.count() == 2
+
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+import random
+
+from backend.backend.utils import candidate_search
+from backend.backend.utils.candidate_search import CandidateCatalog
+from backend.backend.utils.saved_searches import SavedRanking, SavedRankings
+from backend.backend.utils.synthetic_data import SyntheticDataGenerator
+
+JOB_DESCRIPTION = "Senior Python developer with FastAPI, Docker, Kubernetes and AWS experience"
+
+
+def build_catalog(count):
+    candidates = [{**candidate, "id": candidate_id}
+                  for candidate_id, candidate in enumerate(SyntheticDataGenerator().candidates(count), start=1)]
+    catalog = CandidateCatalog()
+    for candidate in candidates:
+        catalog.add(candidate)
+    catalog.text_index.compact()
+    catalog.semantic_index.compact()
+    return catalog, candidates
+
+
+def fresh_top(catalog, limit=10):
+    return [(result["id"], result["match_score"])
+            for result in catalog.search(JOB_DESCRIPTION, limit)["candidates"]]
+
+
+def held_top(ranking):
+    return [(entry[2], entry[0]) for entry in ranking.top()]
+
+
+def test_incremental_ranking_matches_fresh_search():
+    rng = random.Random(3)
+    catalog, candidates = build_catalog(3000)
+    ranking = SavedRanking(JOB_DESCRIPTION, 10, headroom=5)
+    ranking.catch_up(catalog)
+    next_id = len(candidates) + 1
+
+    for write in range(1, 1501):
+        action = rng.random()
+        if action < 0.4:
+            catalog.add({**rng.choice(candidates), "id": next_id})
+            next_id += 1
+        elif action < 0.7:
+            candidate_id = rng.choice(list(catalog.records))
+            catalog.add({**catalog.records[candidate_id], "resume": rng.choice(candidates)["resume"]})
+        else:
+            # Mostly remove current leaders, to run through the headroom
+            leaders = [entry[2] for entry in ranking.top()]
+            catalog.remove(rng.choice(leaders if leaders and rng.random() < 0.7 else list(catalog.records)))
+        if catalog.text_index.needs_compaction():
+            # As the background compaction would
+            catalog.text_index.compact()
+        if write % 4 == 0:
+            ranking.catch_up(catalog)
+            if not ranking.exact:
+                # New IDF weights; the background refresh recomputes it
+                ranking.refresh(catalog)
+            assert held_top(ranking) == fresh_top(catalog), write
+
+
+def test_compaction_rescores_held_entries_without_a_full_refresh():
+    catalog, candidates = build_catalog(2000)
+    rankings = SavedRankings(catalog, headroom=20)
+    search = {"id": 1, "job_description": JOB_DESCRIPTION, "limit": 10}
+    ranking = rankings.read(search)
+    assert ranking.exact and held_top(ranking) == fresh_top(catalog)
+    floor = ranking.floor
+
+    for candidate_id in range(1, 301):
+        catalog.add({**catalog.records[candidate_id], "resume": candidates[-candidate_id]["resume"]})
+    catalog.text_index.compact()
+    ranking = rankings.read(search)
+    assert rankings.refreshes == 1 and rankings.incremental_updates == 1
+    assert ranking.generation == catalog.text_index.generation
+    assert ranking.floor > floor
+    # Held entries carry their scores under the new weights
+    rescored = catalog.score(JOB_DESCRIPTION, ranking.job_skills, list(ranking.entries))
+    assert sorted(ranking.entries.values(), key=lambda entry: entry[2]) == sorted(rescored, key=lambda entry: entry[2])
+    if ranking.exact:
+        assert held_top(ranking) == fresh_top(catalog)
+
+    assert rankings.due() == ([] if ranking.exact else [1])
+    for search_id in rankings.due():
+        rankings.refresh_due(search_id)
+    assert ranking.exact and held_top(ranking) == fresh_top(catalog)
+
+
+def test_deleting_leaders_runs_through_the_headroom():
+    catalog, _ = build_catalog(1000)
+    ranking = SavedRanking(JOB_DESCRIPTION, 5, headroom=3)
+    ranking.catch_up(catalog)
+    refreshes = 0
+    for _ in range(12):
+        catalog.remove(ranking.top()[0][2])
+        refreshes += ranking.catch_up(catalog)
+        assert held_top(ranking) == fresh_top(catalog, 5)
+    # Each refresh holds 8 entries and one is lost per delete
+    assert refreshes == 12 // 4
+
+
+def test_journal_overflow_falls_back_to_a_full_refresh(monkeypatch):
+    monkeypatch.setattr(candidate_search, "JOURNAL_LIMIT", 10)
+    catalog, candidates = build_catalog(500)
+    ranking = SavedRanking(JOB_DESCRIPTION, 10, headroom=5)
+    ranking.catch_up(catalog)
+    for candidate_id in range(1, 31):
+        catalog.add({**catalog.records[candidate_id], "resume": candidates[-candidate_id]["resume"]})
+    assert catalog.changes_since(ranking.version) is None
+    assert ranking.catch_up(catalog)
+    assert ranking.version == catalog.version
+    assert held_top(ranking) == fresh_top(catalog)
@@ -0,0 +1,79 @@
+import random
+
+from backend.backend.routes.candidates import calculate_skill_match
+from backend.backend.utils.ai_helpers import TECH_SKILLS, calculate_job_match_score
+from backend.backend.utils import skill_bitset
+from backend.backend.utils.skill_bitset import SkillBitsetIndex, popcount_rows
+
+# Skills beyond the default vocabulary, kept per document outside the bitmasks
+EXTRA_SKILLS = [f"Skill {number}" for number in range(90)]
+UNKNOWN_SKILLS = ["Cobol", "Fortran", "Pascal"]
+
+
+def assert_matches_set_comparison(index, documents, query):
+    for sharing_only in (True, False):
+        comparison = index.compare(query, sharing_only=sharing_only)
+        expected = {doc_id for doc_id, skills in documents.items()
+                    if not sharing_only or skills & set(query)}
+        assert sorted(comparison.ids.tolist()) == sorted(expected)
+        query_scores = comparison.query_scores()
+        document_scores = comparison.document_scores()
+        for position, doc_id in enumerate(comparison.ids.tolist()):
+            skills = documents[doc_id]
+            assert query_scores[position] == calculate_skill_match(list(skills), list(query))
+            assert document_scores[position] == calculate_job_match_score(list(query), list(skills))
+            assert sorted(comparison.shared_skills(position)) == sorted(skills & set(query))
+            assert sorted(comparison.document_only_skills(position)) == sorted(skills - set(query))
+            assert sorted(comparison.query_only_skills(position)) == sorted(set(query) - skills)
+
+
+def test_comparison_matches_set_based_scores():
+    rng = random.Random(22)
+    index = SkillBitsetIndex()
+    pool = [skill.title() for skill in TECH_SKILLS] + EXTRA_SKILLS
+    documents = {}
+    for doc_id in range(1, 301):
+        documents[doc_id] = set(rng.sample(pool, rng.randint(0, 12)))
+        index.add(doc_id, documents[doc_id])
+    for doc_id in rng.sample(sorted(documents), 40):
+        index.remove(doc_id)
+        del documents[doc_id]
+    for doc_id in rng.sample(sorted(documents), 40):
+        documents[doc_id] = set(rng.sample(pool, rng.randint(0, 12)))
+        index.add(doc_id, documents[doc_id])
+
+    queries = [[], rng.sample(UNKNOWN_SKILLS, 2)]
+    for _ in range(50):
+        query = rng.sample(pool, rng.randint(1, 15))
+        if rng.random() < 0.5:
+            query += rng.sample(UNKNOWN_SKILLS, rng.randint(1, len(UNKNOWN_SKILLS)))
+        queries.append(query)
+    for query in queries:
+        assert_matches_set_comparison(index, documents, query)
+
+
+def test_skills_outside_the_vocabulary_do_not_grow_the_bitsets():
+    index = SkillBitsetIndex()
+    words = index.words
+    for doc_id in range(1, 501):
+        index.add(doc_id, ["Python", f"Requirement {doc_id}"])
+    assert index.words == words
+    assert len(index._names) == len(index._bit_of)
+
+    comparison = index.compare(["Python", "Requirement 7"])
+    position = comparison.ids.tolist().index(7)
+    assert comparison.matched[position] == 2
+    assert comparison.document_scores()[position] == 100.0
+    assert comparison.document_scores()[0 if position else 1] == 50.0
+
+
+def test_comparison_only_touches_sharing_rows(monkeypatch):
+    index = SkillBitsetIndex()
+    for doc_id in range(1, 1001):
+        index.add(doc_id, ["Python"] if doc_id % 100 == 0 else ["Java"])
+    touched = []
+    real_popcount = popcount_rows
+    monkeypatch.setattr(skill_bitset, "popcount_rows", lambda words: touched.append(len(words)) or real_popcount(words))
+    comparison = index.compare(["Python"])
+    assert sorted(comparison.ids.tolist()) == list(range(100, 1001, 100))
+    assert touched == [10]
@@ -0,0 +1,30 @@
+import random
+
+from backend.backend.utils.skill_index import SkillIndex
+
+SKILLS = ["Python", "Java", "Sql", "Docker", "Aws"]
+
+
+def test_ids_with_skills_pages_the_posting_intersection():
+    rng = random.Random(9)
+    index = SkillIndex()
+    documents = {}
+    # Re-index some documents out of id order so postings need insertion
+    for doc_id in list(range(1, 201)) + rng.sample(range(1, 201), 60):
+        documents[doc_id] = set(rng.sample(SKILLS, rng.randint(0, 4)))
+        index.add_skills(doc_id, documents[doc_id])
+    for doc_id in rng.sample(sorted(documents), 30):
+        index.remove(doc_id)
+        del documents[doc_id]
+
+    for query in (["Python"], ["Python", "Sql"], ["Java", "Docker", "Aws"], ["Cobol"]):
+        expected = sorted(doc_id for doc_id, skills in documents.items() if skills >= set(query))
+        paged, after_id = [], None
+        while True:
+            page = index.ids_with_skills(query, after_id=after_id, limit=7)
+            assert all(doc_id > (after_id or 0) for doc_id in page)
+            paged += page
+            if len(page) < 7:
+                break
+            after_id = page[-1]
+        assert paged == expected
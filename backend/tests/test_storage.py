@@ -0,0 +1,87 @@
+import asyncio
+import random
+
+import pytest
+
+from backend.backend.core.storage import (
+    InMemoryStorage, SQLiteStorage, TABLES, index_value, index_values,
+)
+from backend.backend.utils.synthetic_data import SyntheticDataGenerator
+
+JOBS = TABLES["jobs"]
+
+
+def matches(record, filters):
+    for field, value in filters.items():
+        if field in JOBS.multi:
+            if index_value(value) not in index_values(record.get(field)):
+                return False
+        elif index_value(record.get(field)) != index_value(value):
+            return False
+    return True
+
+
+def random_filters(rng, records):
+    record = rng.choice(records)
+    filters = {}
+    for field in rng.sample(JOBS.indexed, rng.randint(0, 3)):
+        if field in JOBS.multi:
+            value = rng.choice(record[field] or ["Rust"])
+            filters[field] = value.upper() if rng.random() < 0.5 else value
+        else:
+            filters[field] = rng.choice(records)[field]
+    return filters
+
+
+async def paged(table, filters, limit):
+    results, after_id = [], None
+    while True:
+        page = await table.page(filters, after_id, limit)
+        assert len(page) <= limit
+        assert all(record["id"] > (after_id or 0) for record in page)
+        results.extend(page)
+        if len(page) < limit:
+            return results
+        after_id = page[-1]["id"]
+
+
+async def check_paging(storage):
+    await storage.connect()
+    try:
+        table = storage.table("jobs")
+        rng = random.Random(8)
+        generator = SyntheticDataGenerator()
+        records = {record["id"]: record for record in await table.insert_many(
+            generator.job(index, posted_by=rng.randint(1, 5)) for index in range(1, 301))}
+        for record_id in rng.sample(sorted(records), 40):
+            assert await table.delete(record_id)
+            del records[record_id]
+        for record_id in rng.sample(sorted(records), 40):
+            records[record_id] = await table.update(record_id, {
+                "requirements": rng.sample(["Python", "Go", "Rust", "SQL"], rng.randint(0, 3)),
+                "is_active": rng.random() < 0.5,
+            })
+
+        for _ in range(60):
+            filters = random_filters(rng, list(records.values()))
+            expected = [records[record_id] for record_id in sorted(records) if matches(records[record_id], filters)]
+            limit = rng.choice((1, 7, 20, 500))
+            assert await paged(table, filters, limit) == expected, filters
+            if expected:
+                middle = expected[len(expected) // 2]["id"]
+                assert await table.page(filters, middle, limit) == [
+                    record for record in expected if record["id"] > middle][:limit]
+
+        with pytest.raises(ValueError):
+            await table.page({"salary_range": "$100k-$250k"})
+    finally:
+        await storage.close()
+
+
+def test_in_memory_table_paging():
+    asyncio.run(check_paging(InMemoryStorage()))
+
+
+def test_sqlite_table_paging(tmp_path):
+    pytest.importorskip("aiosqlite")
+    asyncio.run(check_paging(SQLiteStorage(f"sqlite:///{tmp_path / 'paging.db'}", 2)))
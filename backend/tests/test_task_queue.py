@@ -0,0 +1,65 @@
+import asyncio
+
+from backend.backend.utils.task_queue import LocalTaskStore, QueueFull, TaskQueue
+
+
+def run_queue(submissions, workers=2, per_user_limit=1, per_user_max_pending=100):
+    """Submit (name, owner, priority) tasks before starting the workers;
+    returns the names in start order and the peak running count per owner
+    """
+    started, running, peak = [], {}, {}
+
+    async def handler(payload):
+        owner = payload["owner"]
+        started.append(payload["name"])
+        running[owner] = running.get(owner, 0) + 1
+        peak[owner] = max(peak.get(owner, 0), running[owner])
+        await asyncio.sleep(0.01)
+        running[owner] -= 1
+        return {}
+
+    async def main():
+        queue = TaskQueue(LocalTaskStore(60), workers, per_user_limit, per_user_max_pending)
+        queue.register("work", handler)
+        for name, owner, priority in submissions:
+            await queue.submit("work", {"name": name, "owner": owner}, owner, priority)
+        await queue.start()
+        while queue.stats()["completed"] < len(submissions):
+            await asyncio.sleep(0.005)
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    return started, peak, stats
+
+
+def test_priority_order_within_running_cap():
+    started, peak, stats = run_queue([
+        ("b0", "bulk-user", "bulk"), ("b1", "bulk-user", "bulk"), ("b2", "bulk-user", "bulk"),
+        ("i0", "user", "interactive"), ("i1", "user", "interactive"),
+    ])
+    assert started == ["i0", "b0", "i1", "b1", "b2"]
+    assert peak == {"user": 1, "bulk-user": 1}
+    assert stats == {"queued": 0, "running": 0, "completed": 5, "failed": 0}
+
+
+def test_capped_owner_does_not_block_others():
+    submissions = [(f"a{i}", "a", "normal") for i in range(50)] + [("b0", "b", "bulk")]
+    started, peak, _ = run_queue(submissions, workers=2)
+    assert started.index("b0") <= 1
+    assert peak == {"a": 1, "b": 1}
+
+
+def test_pending_cap():
+    async def main():
+        queue = TaskQueue(LocalTaskStore(60), per_user_max_pending=2)
+        queue.register("work", lambda payload: None)
+        await queue.submit("work", {}, "a")
+        await queue.submit("work", {}, "a")
+        try:
+            await queue.submit("work", {}, "a")
+        except QueueFull:
+            return True
+        return False
+
+    assert asyncio.run(main())
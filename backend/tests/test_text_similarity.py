@@ -0,0 +1,175 @@
+"""TF-IDF index checks. Run from the repository root:
+
+    python -m pytest backend/tests
+"""
+import asyncio
+import math
+import random
+
+from backend.backend.utils import text_similarity
+from backend.backend.utils.text_similarity import TextSimilarityIndex, hash_features
+
+DOCS = {
+    1: "Senior Python developer with FastAPI and PostgreSQL",
+    2: "Frontend engineer building React and TypeScript apps",
+    3: "Python data engineer working with Spark and Airflow",
+}
+
+
+WORDS = ("python java react docker kubernetes aws sql spark airflow fastapi django "
+         "senior junior engineer developer data backend frontend cloud team").split()
+
+
+def build(docs=DOCS) -> TextSimilarityIndex:
+    index = TextSimilarityIndex()
+    for doc_id, text in docs.items():
+        index.add(doc_id, text)
+    index.compact()
+    return index
+
+
+def brute_force_vectors(docs, weighted_by=None):
+    """Smoothed TF-IDF vectors as dicts, with the IDF of ``weighted_by``
+    (default: ``docs`` itself)
+    """
+    corpus = {doc_id: dict(zip(*map(list, hash_features(text)))) for doc_id, text in (weighted_by or docs).items()}
+    df = {}
+    for vector in corpus.values():
+        for feature in vector:
+            df[feature] = df.get(feature, 0) + 1
+    vectors = {}
+    for doc_id, text in docs.items():
+        weights = {feature: tf * (math.log((1 + len(corpus)) / (1 + df.get(feature, 0))) + 1)
+                   for feature, tf in zip(*map(list, hash_features(text)))}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        vectors[doc_id] = {feature: weight / norm for feature, weight in weights.items()}
+    return vectors
+
+
+def brute_force_scores(docs, text, weighted_by=None):
+    vectors = brute_force_vectors({**docs, "query": text}, weighted_by or docs)
+    query = vectors.pop("query")
+    return {doc_id: 100 * sum(weight * query.get(feature, 0.0) for feature, weight in vector.items())
+            for doc_id, vector in vectors.items()}
+
+
+def random_docs(rng, count, start=1):
+    return {doc_id: " ".join(rng.choices(WORDS, k=rng.randint(3, 30))) for doc_id in range(start, start + count)}
+
+
+def assert_scores_close(actual, expected):
+    assert set(actual) == set(expected)
+    for doc_id, score in expected.items():
+        assert abs(actual[doc_id] - score) < 0.02, doc_id
+
+
+def test_compacted_scores_match_brute_force():
+    rng = random.Random(2)
+    docs = random_docs(rng, 200)
+    index = build(docs)
+    for _ in range(20):
+        text = " ".join(rng.choices(WORDS, k=rng.randint(1, 8)))
+        expected = brute_force_scores(docs, text)
+        scores = index.query(text)
+        assert_scores_close({doc_id: scores[doc_id] for doc_id in docs}, expected)
+        ids = rng.sample(sorted(docs), 30)
+        subset = index.score_ids(index.query_vector(text), ids).tolist()
+        assert_scores_close(dict(zip(ids, subset)), {doc_id: expected[doc_id] for doc_id in ids})
+
+
+def test_delta_uses_base_idf_until_compaction(monkeypatch):
+    monkeypatch.setattr(text_similarity, "COMPACT_MIN_DOCS", 10 ** 6)
+    rng = random.Random(19)
+    base = random_docs(rng, 100)
+    index = build(base)
+    generation = index.generation
+    docs = dict(base)
+    for doc_id in rng.sample(sorted(base), 20):
+        del docs[doc_id]
+        index.remove(doc_id)
+    for doc_id, text in {**random_docs(rng, 15, start=90), **random_docs(rng, 30, start=101)}.items():
+        docs[doc_id] = text
+        index.add(doc_id, text)
+
+    text = "senior python backend engineer with docker"
+    scores = index.query(text)
+    assert index.generation == generation
+    # Reads before compaction keep the IDF of the base segment
+    assert_scores_close({doc_id: scores[doc_id] for doc_id in docs}, brute_force_scores(docs, text, base))
+    assert all(scores[doc_id] == 0.0 for doc_id in set(base) - set(docs))
+
+    index.compact()
+    scores = index.query(text)
+    assert index.generation == generation + 1
+    assert_scores_close({doc_id: scores[doc_id] for doc_id in docs}, brute_force_scores(docs, text))
+
+
+def test_background_compaction_replays_writes_made_meanwhile(monkeypatch):
+    monkeypatch.setattr(text_similarity, "COMPACT_MIN_DOCS", 5)
+    rng = random.Random(7)
+    docs = random_docs(rng, 50)
+    index = build(docs)
+    generation = index.generation
+    for doc_id, text in random_docs(rng, 6, start=51).items():
+        docs[doc_id] = text
+        index.add(doc_id, text)
+    # Reads never compact, however large the delta
+    index.snapshot()
+    assert index.generation == generation and index.needs_compaction()
+
+    built_from = dict(docs)
+
+    async def main():
+        compaction = asyncio.create_task(index.compact_in_background())
+        await asyncio.sleep(0)
+        # Written while the build runs on its thread
+        docs[1] = "python developer"
+        index.add(1, docs[1])
+        index.remove(2)
+        del docs[2]
+        docs[57] = "java backend engineer"
+        index.add(57, docs[57])
+        return await compaction
+
+    assert asyncio.run(main())
+    assert index.generation == generation + 1 and len(index._delta) == 2
+    # The replayed writes are weighted with the IDF of the new base segment
+    text = "senior python backend engineer with docker"
+    scores = index.query(text)
+    assert_scores_close({doc_id: scores[doc_id] for doc_id in docs}, brute_force_scores(docs, text, built_from))
+
+
+def test_sparse_queries_match_the_full_pass():
+    rng = random.Random(4)
+    docs = random_docs(rng, 100)
+    index = build(docs)
+    for doc_id, text in random_docs(rng, 10, start=101).items():
+        index.add(doc_id, text)
+    snapshot = index.snapshot()
+    for _ in range(10):
+        text = " ".join(rng.choices(WORDS, k=rng.randint(1, 8)))
+        query = snapshot.query_vector(text)
+        assert list(query[0]) == sorted(query[0])
+        scores = snapshot.query(text)
+        ids = list(range(1, 111))
+        assert snapshot.score_ids(query, ids).tolist() == [scores[doc_id] for doc_id in ids]
+        ranked_ids, ranked_scores = snapshot.ranked(query)
+        assert sorted(ranked_ids.tolist()) == ids
+        assert ranked_scores.tolist() == sorted((scores[doc_id] for doc_id in ids), reverse=True)
+    assert snapshot.similarity(docs[1], docs[1]) == 100.0
+    assert abs(snapshot.similarity(docs[1], docs[2])
+               - brute_force_scores({2: docs[2]}, docs[1], docs)[2]) < 0.02
+
+
+def test_snapshot_isolated_from_insert_then_delete():
+    index = build({1: DOCS[1], 2: DOCS[2]})
+    snapshot = index.snapshot()
+    query = snapshot.query_vector("Python FastAPI developer")
+    before = snapshot.score_ids(query, [1, 2]).tolist()
+
+    index.add(3, DOCS[3])
+    index.remove(1)
+
+    assert snapshot.score_ids(query, [1, 2]).tolist() == before
+    assert before[0] > 0
+    assert index.snapshot().score_ids(query, [1]).tolist() == [0.0]